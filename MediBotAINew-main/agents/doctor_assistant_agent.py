@@ -1,6 +1,6 @@
 # agents/doctor_assistant_agent.py
-import requests
 import json
+from llm.registry import get_backend
 from context_filter import is_medical_context, filter_response, create_medical_prompt, REJECTION_MESSAGE
 
 class DoctorAssistantAgent:
@@ -19,21 +19,25 @@ class DoctorAssistantAgent:
         return {"error": "Unknown message type"}
 
     def analyze_vitals(self, vitals: dict):
-        """Provide AI-powered medical analysis using Ollama"""
+        """Provide AI-powered medical analysis using the configured LLM backend"""
+        ai_analysis = self.llm_analysis(vitals)
+        if ai_analysis is None:
+            return self._fallback_analysis(vitals)
+        return ai_analysis
+
+    def analyze_vitals_fast(self, vitals: dict):
+        """Instant rule-based analysis, no LLM round trip"""
+        return self._fallback_analysis(vitals)
+
+    def llm_analysis(self, vitals: dict):
+        """Ask the LLM backend for a structured analysis, returns None if it is unavailable"""
         
         heart_rate = vitals.get("heart_rate", 0)
         bp = vitals.get("bp", 0)
         spo2 = vitals.get("spo2", 0)
         glucose = vitals.get("glucose", 0)
         
-        # Create medical-focused prompt
-        context = f"Heart Rate: {heart_rate} bpm, BP: {bp} mmHg, SpO2: {spo2}%, Glucose: {glucose} mg/dL"
-        prompt = create_medical_prompt(
-            f"Analyze these vital signs: {context}",
-            context
-        )
-        
-        # Original prompt for structured output
+        # Structured output prompt
         prompt = f"""You are MediBot AI, a specialized medical assistant. ONLY respond to medical and health questions.
 
 Analyze these vital signs and provide a structured medical assessment:
@@ -56,30 +60,15 @@ Provide analysis in this exact JSON format:
 Be concise and medically accurate. Focus on actionable insights."""
         
         try:
-            # Call Ollama API
-            response = requests.post(
-                "http://localhost:11434/api/generate",
-                json={
-                    "model": "llama3.2",
-                    "prompt": prompt,
-                    "stream": False,
-                    "format": "json"
-                },
-                timeout=30
-            )
-            
-            if response.status_code == 200:
-                ollama_response = response.json()
-                ai_analysis = json.loads(ollama_response["response"])
-                print(f"Ollama analysis: {ai_analysis}")
-                return ai_analysis
-            else:
-                print(f"Ollama API error: {response.status_code}")
-                return self._fallback_analysis(vitals)
+            # Call the configured LLM backend (Ollama by default)
+            response = get_backend().generate(prompt, format="json")
+            ai_analysis = json.loads(response)
+            print(f"LLM analysis: {ai_analysis}")
+            return ai_analysis
                 
         except Exception as e:
-            print(f"Ollama connection failed: {e}")
-            return self._fallback_analysis(vitals)
+            print(f"LLM backend failed: {e}")
+            return None
     
     def _fallback_analysis(self, vitals):
         """Fallback analysis if Ollama is unavailable"""
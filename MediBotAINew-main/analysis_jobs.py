@@ -0,0 +1,118 @@
+"""
+Two-Phase Analysis - Instant rule-based result, LLM enrichment delivered later
+"""
+import asyncio
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+# Keep at most this many analyses around for polling
+MAX_ANALYSES = 500
+
+# Upper bound for long-poll waits so a request is never held open for long
+MAX_WAIT_SECONDS = 25
+
+def _wake(future):
+    # Runs on the waiter's event loop; the wait may already have timed out
+    if not future.done():
+        future.set_result(None)
+
+class AnalysisJobStore:
+    def __init__(self, max_analyses=MAX_ANALYSES, max_workers=2):
+        self.max_analyses = max_analyses
+        self.analyses = OrderedDict()
+        # analysis_id -> [(loop, future)] of long polls waiting for enrichment
+        self.waiters = {}
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm-enrich")
+
+    def start(self, vitals: dict, fast_analysis, enrich_analysis) -> dict:
+        """Return the rule-based analysis now and enrich it with the LLM in the background"""
+        analysis_id = f"AN_{uuid.uuid4().hex[:8].upper()}"
+
+        entry = {
+            "analysis_id": analysis_id,
+            "status": "pending",
+            "source": "rule_based",
+            "analysis": fast_analysis(vitals),
+            "created_at": datetime.now().isoformat(),
+            "completed_at": None
+        }
+
+        with self.lock:
+            self.analyses[analysis_id] = entry
+            # Drop the oldest analyses once the store is full
+            evicted = []
+            while len(self.analyses) > self.max_analyses:
+                old_id, _ = self.analyses.popitem(last=False)
+                evicted.append(old_id)
+            snapshot = dict(entry)
+
+        for old_id in evicted:
+            self._notify(old_id)
+
+        self.executor.submit(self._enrich, analysis_id, vitals, enrich_analysis)
+        return snapshot
+
+    def _enrich(self, analysis_id: str, vitals: dict, enrich_analysis):
+        try:
+            enriched = enrich_analysis(vitals)
+        except Exception as e:
+            print(f"LLM enrichment failed for {analysis_id}: {e}")
+            enriched = None
+
+        with self.lock:
+            entry = self.analyses.get(analysis_id)
+            if entry is None:
+                return
+            if enriched is not None:
+                entry["analysis"] = enriched
+                entry["source"] = "llm"
+            else:
+                # Keep the rule-based result, it is the final answer now
+                entry["enrichment_error"] = "LLM unavailable"
+            entry["status"] = "complete"
+            entry["completed_at"] = datetime.now().isoformat()
+
+        self._notify(analysis_id)
+
+    def _notify(self, analysis_id: str):
+        """Wake every long poll on this analysis (it completed or was evicted)"""
+        with self.lock:
+            waiters = self.waiters.pop(analysis_id, [])
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(_wake, future)
+
+    def get(self, analysis_id: str):
+        """Get an analysis by ID as it is now"""
+        with self.lock:
+            entry = self.analyses.get(analysis_id)
+            return dict(entry) if entry else None
+
+    async def wait(self, analysis_id: str, timeout: float):
+        """
+        Long-poll until enrichment completes, for at most MAX_WAIT_SECONDS.
+        Waits on the event loop, so polling clients don't hold threadpool workers.
+        """
+        loop = asyncio.get_running_loop()
+        with self.lock:
+            entry = self.analyses.get(analysis_id)
+            if entry is None or entry["status"] == "complete" or timeout <= 0:
+                return dict(entry) if entry else None
+            future = loop.create_future()
+            self.waiters.setdefault(analysis_id, []).append((loop, future))
+
+        try:
+            await asyncio.wait_for(future, min(timeout, MAX_WAIT_SECONDS))
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            with self.lock:
+                waiters = self.waiters.get(analysis_id)
+                if waiters and (loop, future) in waiters:
+                    waiters.remove((loop, future))
+                    if not waiters:
+                        del self.waiters[analysis_id]
+        return self.get(analysis_id)
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Benchmark: bulk directory import throughput at different concurrency levels
+
+Builds a directory of distinct report files (the samples in ../mock_documents
+with a unique trailer each) and imports it with 1, 4 and 16 files in flight,
+first into local storage and then into an offline stand-in for Supabase with a
+fixed round-trip latency. Background processing is not started, so this
+measures hashing, storing and record creation only.
+
+Run from MediBotAINew-main:  python benchmarks/bench_bulk_import.py [files] [latency_ms]
+"""
+import asyncio
+import glob
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SAMPLES = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "mock_documents")
+
+WORKDIR = tempfile.mkdtemp(prefix="bench_import_")
+# Configure an isolated store before the records modules read the environment
+os.environ["RECORDS_DB_PATH"] = os.path.join(WORKDIR, "records.db")
+os.environ["STORAGE_BACKEND"] = "local"
+os.environ["LOCAL_STORAGE_PATH"] = os.path.join(WORKDIR, "files")
+
+import medical_records_system
+from records_import import import_directory
+from storage.backends import SupabaseStorageBackend
+from storage.blob_store import BlobStore
+from storage.memory_client import InMemoryStorageClient
+
+CONCURRENCY = (1, 4, 16)
+
+def build_directory(files: int, tag: str) -> str:
+    samples = [open(path, "rb").read() for path in sorted(glob.glob(os.path.join(SAMPLES, "*.pdf")))]
+    directory = os.path.join(WORKDIR, tag)
+    for i in range(files):
+        patient = os.path.join(directory, f"PAT_{i % 50:03d}")
+        os.makedirs(patient, exist_ok=True)
+        with open(os.path.join(patient, f"report_{i:05d}_2024-01-{i % 28 + 1:02d}.pdf"), "wb") as f:
+            # A trailing comment keeps every file distinct, so nothing is deduplicated
+            f.write(samples[i % len(samples)] + f"\n% {tag} copy {i}\n".encode("ascii"))
+    return directory
+
+def use_backend(backend):
+    medical_records_system.storage = backend
+    medical_records_system.blob_store = BlobStore(backend, os.environ["RECORDS_DB_PATH"])
+
+async def run(files: int, label: str):
+    for concurrency in CONCURRENCY:
+        # Fresh content per run, so earlier runs' blobs don't turn stores into references
+        directory = build_directory(files, f"{label}_{concurrency}")
+        progress = await import_directory(directory, concurrency=concurrency, report=None)
+        print(f"  {label:<8} concurrency {concurrency:>2}: {progress.rate():8.1f} files/s"
+              f"  (imported {progress.imported}, deduplicated {progress.deduplicated}, failed {progress.failed})")
+
+async def main(files: int, latency_ms: float):
+    # One event loop throughout, as in the CLI: the blob store's locks belong to it
+    print(f"{files} files, {os.cpu_count()} cores, workdir {WORKDIR}")
+    await run(files, "local")
+
+    client = InMemoryStorageClient(latency=latency_ms / 1000)
+    use_backend(SupabaseStorageBackend(client))
+    print(f"remote, {latency_ms:.0f} ms per call")
+    await run(files, "remote")
+    print(f"  storage calls {client.calls}, at most {client.max_in_flight} in flight")
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 400,
+                     float(sys.argv[2]) if len(sys.argv) > 2 else 20.0))
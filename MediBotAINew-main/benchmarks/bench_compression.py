@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Benchmark: blob compression ratio and the read-latency cost of decoding
+
+Stores the sample reports in ../mock_documents plus larger synthetic text
+reports through BlobStore on local disk, uncompressed and compressed (hot and
+cold levels), then times full reads (BlobStore.read) and streamed reads
+(first chunk and whole file, as the /file route sends them).
+
+Run from MediBotAINew-main:  python benchmarks/bench_compression.py [rounds]
+"""
+import asyncio
+import glob
+import hashlib
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage import compression
+from storage.backends import LocalStorageBackend
+from storage.blob_store import COLD, BlobStore
+from storage.compression import IDENTITY, ZSTD_AVAILABLE, default_codec
+from storage.streaming import iter_decoded, iter_file
+
+SAMPLES = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "mock_documents")
+
+ANALYTES = ["Hemoglobin", "WBC", "Platelets", "Glucose", "Creatinine", "Sodium", "Potassium", "ALT", "AST"]
+
+def synthetic_report(i: int, lines: int = 4000) -> bytes:
+    """A long lab panel export: the kind of text-heavy file that compresses well"""
+    rng = random.Random(i)
+    rows = [f"PAT_{i:05d},2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d},"
+            f"{rng.choice(ANALYTES)},{rng.uniform(0.5, 250):.1f},{rng.choice(['N', 'H', 'L'])}"
+            for _ in range(lines)]
+    return ("patient_id,date,analyte,value,flag\n" + "\n".join(rows)).encode("utf-8")
+
+def corpus() -> dict:
+    pdfs = [open(path, "rb").read() for path in sorted(glob.glob(os.path.join(SAMPLES, "*.pdf")))]
+    return {"pdf": pdfs, "text": [synthetic_report(i) for i in range(6)]}
+
+async def store_all(store: BlobStore, files: list, workdir: str) -> list:
+    shas = []
+    for i, content in enumerate(files):
+        sha256 = hashlib.sha256(content).hexdigest()
+        staging = os.path.join(workdir, f"{i}.upload")
+        with open(staging, "wb") as f:
+            f.write(content)
+        await store.add(staging, sha256, len(content))
+        shas.append(sha256)
+    return shas
+
+def timed(fn, rounds: int) -> float:
+    """Median milliseconds per call"""
+    samples = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return sorted(samples)[len(samples) // 2]
+
+def stream_costs(store: BlobStore, shas: list, sizes: list, rounds: int):
+    first, whole = [], []
+    for sha256, size in zip(shas, sizes):
+        path, encoding = store.local_file(sha256)
+        chunks = (lambda: iter_file(path, 0, size - 1)) if encoding == IDENTITY else \
+                 (lambda: iter_decoded(path, encoding, 0, size - 1))
+        first.append(timed(lambda: next(chunks()), rounds))
+        whole.append(timed(lambda: sum(len(chunk) for chunk in chunks()), rounds))
+    return sum(first) / len(first), sum(whole) / len(whole)
+
+async def measure(kind: str, files: list, label: str, codec_setting: str, cold: bool, rounds: int):
+    workdir = tempfile.mkdtemp(prefix="bench_compression_")
+    compression.BLOB_COMPRESSION = codec_setting
+    store = BlobStore(LocalStorageBackend(os.path.join(workdir, "files")), os.path.join(workdir, "blobs.db"))
+
+    started = time.perf_counter()
+    shas = await store_all(store, files, workdir)
+    store_ms = (time.perf_counter() - started) * 1000 / len(files)
+    if cold:
+        for sha256 in shas:
+            await store.move(sha256, COLD)
+
+    stats = store.stats()
+    read_ms = []
+    for sha256 in shas:
+        samples = []
+        for _ in range(rounds):
+            began = time.perf_counter()
+            await store.read(sha256)
+            samples.append((time.perf_counter() - began) * 1000)
+        read_ms.append(sorted(samples)[len(samples) // 2])
+    first_ms, stream_ms = stream_costs(store, shas, [len(content) for content in files], rounds)
+
+    print(f"  {kind:<5} {label:<14} ratio {stats['compression_ratio']:6.2f}  store {store_ms:6.2f} ms"
+          f"  read {sum(read_ms) / len(read_ms):6.3f} ms  first chunk {first_ms:6.3f} ms"
+          f"  stream {stream_ms:6.3f} ms")
+
+async def main(rounds: int):
+    files = corpus()
+    for kind, contents in files.items():
+        total = sum(len(content) for content in contents)
+        print(f"{kind}: {len(contents)} files, {total / 1024:.0f} KB, median of {rounds} reads each")
+    print(f"zstd available: {ZSTD_AVAILABLE}, default codec: {default_codec()}")
+
+    variants = [("uncompressed", "off", False), ("gzip hot", "gzip", False), ("gzip cold", "gzip", True)]
+    if ZSTD_AVAILABLE:
+        variants += [("zstd hot", "zstd", False), ("zstd cold", "zstd", True)]
+    for kind, contents in files.items():
+        for label, setting, cold in variants:
+            await measure(kind, contents, label, setting, cold, rounds)
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 50))
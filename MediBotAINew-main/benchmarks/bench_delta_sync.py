@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Benchmark: staying in sync with /changes?since= vs re-downloading /list after every change
+
+Seeds N synthetic records, then repeatedly changes a few of them through the
+batch endpoint and has a client catch up, either by fetching the full list
+again or by asking for the changes since its last sequence number.
+
+Run from MediBotAINew-main:  python benchmarks/bench_delta_sync.py [records] [rounds] [changes_per_round]
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+WORKDIR = tempfile.mkdtemp(prefix="bench_delta_")
+os.environ["RECORDS_DB_PATH"] = os.path.join(WORKDIR, "records.db")
+os.environ["STORAGE_BACKEND"] = "local"
+os.environ["LOCAL_STORAGE_PATH"] = os.path.join(WORKDIR, "files")
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from bench_records_store import synthetic_records
+from db.database import get_records_store
+from medical_records_system import setup_medical_records_system
+
+def change_some(client, round_no: int, per_round: int):
+    operations = [{"op": "update", "record_id": f"MR_{(round_no * per_round + i) * 7:08X}",
+                   "changes": {"notes": f"reviewed in round {round_no}"}} for i in range(per_round)]
+    client.post("/api/medical-records/batch", json={"operations": operations, "fields": "record_id"})
+
+def main(records: int, rounds: int, per_round: int):
+    get_records_store().insert_many(list(synthetic_records(records)))
+    app = FastAPI()
+    setup_medical_records_system(app)
+    with TestClient(app) as client:
+        first = client.get("/api/medical-records/changes?fields=record_id").json()
+        seq, epoch = first["seq"], first["epoch"]
+
+        full_bytes = delta_bytes = 0
+        full_time = delta_time = 0.0
+        for round_no in range(rounds):
+            change_some(client, round_no, per_round)
+
+            started = time.perf_counter()
+            full_bytes += len(client.get("/api/medical-records/list").content)
+            full_time += time.perf_counter() - started
+
+            started = time.perf_counter()
+            response = client.get(f"/api/medical-records/changes?since={seq}&epoch={epoch}")
+            delta_time += time.perf_counter() - started
+            delta_bytes += len(response.content)
+            body = response.json()
+            assert not body["reset"] and len(body["changes"]) == per_round, body
+            seq = body["seq"]
+
+    print(f"{records} records, {rounds} rounds of {per_round} changes")
+    print(f"  full /list     {full_bytes / rounds / 1024:10.1f} KB/round {full_time / rounds * 1000:8.2f} ms/round")
+    print(f"  /changes?since {delta_bytes / rounds / 1024:10.1f} KB/round {delta_time / rounds * 1000:8.2f} ms/round")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20_000,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 10,
+         int(sys.argv[3]) if len(sys.argv) > 3 else 10)
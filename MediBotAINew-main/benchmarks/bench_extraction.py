@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Benchmark: PDF text and lab-value extraction throughput across process pool sizes
+
+Parses the sample reports in ../mock_documents (each page once per round) with
+1, 2, 4 ... workers up to the core count and reports pages per second, then
+the cost of a content-hash cache hit.
+
+Run from MediBotAINew-main:  python benchmarks/bench_extraction.py [documents]
+"""
+import asyncio
+import glob
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from extraction.engine import ExtractionEngine, extract_document
+
+SAMPLES = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "mock_documents")
+
+def worker_counts():
+    counts, n = [], 1
+    while n < (os.cpu_count() or 1):
+        counts.append(n)
+        n *= 2
+    return counts + [os.cpu_count() or 1]
+
+def main(documents: int):
+    samples = [open(path, "rb").read() for path in sorted(glob.glob(os.path.join(SAMPLES, "*.pdf")))]
+    batch = [samples[i % len(samples)] for i in range(documents)]
+    pages = sum(extract_document(data)["pages"] for data in samples) * documents // len(samples)
+    print(f"{documents} documents ({pages} pages) from {len(samples)} samples, {os.cpu_count()} cores")
+
+    started = time.perf_counter()
+    for data in batch:
+        extract_document(data)
+    inline = time.perf_counter() - started
+    print(f"  {'inline (no pool)':<18} {pages / inline:9.0f} pages/s")
+
+    for workers in worker_counts():
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(extract_document, samples))  # start the workers
+            started = time.perf_counter()
+            list(pool.map(extract_document, batch, chunksize=max(1, documents // (workers * 8))))
+            elapsed = time.perf_counter() - started
+        print(f"  {f'{workers} worker(s)':<18} {pages / elapsed:9.0f} pages/s   speedup {inline / elapsed:4.1f}x")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = ExtractionEngine(os.path.join(tmp, "records.db"), workers=1)
+
+        async def cache_hits():
+            await engine.extract_bytes(samples[0])
+            started = time.perf_counter()
+            for _ in range(10000):
+                await engine.extract_bytes(samples[0])
+            return (time.perf_counter() - started) / 10000
+
+        per_hit = asyncio.run(cache_hits())
+        engine.close()
+    print(f"  cache hit (hash + lookup) {per_hit * 1e6:.1f} µs per document")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2400)
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: trigram-indexed drug lookups as the catalog grows
+
+Run from MediBotAINew-main:  python benchmarks/bench_fuzzy_lookup.py
+"""
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from enhanced_doctor_assistant import DRUGS
+from utils.fuzzy_index import FuzzyIndex, normalize_name, trigrams
+
+CONSONANTS = "bcdfglmnprstvxz"
+VOWELS = "aeiou"
+# Shared class suffixes make many names overlap, as in real formularies
+SUFFIXES = ["pril", "olol", "sartan", "statin", "dipine", "azole", "cillin", "mycin", "floxacin",
+            "mab", "tinib", "prazole", "gliptin", "semide", "done", "pam", "ide", "ine"]
+
+def synthetic_names(count: int, seed: int = 7) -> list:
+    """Drug-like names: two or three random consonant-vowel syllables plus a class suffix"""
+    rng = random.Random(seed)
+    names = set(DRUGS)
+    while len(names) < count:
+        stem = "".join(rng.choice(CONSONANTS) + rng.choice(VOWELS) for _ in range(rng.randint(2, 3)))
+        names.add(stem + rng.choice(SUFFIXES))
+    return sorted(names)
+
+def typo(name: str, rng: random.Random) -> str:
+    i = rng.randrange(len(name) - 1)
+    return name[:i] + name[i + 1] + name[i] + name[i + 2:]
+
+def scan_best(grams_by_name: dict, query: str):
+    """Baseline without an index: score every name in the catalog"""
+    query_grams = trigrams(normalize_name(query))
+    return max(grams_by_name, key=lambda name: len(query_grams & grams_by_name[name]) /
+               len(query_grams | grams_by_name[name]))
+
+def run(sizes=(100, 1000, 5000, 20000), number=2000):
+    rng = random.Random(1)
+    for size in sizes:
+        names = synthetic_names(size)
+        index = FuzzyIndex(names)
+        grams_by_name = {name: trigrams(name) for name in names}
+        queries = [typo(rng.choice(names), rng) for _ in range(50)]
+        prefixes = [rng.choice(names)[:3] for _ in range(50)]
+
+        fuzzy = timeit.timeit(lambda: index.best(queries[rng.randrange(50)]), number=number) / number * 1e6
+        prefix = timeit.timeit(lambda: index.complete(prefixes[rng.randrange(50)]), number=number) / number * 1e6
+        scan = timeit.timeit(lambda: scan_best(grams_by_name, queries[rng.randrange(50)]), number=number // 10) / (number // 10) * 1e6
+        exact = timeit.timeit(lambda: index.best("metformin"), number=number) / number * 1e6
+        print(f"{size:>6} names   exact {exact:7.1f} us   fuzzy {fuzzy:7.1f} us   "
+              f"full scan {scan:8.1f} us   prefix {prefix:5.1f} us")
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: single-pass keyword automaton vs the old per-keyword substring scans
+
+Run from MediBotAINew-main:  python benchmarks/bench_keyword_matcher.py
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from context_filter import ALLOWED_TOPICS, NON_MEDICAL_TOPICS
+from chat_endpoint import route_query
+from utils.keyword_matcher import KeywordMatcher
+
+QUERIES = [
+    "What is a normal heart rate for adults?",
+    "Tell me about metformin side effects",
+    "Is my blood pressure of 150 too high?",
+    "What's the weather like tomorrow in Paris?",
+    "My oxygen saturation dropped to 91 percent after climbing stairs, should I worry?",
+    "Can you explain how the reminders feature on the dashboard works for my appointments?",
+    "I have had a persistent headache and mild dizziness since yesterday evening",
+]
+
+def legacy_route(query: str):
+    """The previous is_medical_context + handle_chat if-chain, kept for comparison"""
+    query_lower = query.lower()
+
+    is_medical = None
+    for topic in ALLOWED_TOPICS:
+        if topic in query_lower:
+            is_medical = True
+            break
+    if is_medical is None:
+        for topic in NON_MEDICAL_TOPICS:
+            if topic in query_lower:
+                is_medical = False
+                break
+    if is_medical is False:
+        return False, None
+
+    query_lower = query.lower()
+    for condition in ["hypertension", "diabetes", "hypoxemia"]:
+        if condition in query_lower:
+            return True, condition
+    for med in ["metformin", "lisinopril", "amlodipine"]:
+        if med in query_lower:
+            return True, med
+    if "blood pressure" in query_lower or "bp" in query_lower:
+        return True, "blood_pressure"
+    if "heart rate" in query_lower or "pulse" in query_lower:
+        return True, "heart_rate"
+    if "oxygen" in query_lower or "spo2" in query_lower:
+        return True, "spo2"
+    if "glucose" in query_lower or "sugar" in query_lower:
+        return True, "glucose"
+    return True, None
+
+def bench(label, fn, number=20000):
+    total = timeit.timeit(lambda: [fn(q) for q in QUERIES], number=number)
+    per_query_us = total / (number * len(QUERIES)) * 1e6
+    print(f"{label:<28} {per_query_us:8.2f} us/query")
+    return per_query_us
+
+CLINICAL_NOTE = (
+    "Patient reports intermittent chest discomfort over the past week, worse on exertion, "
+    "with occasional shortness of breath and fatigue. Home readings show elevated systolic "
+    "values in the mornings. Currently taking lisinopril and a statin, adherence is good. "
+    "Denies fever, cough or recent travel. Family history of cardiac disease. Requests "
+    "guidance on lifestyle changes, sodium intake, exercise tolerance and when to return "
+    "for follow-up testing, including lipid panel and kidney function labs."
+) * 2
+
+def scaling(table_sizes=(54, 500, 5000), number=2000):
+    """Legacy cost grows with the keyword table, the automaton's does not"""
+    print(f"\nscaling on a {len(CLINICAL_NOTE)}-char clinical note (find every matching keyword)")
+    base = list(ALLOWED_TOPICS) + list(NON_MEDICAL_TOPICS)
+    for size in table_sizes:
+        # Synthetic drug-like names that never occur, the worst case for the scan
+        keywords = base + [f"zz{i:05d}mab" for i in range(max(0, size - len(base)))]
+        matcher = KeywordMatcher((kw, kw) for kw in keywords)
+        note = CLINICAL_NOTE.lower()
+
+        legacy = timeit.timeit(lambda: [kw for kw in keywords if kw in note], number=number) / number * 1e6
+        automaton = timeit.timeit(lambda: matcher.matches(note), number=number) / number * 1e6
+        print(f"  {len(keywords):>5} keywords   legacy {legacy:9.1f} us   automaton {automaton:7.1f} us   "
+              f"speedup {legacy / automaton:6.1f}x")
+
+if __name__ == "__main__":
+    print(f"{len(ALLOWED_TOPICS) + len(NON_MEDICAL_TOPICS)} topic keywords, {len(QUERIES)} queries\n")
+    legacy = bench("legacy substring scans", legacy_route)
+    automaton = bench("single-pass automaton", route_query)
+    print(f"\nspeedup: {legacy / automaton:.2f}x")
+    print("note: the automaton also enforces word boundaries the legacy scan lacks")
+    scaling()
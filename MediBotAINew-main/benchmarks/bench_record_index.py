@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Benchmark: patient history and search through the in-memory record index vs the old list scans
+
+Run from MediBotAINew-main:  python benchmarks/bench_record_index.py [sizes...]
+"""
+import os
+import random
+import sys
+import time
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_records_store import synthetic_records
+from db.record_index import RecordIndex
+
+def legacy_history(records, patient_id):
+    patient_records = [r for r in records if r["patient_id"] == patient_id]
+    return sorted(patient_records, key=lambda x: x["test_date"], reverse=True)
+
+def legacy_search(records, test_type=None, lab_name=None, date_from=None, date_to=None):
+    results = records.copy()
+    if test_type:
+        results = [r for r in results if test_type.lower() in r["test_type"].lower()]
+    if lab_name:
+        results = [r for r in results if lab_name.lower() in r["lab_name"].lower()]
+    if date_from:
+        results = [r for r in results if r["test_date"] >= date_from]
+    if date_to:
+        results = [r for r in results if r["test_date"] <= date_to]
+    return results
+
+def per_call_ms(fn, number):
+    return timeit.timeit(fn, number=number) / number * 1e3
+
+def run(sizes):
+    print(f"{'records':>8}  {'history (old / index)':>24}  {'7-day range (old / index)':>28}  {'type+lab (old / index)':>26}")
+    for size in sizes:
+        records = list(synthetic_records(size))
+        started = time.perf_counter()
+        index = RecordIndex(records)
+        build_seconds = time.perf_counter() - started
+
+        rng = random.Random(9)
+        patients = [rng.choice(records)["patient_id"] for _ in range(50)]
+        week = {"date_from": "2022-03-01", "date_to": "2022-03-07"}
+        narrow = {"test_type": "mri", "lab_name": "harbor path", **week}
+
+        rounds = 5 if size > 100_000 else 20
+        history = (per_call_ms(lambda: legacy_history(records, patients[rng.randrange(50)]), rounds),
+                   per_call_ms(lambda: index.patient_history(patients[rng.randrange(50)]), 2000))
+        dates = (per_call_ms(lambda: legacy_search(records, **week), rounds),
+                 per_call_ms(lambda: index.search(**week), 200))
+        fields = (per_call_ms(lambda: legacy_search(records, **narrow), rounds),
+                  per_call_ms(lambda: index.search(**narrow), 200))
+
+        print(f"{size:>8}  " + "  ".join(f"{old:10.3f} / {new:7.3f} ms".rjust(26) for old, new in (history, dates, fields))
+              + f"   (index built in {build_seconds:.1f}s)")
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 500_000]
+    run(sizes)
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark: medical record lookups in the SQLite store vs the old list scans, as the collection grows
+
+Run from MediBotAINew-main:  python benchmarks/bench_records_store.py [sizes...]
+The default sizes go up to 1M records (about 1 GB of temporary disk, a few minutes).
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db.database import RecordsStore
+
+TEST_TYPES = ["Blood Test", "X-Ray", "MRI", "CT Scan", "ECG", "Ultrasound", "Biopsy", "Urine Test"]
+LABS = [f"{city} {kind}" for city in ["City", "Metro", "North", "Valley", "Harbor"]
+        for kind in ["Lab", "Diagnostics", "Imaging", "Pathology"]]
+
+def synthetic_records(count: int, seed: int = 3):
+    """About 20 records per patient spread over five years"""
+    rng = random.Random(seed)
+    patients = max(1, count // 20)
+    for i in range(count):
+        yield {
+            "record_id": f"MR_{i:08X}",
+            "patient_id": f"PAT_{rng.randrange(patients):06d}",
+            "patient_name": "Synthetic Patient",
+            "test_type": rng.choice(TEST_TYPES),
+            "lab_name": rng.choice(LABS),
+            "test_date": f"{rng.randint(2020, 2024)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            "upload_date": "2024-06-01 12:00:00",
+            "file_name": f"report_{i}.pdf",
+            "file_path": f"MR_{i:08X}_report_{i}.pdf",
+            "file_size": rng.randint(20_000, 2_000_000),
+            "notes": "",
+            "ai_summary": "",
+            "cloud_url": "",
+            "storage_type": "local"
+        }
+
+def per_call_us(fn, number):
+    return timeit.timeit(fn, number=number) / number * 1e6
+
+def run(sizes):
+    print(f"{'records':>9} {'get':>9} {'history':>9} {'patient':>9} {'7-day':>9} {'list scan get':>14}")
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            store = RecordsStore(os.path.join(tmp, "records.db"))
+            started = time.perf_counter()
+            batch = []
+            for record in synthetic_records(size):
+                batch.append(record)
+                if len(batch) == 50_000:
+                    store.insert_many(batch)
+                    batch = []
+            store.insert_many(batch)
+            load_seconds = time.perf_counter() - started
+
+            rng = random.Random(5)
+            ids = [f"MR_{rng.randrange(size):08X}" for _ in range(1000)]
+            patients = [store.get(record_id)["patient_id"] for record_id in ids[:100]]
+
+            get = per_call_us(lambda: store.get(ids[rng.randrange(1000)]), 5000)
+            history = per_call_us(lambda: store.patient_history(patients[rng.randrange(100)]), 500)
+            listing = per_call_us(lambda: store.list(patients[rng.randrange(100)]), 500)
+            week = per_call_us(lambda: store.search(date_from="2022-03-01", date_to="2022-03-07"), 20)
+
+            # The old RECORDS_DATABASE list, only up to sizes that fit comfortably in memory
+            scan = "-"
+            if size <= 100_000:
+                records = list(synthetic_records(size))
+                target = ids[0]
+                scan_us = per_call_us(lambda: next(r for r in records if r["record_id"] == target), 20)
+                scan = f"{scan_us:11.1f} us"
+
+            store.close()
+            print(f"{size:>9} {get:7.1f}us {history:7.1f}us {listing:7.1f}us {week / 1000:7.2f}ms {scan:>14}"
+                  f"   (loaded in {load_seconds:.1f}s)")
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    run(sizes)
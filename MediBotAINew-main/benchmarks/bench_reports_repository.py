@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Benchmark: ReportsRepository vs the old MOCK_REPORTS list at 100k reports
+
+The old way kept every report, with up to 1000 characters of extracted text,
+in a list that GET /api/reports re-sorted by date on every call, and found
+reports for analyze / send-to-doctor with a linear scan. The repository keeps
+an id index and date-sorted keys, and spills texts past its memory cap.
+
+Run from MediBotAINew-main:  python benchmarks/bench_reports_repository.py [reports] [memory_mb]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db.reports_repository import ReportsRepository
+from utils.pagination import page_keys
+
+TYPES = ["Blood Test", "Lipid Panel", "Thyroid Panel", "X-Ray", "MRI"]
+
+def synthetic_reports(count: int, seed: int = 5):
+    rng = random.Random(seed)
+    words = "".join(rng.choice("abcdefghij klmnop") for _ in range(8000))
+    for i in range(count):
+        yield {
+            "id": f"rpt_{i:06x}",
+            "name": f"report_{i}.pdf",
+            "type": rng.choice(TYPES),
+            "patient_id": f"PT{rng.randint(100, 999)}",
+            "date": f"{rng.randint(2020, 2024)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            "status": "pending",
+            "data": {"hemoglobin": {"value": round(rng.uniform(11, 17), 1), "unit": "g/dL", "normal_range": "12-16"}},
+            "data_source": "extracted",
+            "file_size": rng.randint(20_000, 2_000_000),
+            "sha256": f"{i:064x}",
+            "pages": rng.randint(1, 6),
+            "file_content": f"Report {i} " + words[rng.randrange(7000):][:990]
+        }
+
+def timed(fn, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1000
+
+def fill_mock_list(count: int) -> list:
+    mock_reports = []
+    for report in synthetic_reports(count):
+        mock_reports.insert(0, report)
+    return mock_reports
+
+def fill_repository(count: int, path: str, memory_mb: float) -> ReportsRepository:
+    repo = ReportsRepository(path, memory_limit=int(memory_mb * 1024 * 1024), max_reports=count)
+    for report in synthetic_reports(count):
+        repo.add(report)
+    return repo
+
+def traced(fn):
+    """(result, bytes still allocated by fn) - reports are generated inside, so texts count"""
+    tracemalloc.start()
+    result = fn()
+    used = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, used
+
+def main(count: int, memory_mb: float):
+    lookups = [f"rpt_{i:06x}" for i in random.Random(1).sample(range(count), 200)]
+    generate = timed(lambda: sum(1 for _ in synthetic_reports(count)), 1)
+
+    # Old: list + full sort per GET + linear scan per lookup
+    old_add = timed(lambda: fill_mock_list(count), 1) - generate
+    mock_reports, old_memory = traced(lambda: fill_mock_list(count))
+    old_list = timed(lambda: sorted(mock_reports, key=lambda r: r["date"], reverse=True)[:50], 5)
+    old_lookup = timed(lambda: [next(r for r in mock_reports if r["id"] == rid) for rid in lookups[:20]], 1) / 20
+    del mock_reports
+
+    with tempfile.TemporaryDirectory() as tmp:
+        new_add = timed(lambda: fill_repository(count, os.path.join(tmp, "timed.db"), memory_mb), 1) - generate
+        repo, new_memory = traced(lambda: fill_repository(count, os.path.join(tmp, "spill.db"), memory_mb))
+
+        def page():
+            keys, _ = page_keys(repo.keys, 50, None, descending=True)
+            return repo.get_many([report_id for _, _, report_id in keys])
+
+        # Oldest page: its texts were spilled first, so every one is read back from disk
+        oldest_ids = [report_id for _, _, report_id in repo.keys[:50]]
+        new_list = timed(page, 200)
+        new_spilled_page = timed(lambda: repo.get_many(oldest_ids), 200)
+        new_lookup = timed(lambda: [repo.get(rid, with_content=False) for rid in lookups], 20) / len(lookups)
+        stats = repo.stats()
+
+    print(f"{count} reports, text cap {memory_mb:.0f} MB (generating them: {generate:.0f} ms, not counted)")
+    print(f"  {'':<12} {'insert all':>11} {'newest 50':>10} {'id lookup':>11} {'traced memory':>14}")
+    print(f"  {'MOCK_REPORTS':<12} {old_add:9.0f}ms {old_list:8.2f}ms {old_lookup * 1000:9.1f}us"
+          f" {old_memory / 1024 / 1024:12.1f}MB")
+    print(f"  {'repository':<12} {new_add:9.0f}ms {new_list:8.2f}ms {new_lookup * 1000:9.1f}us"
+          f" {new_memory / 1024 / 1024:12.1f}MB")
+    print(f"  oldest 50 (texts on disk): {new_spilled_page:.2f} ms; {stats['contents_spilled']} texts spilled"
+          f" in {stats['spill_writes']} writes, {stats['content_bytes_in_memory'] / 1024 / 1024:.1f} MB of text in memory")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000,
+         float(sys.argv[2]) if len(sys.argv) > 2 else 16)
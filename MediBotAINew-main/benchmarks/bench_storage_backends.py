@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Benchmark: storage I/O called inline on the event loop vs through the async backends
+
+Runs offline: the Supabase backend wraps InMemoryStorageClient with a simulated
+round trip. Reports wall time for a burst of concurrent requests and the worst
+event-loop stall seen by a 1 ms heartbeat task while they run.
+
+Run from MediBotAINew-main:  python benchmarks/bench_storage_backends.py [requests] [latency_ms]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage.backends import LocalStorageBackend, SupabaseStorageBackend
+from storage.memory_client import InMemoryStorageClient
+
+async def heartbeat(stalls: list, stop: asyncio.Event):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(0.001)
+        stalls.append(time.perf_counter() - started - 0.001)
+
+async def measure(name: str, make_request, requests: int):
+    stalls, stop = [], asyncio.Event()
+    beat = asyncio.create_task(heartbeat(stalls, stop))
+    await asyncio.sleep(0)
+    started = time.perf_counter()
+    await asyncio.gather(*(make_request(i) for i in range(requests)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await beat
+    print(f"  {name:<34} {elapsed * 1000:9.1f} ms total   worst loop stall {max(stalls, default=0) * 1000:8.1f} ms")
+
+async def main(requests: int, latency_ms: float):
+    latency = latency_ms / 1000
+    payload = os.urandom(256 * 1024)
+    print(f"{requests} concurrent downloads, {latency_ms:g} ms simulated Supabase round trip")
+
+    client = InMemoryStorageClient(latency=latency)
+    for i in range(requests):
+        client.objects[f"r/{i}"] = payload
+
+    async def blocking_download(i):
+        # What the routes used to do: the SDK call runs on the event loop thread
+        return client.download_file(f"r/{i}")
+
+    await measure("supabase SDK inline (blocking)", blocking_download, requests)
+
+    for workers in (4, 16):
+        backend = SupabaseStorageBackend(client, max_workers=workers)
+        await measure(f"SupabaseStorageBackend workers={workers}", lambda i: backend.get_bytes(f"r/{i}"), requests)
+        backend.close()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        local = LocalStorageBackend(tmp)
+        for i in range(requests):
+            await local.put_bytes(payload, f"r/{i}")
+
+        async def blocking_read(i):
+            with open(local.local_path(f"r/{i}"), "rb") as f:
+                return f.read()
+
+        await measure("local open().read() inline", blocking_read, requests)
+        await measure("LocalStorageBackend", lambda i: local.get_bytes(f"r/{i}"), requests)
+
+if __name__ == "__main__":
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    latency_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 20
+    asyncio.run(main(requests, latency_ms))
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Benchmark: full-text record search (RecordTextIndex) vs a substring scan, as the collection grows
+
+Each synthetic record gets a short report text (findings drawn from a small
+clinical vocabulary) on top of its metadata.
+
+Run from MediBotAINew-main:  python benchmarks/bench_text_index.py [sizes...]
+"""
+import os
+import random
+import sys
+import time
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_records_store import synthetic_records
+from db.text_index import RecordTextIndex
+
+FINDINGS = [
+    "iron deficiency anemia", "microcytic anemia", "leukocytosis", "thrombocytopenia", "normal sinus rhythm",
+    "atrial fibrillation", "right lower lobe pneumonia", "pleural effusion", "acute cholecystitis",
+    "no acute abnormality", "elevated troponin", "hypokalemia", "renal insufficiency", "fatty liver",
+    "gallstones", "cardiomegaly", "left ventricular hypertrophy", "hyperglycemia", "urinary tract infection",
+]
+ANALYTES = ["Hemoglobin", "WBC", "Platelets", "Glucose", "Creatinine", "Potassium", "Sodium", "Heart Rate"]
+
+def report_text(rng) -> str:
+    values = " ".join(f"{name} {rng.uniform(1, 300):.1f}" for name in rng.sample(ANALYTES, 4))
+    return f"{values}. Findings: {rng.choice(FINDINGS)}; {rng.choice(FINDINGS)}. Impression: {rng.choice(FINDINGS)}."
+
+# The synthetic vocabulary is small, so the clinical words match 15-50% of all records
+# (the worst case: cost grows with the number of matches); the last two are selective
+QUERIES = ["pneumonia", "hemoglobin anemia", "hemo*", '"iron deficiency anemia"', "PAT_000042 anemia", "metro cardio*"]
+
+def per_call_ms(fn, number):
+    return timeit.timeit(fn, number=number) / number * 1000
+
+def run(sizes):
+    print(f"{'records':>9} {'build':>9} " + " ".join(f"{q[:14]:>15}" for q in QUERIES) + f" {'scan':>9}")
+    for size in sizes:
+        rng = random.Random(5)
+        docs = [(record, report_text(rng)) for record in synthetic_records(size)]
+        index = RecordTextIndex()
+        started = time.perf_counter()
+        for record, text in docs:
+            index.add(record, text)
+        build = time.perf_counter() - started
+
+        timings = [per_call_ms(lambda q=q: index.search(q), 5) for q in QUERIES]
+        # What a substring filter over the text costs without an index
+        scan = per_call_ms(lambda: [r for r, text in docs if "pneumonia" in text.lower()], 1)
+        print(f"{size:>9} {build:>8.1f}s " + " ".join(f"{t:>13.2f}ms" for t in timings) + f" {scan:>7.1f}ms")
+
+if __name__ == "__main__":
+    run([int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 300_000])
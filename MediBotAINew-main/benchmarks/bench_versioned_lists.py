@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Benchmark: polling /api/medical-records/list - rebuilt every time vs cached per version vs 304
+
+Seeds N synthetic records, then polls a 100-record page and the full list
+(the dashboard's "everything" view) three ways: with the version bumped
+before every request (the old behaviour, nothing reusable), with the cached
+body of an unchanged version, and with If-None-Match answered by a 304.
+
+Run from MediBotAINew-main:  python benchmarks/bench_versioned_lists.py [records] [polls]
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+WORKDIR = tempfile.mkdtemp(prefix="bench_versioned_")
+os.environ["RECORDS_DB_PATH"] = os.path.join(WORKDIR, "records.db")
+os.environ["STORAGE_BACKEND"] = "local"
+os.environ["LOCAL_STORAGE_PATH"] = os.path.join(WORKDIR, "files")
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from bench_records_store import synthetic_records
+from db.database import get_records_store
+from medical_records_system import get_record_index, setup_medical_records_system
+
+def poll(client, url: str, polls: int, etag: str = None, bump: bool = False) -> float:
+    headers = {"If-None-Match": etag} if etag else {}
+    started = time.perf_counter()
+    for _ in range(polls):
+        if bump:
+            get_record_index().version.bump()
+        response = client.get(url, headers=headers)
+        response.content
+    return (time.perf_counter() - started) / polls
+
+def main(records: int, polls: int):
+    get_records_store().insert_many(list(synthetic_records(records)))
+    app = FastAPI()
+    setup_medical_records_system(app)
+    print(f"{records} records, {polls} polls each")
+    print(f"  {'':<12} {'rebuilt':>10} {'cached':>10} {'304':>10} {'body':>10}")
+    with TestClient(app) as client:
+        for label, url in (("100-page", "/api/medical-records/list?limit=100"),
+                           ("full list", "/api/medical-records/list")):
+            first = client.get(url)
+            rebuilt = poll(client, url, polls, bump=True)
+            cached = poll(client, url, polls)
+            not_modified = poll(client, url, polls, etag=client.get(url).headers["etag"])
+            print(f"  {label:<12} {rebuilt * 1000:8.2f}ms {cached * 1000:8.2f}ms {not_modified * 1000:8.2f}ms"
+                  f" {len(first.content) / 1024:8.0f}KB")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20_000,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 20)
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Benchmark: patient export as one streamed ZIP vs history + one base64 download per record
+
+Uploads N distinct reports for one patient (samples from ../mock_documents
+with a unique trailer, padded to the requested size) to a temporary local
+store, then times both ways of fetching everything and tracks peak Python
+memory while the ZIP is consumed chunk by chunk.
+
+Run from MediBotAINew-main:  python benchmarks/bench_zip_export.py [records] [kb_per_file]
+"""
+import glob
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SAMPLES = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "mock_documents")
+
+WORKDIR = tempfile.mkdtemp(prefix="bench_zip_")
+os.environ["RECORDS_DB_PATH"] = os.path.join(WORKDIR, "records.db")
+os.environ["STORAGE_BACKEND"] = "local"
+os.environ["LOCAL_STORAGE_PATH"] = os.path.join(WORKDIR, "files")
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from medical_records_system import _export_entries, get_record_index, setup_medical_records_system
+from storage.zip_stream import zip_chunks
+
+PATIENT = "PAT_EXPORT"
+
+def upload_all(client, records: int, kb: int):
+    samples = [open(path, "rb").read() for path in sorted(glob.glob(os.path.join(SAMPLES, "*.pdf")))]
+    total = 0
+    for i in range(records):
+        sample = samples[i % len(samples)]
+        # Distinct, incompressible-ish padding so every file is its own blob
+        padding = os.urandom(max(0, kb * 1024 - len(sample)))
+        content = sample + b"\n%" + padding.hex().encode("ascii")[:len(padding)]
+        total += len(content)
+        client.post("/api/medical-records/upload",
+                    files={"file": (f"report_{i:04d}.pdf", content, "application/pdf")},
+                    data={"patient_id": PATIENT, "test_date": f"2024-{i % 12 + 1:02d}-01"})
+    return total
+
+def main(records: int, kb: int):
+    app = FastAPI()
+    setup_medical_records_system(app)
+    with TestClient(app) as client:
+        print(f"Uploading {records} records of ~{kb} KB ...")
+        total = upload_all(client, records, kb)
+
+        started = time.perf_counter()
+        history = client.get(f"/api/medical-records/patient/{PATIENT}/history").json()
+        for record in history["records"]:
+            client.get(f"/api/medical-records/{record['record_id']}/download").json()
+        per_record = time.perf_counter() - started
+
+        started = time.perf_counter()
+        response = client.get(f"/api/medical-records/patient/{PATIENT}/export.zip")
+        via_route = time.perf_counter() - started
+        archive_size = len(response.content)
+
+    # The test client buffers whole responses, so measure memory on the generator itself
+    records_list = get_record_index().patient_history(PATIENT)
+    manifest = {"patient_id": PATIENT, "patient_name": "", "exported_at": "2024-01-01 00:00:00",
+                "total_records": len(records_list), "records": []}
+    tracemalloc.start()
+    started = time.perf_counter()
+    streamed = sum(len(chunk) for chunk in zip_chunks(_export_entries(records_list, manifest)))
+    streaming = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    mb = total / 1024 / 1024
+    print(f"{records} files, {mb:.1f} MB of reports")
+    print(f"  history + {records} base64 downloads: {per_record * 1000:8.1f} ms  ({mb / per_record:6.1f} MB/s)")
+    print(f"  export.zip via the route:           {via_route * 1000:8.1f} ms  ({mb / via_route:6.1f} MB/s),"
+          f" archive {archive_size / 1024 / 1024:.1f} MB")
+    print(f"  zip generator alone:                {streaming * 1000:8.1f} ms, {streamed / 1024 / 1024:.1f} MB,"
+          f" peak traced memory {peak / 1024:.0f} KB")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 300,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 256)
@@ -1,24 +1,23 @@
 """
 Chat endpoint with medical context filtering and knowledge base
 """
-import requests
-from context_filter import is_medical_context, REJECTION_MESSAGE, create_medical_prompt
+from llm.registry import get_backend
+from context_filter import is_medical_context, decide_medical_context, ALLOWED_TOPICS, NON_MEDICAL_TOPICS, REJECTION_MESSAGE, create_medical_prompt
 from medical_knowledge import get_vital_assessment, get_condition_info, get_medication_info, MEDICAL_KNOWLEDGE
+from models.conversation_memory import ConversationMemory
+from knowledge_index import retrieve
+from utils.keyword_matcher import KeywordMatcher
 
-def handle_chat(query: str) -> str:
-    """Handle chat with medical knowledge base"""
-    
-    if not is_medical_context(query):
-        return REJECTION_MESSAGE
-    
-    query_lower = query.lower()
-    
-    # Check for condition queries
-    for condition in ["hypertension", "diabetes", "hypoxemia"]:
-        if condition in query_lower:
-            info = get_condition_info(condition)
-            if info:
-                return f"""**{condition.upper()}**
+# Per-session chat history, bounded by a token budget
+conversation_memory = ConversationMemory()
+
+# ---------------------------
+# Knowledge base answers
+# ---------------------------
+def condition_answer(condition: str):
+    info = get_condition_info(condition)
+    if info:
+        return f"""**{condition.upper()}**
 
 **Definition:** {info['definition']}
 
@@ -29,13 +28,11 @@ def handle_chat(query: str) -> str:
 **Monitoring:** {info['monitoring']}
 
 Consult your healthcare provider for personalized medical advice."""
-    
-    # Check for medication queries
-    for med in ["metformin", "lisinopril", "amlodipine"]:
-        if med in query_lower:
-            info = get_medication_info(med)
-            if info:
-                return f"""**{med.upper()}**
+
+def medication_answer(med: str):
+    info = get_medication_info(med)
+    if info:
+        return f"""**{med.upper()}**
 
 **Class:** {info['class']}
 **Indication:** {info['indication']}
@@ -44,11 +41,10 @@ Consult your healthcare provider for personalized medical advice."""
 **Monitoring Required:** {info['monitoring']}
 
 Always follow your doctor's prescription."""
-    
-    # Check for vital sign queries
-    if "blood pressure" in query_lower or "bp" in query_lower:
-        bp_info = MEDICAL_KNOWLEDGE["vital_signs"]["blood_pressure"]
-        return f"""**BLOOD PRESSURE RANGES**
+
+def blood_pressure_answer(_=None):
+    bp_info = MEDICAL_KNOWLEDGE["vital_signs"]["blood_pressure"]
+    return f"""**BLOOD PRESSURE RANGES**
 
 ✅ **Normal:** {bp_info['normal']}
 ⚠️ **Elevated:** {bp_info['elevated']}
@@ -58,10 +54,10 @@ Always follow your doctor's prescription."""
 🚨 **Hypertensive Crisis:** {bp_info['crisis']}
 
 Regular monitoring and lifestyle modifications are key."""
-    
-    if "heart rate" in query_lower or "pulse" in query_lower:
-        hr_info = MEDICAL_KNOWLEDGE["vital_signs"]["heart_rate"]
-        return f"""**HEART RATE RANGES**
+
+def heart_rate_answer(_=None):
+    hr_info = MEDICAL_KNOWLEDGE["vital_signs"]["heart_rate"]
+    return f"""**HEART RATE RANGES**
 
 ✅ **Normal:** {hr_info['normal']}
 ⬇️ **Bradycardia:** {hr_info['low']}
@@ -70,10 +66,10 @@ Regular monitoring and lifestyle modifications are key."""
 🚨 **Critical High:** {hr_info['critical_high']}
 
 Consult a doctor if you experience persistent abnormal heart rates."""
-    
-    if "oxygen" in query_lower or "spo2" in query_lower:
-        spo2_info = MEDICAL_KNOWLEDGE["vital_signs"]["spo2"]
-        return f"""**OXYGEN SATURATION (SpO2) LEVELS**
+
+def spo2_answer(_=None):
+    spo2_info = MEDICAL_KNOWLEDGE["vital_signs"]["spo2"]
+    return f"""**OXYGEN SATURATION (SpO2) LEVELS**
 
 ✅ **Normal:** {spo2_info['normal']}
 ⚠️ **Mild Hypoxemia:** {spo2_info['mild_hypoxemia']}
@@ -81,10 +77,10 @@ Consult a doctor if you experience persistent abnormal heart rates."""
 🚨 **Severe Hypoxemia:** {spo2_info['severe_hypoxemia']}
 
 Seek immediate medical attention if SpO2 drops below 90%."""
-    
-    if "glucose" in query_lower or "sugar" in query_lower:
-        glucose_info = MEDICAL_KNOWLEDGE["vital_signs"]["glucose"]
-        return f"""**BLOOD GLUCOSE LEVELS**
+
+def glucose_answer(_=None):
+    glucose_info = MEDICAL_KNOWLEDGE["vital_signs"]["glucose"]
+    return f"""**BLOOD GLUCOSE LEVELS**
 
 ✅ **Normal Fasting:** {glucose_info['normal_fasting']}
 ⚠️ **Prediabetes:** {glucose_info['prediabetes']}
@@ -94,8 +90,81 @@ Seek immediate medical attention if SpO2 drops below 90%."""
 ⬆️ **Hyperglycemia:** {glucose_info['hyperglycemia']}
 
 Regular monitoring and proper medication adherence are essential."""
+
+# Intent keywords -> (group, rank, handler, argument); lowest (group, rank) wins,
+# matching the order the knowledge base used to be checked in
+INTENTS = (
+    [(name, (0, i, condition_answer, name)) for i, name in enumerate(["hypertension", "diabetes", "hypoxemia"])] +
+    [(name, (1, i, medication_answer, name)) for i, name in enumerate(["metformin", "lisinopril", "amlodipine"])] +
+    [(kw, (2, 0, blood_pressure_answer, None)) for kw in ["blood pressure", "bp"]] +
+    [(kw, (3, 0, heart_rate_answer, None)) for kw in ["heart rate", "pulse"]] +
+    [(kw, (4, 0, spo2_answer, None)) for kw in ["oxygen", "spo2"]] +
+    [(kw, (5, 0, glucose_answer, None)) for kw in ["glucose", "sugar"]]
+)
+
+# One automaton for topic filtering and intent routing, built once at import
+CHAT_MATCHER = KeywordMatcher(
+    [(topic, ("topic", "allowed")) for topic in ALLOWED_TOPICS] +
+    [(topic, ("topic", "non_medical")) for topic in NON_MEDICAL_TOPICS] +
+    [(keyword, ("intent", intent)) for keyword, intent in INTENTS]
+)
+
+def route_query(query: str):
+    """Single pass over the query: (is_medical, best intent or None)"""
+    topic_labels = set()
+    best_intent = None
+
+    for _, (kind, value) in CHAT_MATCHER.matches(query):
+        if kind == "topic":
+            topic_labels.add(value)
+        elif best_intent is None or value[:2] < best_intent[:2]:
+            best_intent = value
+
+    return decide_medical_context(topic_labels), best_intent
+
+def handle_chat(query: str, session_id: str = None) -> str:
+    """Handle chat with medical knowledge base, remembering the session's recent turns"""
+    
+    is_medical, intent = route_query(query)
+    if not is_medical:
+        return REJECTION_MESSAGE
+    
+    if not session_id:
+        return answer_query(query, intent=intent)
+    
+    history = conversation_memory.build_context(session_id)
+    response = answer_query(query, history, intent)
+    
+    conversation_memory.add_turn(session_id, "user", query)
+    conversation_memory.add_turn(session_id, "assistant", response)
+    return response
+
+def answer_query(query: str, history: str = "", intent=None) -> str:
+    """Answer from the knowledge base, falling back to the LLM with conversation history"""
+    
+    if intent is None:
+        _, intent = route_query(query)
+    
+    if intent is not None:
+        _, _, handler, argument = intent
+        response = handler(argument)
+        if response:
+            return response
+    
+    # Answer straight from the knowledge base when retrieval is confident
+    answer, hits = retrieve(query)
+    if answer:
+        return f"""**{answer['title'].upper()}**
+
+{answer['text']}
+
+Consult your healthcare provider for personalized medical advice."""
     
     # Fallback to AI with enhanced medical context
+    conversation = f"\n{history}\n" if history else ""
+    knowledge = ""
+    if hits:
+        knowledge = "\nRelevant medical knowledge:\n" + "\n\n".join(f"{hit['title']}:\n{hit['text']}" for hit in hits) + "\n"
     prompt = f"""You are MediBot AI, a medical assistant with comprehensive clinical knowledge.
 
 Provide specific, evidence-based medical information. Include:
@@ -103,26 +172,12 @@ Provide specific, evidence-based medical information. Include:
 - Specific medication names and dosages
 - Clear clinical recommendations
 - When to seek emergency care
-
+{knowledge}{conversation}
 User Question: {query}
 
 Provide a detailed, clinically accurate response:"""
     
     try:
-        response = requests.post(
-            "http://localhost:11434/api/generate",
-            json={
-                "model": "llama3.2",
-                "prompt": prompt,
-                "stream": False
-            },
-            timeout=30
-        )
-        
-        if response.status_code == 200:
-            return response.json()["response"]
-        else:
-            return "I can help with medical questions. Please ask about vital signs, symptoms, medications, or MediBot features."
-            
+        return get_backend().generate(prompt)
     except Exception as e:
         return "I can help with medical questions. Please ask about vital signs, symptoms, medications, or MediBot features."
@@ -1,6 +1,7 @@
 """
 Context Filter - Restricts AI responses to medical and project-related queries only
 """
+from utils.keyword_matcher import KeywordMatcher
 
 ALLOWED_TOPICS = [
     "medical", "health", "vital signs", "heart rate", "blood pressure", "spo2", "oxygen",
@@ -11,6 +12,16 @@ ALLOWED_TOPICS = [
     "medibot", "dashboard", "agent", "alarm", "notification", "vitals"
 ]
 
+# Common non-medical topics that get rejected
+NON_MEDICAL_TOPICS = ["weather", "sports", "politics", "entertainment", "movie", "game",
+                      "recipe", "cooking", "travel", "joke", "story", "news"]
+
+# Single automaton over both keyword tables, built once at import
+TOPIC_MATCHER = KeywordMatcher(
+    [(topic, "allowed") for topic in ALLOWED_TOPICS] +
+    [(topic, "non_medical") for topic in NON_MEDICAL_TOPICS]
+)
+
 REJECTION_MESSAGE = """I am MediBot AI, a specialized medical assistant. I can only help with:
 
 🏥 Medical & Health Questions
@@ -29,20 +40,15 @@ Please ask me questions related to healthcare or MediBot features."""
 
 def is_medical_context(query: str) -> bool:
     """Check if query is related to medical/health topics"""
-    query_lower = query.lower()
-    
-    # Check for allowed medical keywords
-    for topic in ALLOWED_TOPICS:
-        if topic in query_lower:
-            return True
-    
-    # Reject common non-medical queries
-    non_medical = ["weather", "sports", "politics", "entertainment", "movie", "game", 
-                   "recipe", "cooking", "travel", "joke", "story", "news"]
+    return decide_medical_context(TOPIC_MATCHER.payloads(query))
+
+def decide_medical_context(topic_labels) -> bool:
+    """Allowed keywords win, then non-medical keywords reject, unclear queries are allowed"""
+    if "allowed" in topic_labels:
+        return True
     
-    for topic in non_medical:
-        if topic in query_lower:
-            return False
+    if "non_medical" in topic_labels:
+        return False
     
     # If unclear, allow (to avoid false rejections)
     return True
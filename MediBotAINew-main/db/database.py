@@ -0,0 +1,168 @@
+# db/database.py
+"""
+Medical Records Store - SQLite (WAL mode) persistence for medical record metadata
+
+The searchable fields live in indexed columns; the full record is kept as JSON
+in `data` so new fields don't need a migration.
+"""
+import json
+import os
+import sqlite3
+import threading
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RECORDS_DB_PATH = os.getenv("RECORDS_DB_PATH", os.path.join(BASE_DIR, "data", "medical_records.db"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    record_id TEXT PRIMARY KEY,
+    patient_id TEXT NOT NULL,
+    test_type TEXT NOT NULL DEFAULT '',
+    lab_name TEXT NOT NULL DEFAULT '',
+    test_date TEXT NOT NULL DEFAULT '',
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_records_patient_date ON records (patient_id, test_date);
+CREATE INDEX IF NOT EXISTS idx_records_test_type ON records (test_type COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_records_lab_name ON records (lab_name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_records_test_date ON records (test_date);
+"""
+
+INDEXED_COLUMNS = ("record_id", "patient_id", "test_type", "lab_name", "test_date")
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+class RecordsStore:
+    """
+    One connection per thread; WAL lets readers run while a write commits.
+    Rows come back in upload order (rowid) unless a query orders by date.
+    """
+
+    def __init__(self, path: str = RECORDS_DB_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+
+        with self._write_lock:
+            conn = self._conn()
+            conn.executescript(SCHEMA)
+            conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            # WAL is durable across crashes with NORMAL; only power loss can drop the last commits
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _row(record: dict) -> tuple:
+        return tuple(record.get(column) or "" for column in INDEXED_COLUMNS) + (json.dumps(record),)
+
+    # -------------------------
+    # Writes
+    # -------------------------
+    def insert(self, record: dict):
+        self.insert_many([record])
+
+    def insert_many(self, records):
+        """Insert or replace records in a single transaction"""
+        self.write_batch(upserts=records)
+
+    def write_batch(self, upserts=(), deletes=()):
+        """Insert or update some records and delete others (by ID) in one transaction"""
+        with self._write_lock:
+            conn = self._conn()
+            with conn:
+                # An upsert, not INSERT OR REPLACE: replacing deletes the row and gives it a
+                # new rowid, which would move an updated record to the end of the upload order
+                conn.executemany(
+                    "INSERT INTO records (record_id, patient_id, test_type, lab_name, test_date, data) "
+                    "VALUES (?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT(record_id) DO UPDATE SET patient_id = excluded.patient_id, "
+                    "test_type = excluded.test_type, lab_name = excluded.lab_name, "
+                    "test_date = excluded.test_date, data = excluded.data",
+                    (self._row(record) for record in upserts)
+                )
+                conn.executemany("DELETE FROM records WHERE record_id = ?", ((record_id,) for record_id in deletes))
+
+    def delete(self, record_id: str):
+        """Remove a record and return it, or None if it did not exist"""
+        with self._write_lock:
+            conn = self._conn()
+            with conn:
+                row = conn.execute("SELECT data FROM records WHERE record_id = ?", (record_id,)).fetchone()
+                if row is None:
+                    return None
+                conn.execute("DELETE FROM records WHERE record_id = ?", (record_id,))
+        return json.loads(row[0])
+
+    # -------------------------
+    # Reads
+    # -------------------------
+    def _select(self, where: str = "", params: tuple = (), order: str = "rowid") -> list:
+        sql = "SELECT data FROM records"
+        if where:
+            sql += " WHERE " + where
+        sql += " ORDER BY " + order
+        return [json.loads(row[0]) for row in self._conn().execute(sql, params)]
+
+    def get(self, record_id: str):
+        row = self._conn().execute("SELECT data FROM records WHERE record_id = ?", (record_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def count(self, patient_id: str = None) -> int:
+        if patient_id:
+            return self._conn().execute("SELECT COUNT(*) FROM records WHERE patient_id = ?", (patient_id,)).fetchone()[0]
+        return self._conn().execute("SELECT COUNT(*) FROM records").fetchone()[0]
+
+    def list(self, patient_id: str = None) -> list:
+        if patient_id:
+            return self._select("patient_id = ?", (patient_id,))
+        return self._select()
+
+    def patient_history(self, patient_id: str) -> list:
+        """Newest test first, read straight off the (patient_id, test_date) index"""
+        return self._select("patient_id = ?", (patient_id,), order="test_date DESC, rowid")
+
+    def search(self, test_type: str = None, lab_name: str = None,
+               date_from: str = None, date_to: str = None) -> list:
+        """Case-insensitive substring match on test type / lab, inclusive date range"""
+        clauses, params = [], []
+        if test_type:
+            clauses.append("test_type LIKE ? ESCAPE '\\'")
+            params.append(f"%{_escape_like(test_type)}%")
+        if lab_name:
+            clauses.append("lab_name LIKE ? ESCAPE '\\'")
+            params.append(f"%{_escape_like(lab_name)}%")
+        if date_from:
+            clauses.append("test_date >= ?")
+            params.append(date_from)
+        if date_to:
+            clauses.append("test_date <= ?")
+            params.append(date_to)
+        return self._select(" AND ".join(clauses), tuple(params))
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+# Global instance
+records_store = None
+
+def get_records_store() -> RecordsStore:
+    global records_store
+    if records_store is None:
+        records_store = RecordsStore()
+    return records_store
@@ -0,0 +1,257 @@
+# db/record_index.py
+"""
+Record Index - in-memory secondary indexes over the medical records store
+
+SQLite stays the source of truth; this layer answers the hot read paths
+(get, patient history, search) without touching disk:
+  - by_id: record_id -> record
+  - by_patient: patient_id -> keys sorted by test date (bisect insertion)
+  - by_date: all keys sorted by test date, for binary-searched date ranges
+  - by_upload: (upload_date, seq, record_id) keys, sorted, for keyset pagination
+  - token postings for the lowercased test_type and lab_name fields
+  - version: a ChangeLog of every change, for ETags, cached lists and /changes
+"""
+import threading
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict
+
+from db.database import get_records_store
+from utils.tokenizer import TOKEN_RE
+from utils.versioned import ChangeLog
+
+SEARCH_FIELDS = ("test_type", "lab_name")
+# Fields that decide a record's position in some index
+KEY_FIELDS = ("patient_id", "test_date", "upload_date") + SEARCH_FIELDS
+
+# Element types of a (upload_date, seq, record_id) listing key, for cursor validation
+RECORD_KEY_SHAPE = (str, int, str)
+
+class RecordIndex:
+    """
+    Sort keys are (test_date, -seq, record_id) where seq is the upload order,
+    so walking a list backwards yields newest test first and, for equal dates,
+    earliest upload first - the same order the history route always returned.
+    """
+
+    def __init__(self, records=()):
+        self.by_id = {}
+        self.by_patient = defaultdict(list)
+        self.by_date = []
+        self.by_upload = []
+        self.lowered = {}
+        self.postings = {field: defaultdict(set) for field in SEARCH_FIELDS}
+        self.seq = {}
+        self._next_seq = 0
+        self.lock = threading.RLock()
+        self.version = ChangeLog()
+
+        self._bulk_load(records)
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def _key(self, record: dict) -> tuple:
+        return (record.get("test_date") or "", -self.seq[record["record_id"]], record["record_id"])
+
+    def upload_key(self, record: dict) -> tuple:
+        """
+        Listing order, used as the page cursor. upload_date only has one-second
+        resolution, so seq keeps records uploaded in the same second (bulk
+        uploads, imports) in upload order. Seqs are handed out in the store's
+        rowid order, so the order survives restarts and deletions.
+        """
+        return (record.get("upload_date") or "", self.seq[record["record_id"]], record["record_id"])
+
+    # -------------------------
+    # Maintenance
+    # -------------------------
+    def _index_fields(self, record: dict):
+        record_id = record["record_id"]
+        lowered = {field: (record.get(field) or "").lower() for field in SEARCH_FIELDS}
+        self.lowered[record_id] = lowered
+        for field, value in lowered.items():
+            for token in TOKEN_RE.findall(value):
+                self.postings[field][token].add(record_id)
+
+    def _bulk_load(self, records):
+        """Append everything, then sort each list once instead of n bisect insertions"""
+        # A repeated record_id keeps its last version, as INSERT OR REPLACE would
+        for record in {record["record_id"]: record for record in records}.values():
+            record_id = record["record_id"]
+            self.seq[record_id] = self._next_seq
+            self._next_seq += 1
+            self.by_id[record_id] = record
+            key = self._key(record)
+            self.by_patient[record["patient_id"]].append(key)
+            self.by_date.append(key)
+            self.by_upload.append(self.upload_key(record))
+            self._index_fields(record)
+
+        self.by_date.sort()
+        self.by_upload.sort()
+        for keys in self.by_patient.values():
+            keys.sort()
+
+    def _insert(self, record: dict, seq: int):
+        record_id = record["record_id"]
+        self.seq[record_id] = seq
+        self.by_id[record_id] = record
+
+        key = self._key(record)
+        insort(self.by_patient[record["patient_id"]], key)
+        insort(self.by_date, key)
+        insort(self.by_upload, self.upload_key(record))
+        self._index_fields(record)
+
+    def add(self, record: dict):
+        with self.lock:
+            replaced = self._remove(record["record_id"]) is not None
+            self._insert(record, self._next_seq)
+            self._next_seq += 1
+            self.version.record("update" if replaced else "insert", record["record_id"], record)
+
+    def update(self, record: dict):
+        """Replace a record, keeping its upload position"""
+        with self.lock:
+            old = self.by_id.get(record["record_id"])
+            if old is None:
+                return self.add(record)
+            if all(old.get(field) == record.get(field) for field in KEY_FIELDS):
+                # Nothing indexed changed (e.g. a summary filled in later): swap in place
+                self.by_id[record["record_id"]] = record
+            else:
+                seq = self.seq[record["record_id"]]
+                self._remove(record["record_id"])
+                self._insert(record, seq)
+            self.version.record("update", record["record_id"], record)
+
+    def remove(self, record_id: str):
+        """Drop a record from every index; returns it, or None if unknown"""
+        with self.lock:
+            record = self._remove(record_id)
+            if record is not None:
+                self.version.record("delete", record_id)
+            return record
+
+    def _remove(self, record_id: str):
+        """remove() without logging a change; the caller holds self.lock"""
+        record = self.by_id.get(record_id)
+        if record is None:
+            return None
+
+        key = self._key(record)
+        patient_keys = self.by_patient[record["patient_id"]]
+        del patient_keys[bisect_left(patient_keys, key)]
+        if not patient_keys:
+            del self.by_patient[record["patient_id"]]
+        del self.by_date[bisect_left(self.by_date, key)]
+        del self.by_upload[bisect_left(self.by_upload, self.upload_key(record))]
+
+        for field, value in self.lowered.pop(record_id).items():
+            for token in TOKEN_RE.findall(value):
+                ids = self.postings[field][token]
+                ids.discard(record_id)
+                if not ids:
+                    del self.postings[field][token]
+
+        del self.by_id[record_id]
+        del self.seq[record_id]
+        return record
+
+    # -------------------------
+    # Queries
+    # -------------------------
+    def get(self, record_id: str):
+        return self.by_id.get(record_id)
+
+    def patient_history(self, patient_id: str) -> list:
+        """Newest test first, no sorting at query time"""
+        with self.lock:
+            return [self.by_id[key[2]] for key in reversed(self.by_patient.get(patient_id, ()))]
+
+    def list(self, patient_id: str = None) -> list:
+        """Records in upload order"""
+        with self.lock:
+            if patient_id:
+                ids = [key[2] for key in self.by_patient.get(patient_id, ())]
+                ids.sort(key=self.seq.__getitem__)
+                return [self.by_id[record_id] for record_id in ids]
+            return list(self.by_id.values())
+
+    def listing_keys(self, patient_id: str = None) -> list:
+        """Sorted upload keys for the whole collection or one patient"""
+        with self.lock:
+            if patient_id:
+                return sorted(self.upload_key(self.by_id[key[2]]) for key in self.by_patient.get(patient_id, ()))
+            return self.by_upload
+
+    def _date_bounds(self, date_from: str = None, date_to: str = None) -> tuple:
+        start = bisect_left(self.by_date, (date_from,)) if date_from else 0
+        # Every key for date_to sorts before (date_to, inf)
+        end = bisect_right(self.by_date, (date_to, float("inf"))) if date_to else len(self.by_date)
+        return start, end
+
+    def _matching_tokens(self, field: str, word: str) -> list:
+        # The vocabulary is small (distinct words), scanning it keeps substring semantics
+        return [ids for token, ids in self.postings[field].items() if word in token]
+
+    def _field_estimate(self, field: str, query: str):
+        """Upper bound on matches for a field filter; None if the query has no words to look up"""
+        words = TOKEN_RE.findall(query)
+        if not words:
+            return None
+        return min(sum(len(ids) for ids in self._matching_tokens(field, word)) for word in words)
+
+    def _field_candidates(self, field: str, query: str) -> set:
+        """IDs whose field contains every word of the query"""
+        candidates = None
+        for word in TOKEN_RE.findall(query):
+            ids = set().union(*self._matching_tokens(field, word))
+            candidates = ids if candidates is None else candidates & ids
+            if not candidates:
+                break
+        return candidates
+
+    def search(self, test_type: str = None, lab_name: str = None,
+               date_from: str = None, date_to: str = None) -> list:
+        """Case-insensitive substring match on test type / lab, inclusive date range"""
+        with self.lock:
+            filters = {field: value.lower() for field, value in zip(SEARCH_FIELDS, (test_type, lab_name)) if value}
+
+            # Start from the most selective access path: the date range (two bisects)
+            # or one field's token postings, then check the other filters per candidate
+            start, end = self._date_bounds(date_from, date_to)
+            best_field, best_size = None, end - start
+            for field, query in filters.items():
+                estimate = self._field_estimate(field, query)
+                if estimate is not None and estimate < best_size:
+                    best_field, best_size = field, estimate
+
+            if best_field is None:
+                candidates = [key[2] for key in self.by_date[start:end]]
+            else:
+                candidates = self._field_candidates(best_field, filters[best_field])
+
+            results = []
+            for record_id in candidates:
+                if best_field is not None and (date_from or date_to):
+                    test_date = self.by_id[record_id].get("test_date") or ""
+                    if (date_from and test_date < date_from) or (date_to and test_date > date_to):
+                        continue
+                # Token matches are a superset; confirm the exact substring on the lowered fields
+                lowered = self.lowered[record_id]
+                if all(query in lowered[field] for field, query in filters.items()):
+                    results.append(record_id)
+
+            results.sort(key=self.seq.__getitem__)
+            return [self.by_id[record_id] for record_id in results]
+
+# Global instance, loaded from the SQLite store on first use
+record_index = None
+
+def get_record_index() -> RecordIndex:
+    global record_index
+    if record_index is None:
+        record_index = RecordIndex(get_records_store().list())
+        print(f"Record index ready: {len(record_index)} records")
+    return record_index
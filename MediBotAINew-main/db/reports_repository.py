@@ -0,0 +1,251 @@
+# db/reports_repository.py
+"""
+Reports Repository - bounded in-memory store for uploaded reports
+
+Reports are found by id through a hash index and listed newest first from
+(date, seq, report_id) keys kept sorted on insert; seq is the upload order,
+so reports from the same day still come back newest upload first.
+
+Both parts are bounded. The extracted text (file_content) is the bulky part,
+so it is size-accounted and capped: past REPORTS_CONTENT_MEMORY_MB the least
+recently used texts spill to a SQLite side file and are read back from there
+on demand. Metadata (a few hundred bytes per report, see metadata_bytes in
+stats()) stays in memory for listing, so it is capped by count: past
+REPORTS_MAX_COUNT the oldest uploads are evicted, logged as deletes (0 = no cap).
+"""
+import json
+import os
+import sqlite3
+import sys
+import threading
+from bisect import bisect_left, insort
+from collections import OrderedDict
+
+from dotenv import load_dotenv
+
+from db.database import RECORDS_DB_PATH
+from utils.versioned import ChangeLog
+
+load_dotenv()
+
+REPORTS_CONTENT_MEMORY_MB = float(os.getenv("REPORTS_CONTENT_MEMORY_MB", "16"))
+REPORTS_SPILL_PATH = os.getenv("REPORTS_SPILL_PATH") or os.path.join(
+    os.path.dirname(os.path.abspath(RECORDS_DB_PATH)), "report_content.db")
+REPORTS_MAX_COUNT = int(os.getenv("REPORTS_MAX_COUNT", "50000"))
+
+CONTENT_FIELD = "file_content"
+# Spill down to this share of the cap, so a full repository writes in batches
+# instead of one transaction per upload
+SPILL_LOW_WATER = 0.9
+# Ids per IN (...) query when reading spilled texts back
+READ_CHUNK = 500
+
+# Element types of a (date, seq, report_id) sort key, for cursor validation
+REPORT_KEY_SHAPE = (str, int, str)
+
+SCHEMA = "CREATE TABLE IF NOT EXISTS report_content (report_id TEXT PRIMARY KEY, content TEXT NOT NULL)"
+
+def needs_content(fields) -> bool:
+    """Whether a projection (None = every field) includes the report text"""
+    return fields is None or CONTENT_FIELD in fields
+
+class ReportsRepository:
+    """
+    by_id holds report metadata without file_content; texts live in `content`
+    (least recently used first) until they spill. seq is kept in upload
+    order, so its first entry is the eviction candidate. Adding an existing
+    id replaces that report and counts as a new upload.
+    """
+
+    def __init__(self, spill_path: str = REPORTS_SPILL_PATH,
+                 memory_limit: int = int(REPORTS_CONTENT_MEMORY_MB * 1024 * 1024),
+                 max_reports: int = REPORTS_MAX_COUNT):
+        self.by_id = {}
+        self.keys = []
+        self.seq = {}
+        self._next_seq = 0
+        self.content = OrderedDict()
+        self.content_bytes = 0
+        self.metadata_bytes = 0
+        self.memory_limit = memory_limit
+        self.max_reports = max_reports
+        self.spill_path = spill_path
+        self.spill_writes = self.spill_reads = self.evicted = 0
+        self.lock = threading.RLock()
+        self.version = ChangeLog()
+        self._local = threading.local()
+        self._spill_ready = False
+
+    def __len__(self) -> int:
+        return len(self.by_id)
+
+    def __contains__(self, report_id: str) -> bool:
+        return report_id in self.by_id
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.spill_path)), exist_ok=True)
+            conn = sqlite3.connect(self.spill_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        if not self._spill_ready:
+            conn.execute(SCHEMA)
+            # Reports only live as long as the process; texts left by an earlier run are orphans
+            conn.execute("DELETE FROM report_content")
+            conn.commit()
+            self._spill_ready = True
+        return conn
+
+    # -------------------------
+    # Writes
+    # -------------------------
+    def add(self, report: dict) -> dict:
+        """Store a report; returns its metadata (the dict without file_content)"""
+        report_id = report["id"]
+        metadata = {field: value for field, value in report.items() if field != CONTENT_FIELD}
+        with self.lock:
+            old = self.by_id.get(report_id)
+            if old is not None:
+                self._drop_key((old["date"], self.seq.pop(report_id), report_id))
+                self.metadata_bytes -= len(json.dumps(old, default=str))
+            self.by_id[report_id] = metadata
+            self.seq[report_id] = self._next_seq
+            self._next_seq += 1
+            insort(self.keys, (metadata["date"], self.seq[report_id], report_id))
+            self.metadata_bytes += len(json.dumps(metadata, default=str))
+            self._put_content(report_id, report.get(CONTENT_FIELD) or "")
+            self.version.record("update" if old is not None else "insert", report_id, metadata)
+            while self.max_reports and len(self.by_id) > self.max_reports:
+                self.remove(next(iter(self.seq)))
+                self.evicted += 1
+        return metadata
+
+    def remove(self, report_id: str):
+        """Drop a report and its text; returns its metadata, or None if unknown"""
+        with self.lock:
+            metadata = self.by_id.pop(report_id, None)
+            if metadata is None:
+                return None
+            self._drop_key((metadata["date"], self.seq.pop(report_id), report_id))
+            self.metadata_bytes -= len(json.dumps(metadata, default=str))
+            text = self.content.pop(report_id, None)
+            if text is not None:
+                self.content_bytes -= sys.getsizeof(text)
+            elif self._spill_ready:
+                conn = self._conn()
+                conn.execute("DELETE FROM report_content WHERE report_id = ?", (report_id,))
+                conn.commit()
+            self.version.record("delete", report_id)
+            return metadata
+
+    def _drop_key(self, key: tuple):
+        # Binary search instead of list.remove's linear scan
+        del self.keys[bisect_left(self.keys, key)]
+
+    def update(self, report_id: str, **changes):
+        """Change fields of a stored report; returns its metadata, or None if unknown"""
+        with self.lock:
+            metadata = self.by_id.get(report_id)
+            if metadata is None:
+                return None
+            if CONTENT_FIELD in changes:
+                self._put_content(report_id, changes.pop(CONTENT_FIELD) or "")
+            if "date" in changes and changes["date"] != metadata["date"]:
+                seq = self.seq[report_id]
+                self._drop_key((metadata["date"], seq, report_id))
+                insort(self.keys, (changes["date"], seq, report_id))
+            self.metadata_bytes -= len(json.dumps(metadata, default=str))
+            metadata.update(changes)
+            self.metadata_bytes += len(json.dumps(metadata, default=str))
+            self.version.record("update", report_id, metadata)
+            return metadata
+
+    def _put_content(self, report_id: str, text: str):
+        old = self.content.pop(report_id, None)
+        if old is not None:
+            self.content_bytes -= sys.getsizeof(old)
+        self.content[report_id] = text
+        self.content_bytes += sys.getsizeof(text)
+        if self.content_bytes > self.memory_limit:
+            self._spill()
+
+    def _spill(self):
+        """Write the least recently used texts to disk until memory is under the low-water mark"""
+        target = self.memory_limit * SPILL_LOW_WATER
+        batch = []
+        while self.content and self.content_bytes > target:
+            report_id, text = self.content.popitem(last=False)
+            self.content_bytes -= sys.getsizeof(text)
+            batch.append((report_id, text))
+        if batch:
+            conn = self._conn()
+            conn.executemany("INSERT OR REPLACE INTO report_content (report_id, content) VALUES (?, ?)", batch)
+            conn.commit()
+            self.spill_writes += 1
+
+    # -------------------------
+    # Reads
+    # -------------------------
+    def get(self, report_id: str, with_content: bool = True):
+        """A copy of the full report, or None if unknown"""
+        reports = self.get_many([report_id], with_content)
+        return reports[0] if reports else None
+
+    def get_many(self, report_ids, with_content: bool = True) -> list:
+        """Full reports for the known ids, in the given order; spilled texts come back in one query per chunk"""
+        with self.lock:
+            found = [self.by_id[report_id] for report_id in report_ids if report_id in self.by_id]
+            if not with_content:
+                return [dict(metadata) for metadata in found]
+
+            texts = {}
+            missing = []
+            for metadata in found:
+                text = self.content.get(metadata["id"])
+                if text is None:
+                    missing.append(metadata["id"])
+                else:
+                    self.content.move_to_end(metadata["id"])
+                    texts[metadata["id"]] = text
+            if missing:
+                self.spill_reads += 1
+                conn = self._conn()
+                for start in range(0, len(missing), READ_CHUNK):
+                    chunk = missing[start:start + READ_CHUNK]
+                    rows = conn.execute(
+                        f"SELECT report_id, content FROM report_content WHERE report_id IN ({','.join('?' * len(chunk))})",
+                        chunk
+                    )
+                    texts.update(rows)
+        return [{**metadata, CONTENT_FIELD: texts.get(metadata["id"], "")} for metadata in found]
+
+    def newest(self) -> list:
+        """Metadata of every report, newest first"""
+        with self.lock:
+            return [self.by_id[report_id] for _, _, report_id in reversed(self.keys)]
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "reports": len(self.by_id),
+                "max_reports": self.max_reports,
+                "evicted": self.evicted,
+                "metadata_bytes": self.metadata_bytes,
+                "content_bytes_in_memory": self.content_bytes,
+                "content_memory_limit": self.memory_limit,
+                "contents_in_memory": len(self.content),
+                "contents_spilled": len(self.by_id) - len(self.content),
+                "spill_writes": self.spill_writes,
+                "spill_reads": self.spill_reads
+            }
+
+# Global instance
+reports_repository = None
+
+def get_reports_repository() -> ReportsRepository:
+    global reports_repository
+    if reports_repository is None:
+        reports_repository = ReportsRepository()
+    return reports_repository
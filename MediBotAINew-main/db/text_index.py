@@ -0,0 +1,243 @@
+# db/text_index.py
+"""
+Record Text Index - positional inverted index over record metadata and report text
+
+Answers free-text queries for the records search route:
+  - words:   anemia hemoglobin     every word must appear
+  - prefix:  hemo*                 any indexed term starting with "hemo"
+  - phrase:  "iron deficiency"     the words at consecutive positions
+Matches are ranked with BM25 (same parameters as knowledge_index). Records are
+added, replaced and removed one at a time as uploads, processing and deletes
+happen, so the index never needs a rebuild.
+"""
+import heapq
+import math
+import re
+import threading
+from bisect import bisect_left, insort
+from operator import itemgetter
+
+from db.record_index import get_record_index
+from extraction.engine import get_extraction_engine
+from utils.tokenizer import STOPWORDS, TOKEN_RE, normalize
+
+# Standard BM25 parameters
+K1 = 1.2
+B = 0.75
+
+INDEXED_FIELDS = ("patient_name", "patient_id", "test_type", "lab_name", "file_name", "notes")
+
+# Positions jump between fields so a phrase never matches across two of them
+FIELD_GAP = 16
+
+# A short prefix can match thousands of terms; the most common ones are kept
+MAX_PREFIX_TERMS = 64
+
+QUERY_RE = re.compile(r'"([^"]*)"|(\S+)')
+
+def index_terms(text: str) -> list:
+    # "Blood_Test_Report.pdf" -> blood, test, report, pdf (\w would keep the underscores)
+    return [normalize(token) for token in TOKEN_RE.findall(text.replace("_", " ").lower())]
+
+def parse_query(query: str) -> list:
+    """Clauses as ("term", t), ("prefix", p) or ("phrase", [t, ...])"""
+    clauses = []
+    for phrase, word in QUERY_RE.findall(query):
+        if phrase:
+            words = index_terms(phrase)
+            if len(words) == 1:
+                clauses.append(("term", words[0]))
+            elif words:
+                clauses.append(("phrase", words))
+        elif word.endswith("*") and len(word) > 1:
+            prefixes = TOKEN_RE.findall(word[:-1].replace("_", " ").lower())
+            clauses.extend(("term", normalize(p)) for p in prefixes[:-1])
+            if prefixes:
+                clauses.append(("prefix", prefixes[-1]))
+        else:
+            clauses.extend(("term", t) for t in index_terms(word) if t not in STOPWORDS)
+    return clauses
+
+class RecordTextIndex:
+    """
+    postings: term -> {doc: positions}. Records get a small integer doc id;
+    `vocabulary` is the sorted term list that prefix queries bisect into.
+    """
+
+    def __init__(self):
+        self.postings = {}
+        self.vocabulary = []
+        self.doc_ids = {}
+        self.record_ids = {}
+        self.doc_terms = {}
+        self.doc_lengths = {}
+        self.total_length = 0
+        self._next_doc = 0
+        self.lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.doc_ids)
+
+    # -------------------------
+    # Maintenance
+    # -------------------------
+    def add(self, record: dict, text: str = ""):
+        """Index (or re-index) a record with its extracted report text"""
+        with self.lock:
+            record_id = record["record_id"]
+            if record_id in self.doc_ids:
+                self.remove(record_id)
+
+            doc = self._next_doc
+            self._next_doc += 1
+            positions, position = {}, 0
+            for value in [record.get(field) or "" for field in INDEXED_FIELDS] + [text]:
+                for term in index_terms(value):
+                    positions.setdefault(term, []).append(position)
+                    position += 1
+                position += FIELD_GAP
+
+            for term, term_positions in positions.items():
+                postings = self.postings.get(term)
+                if postings is None:
+                    postings = self.postings[term] = {}
+                    insort(self.vocabulary, term)
+                postings[doc] = tuple(term_positions)
+
+            length = sum(len(term_positions) for term_positions in positions.values())
+            self.doc_ids[record_id] = doc
+            self.record_ids[doc] = record_id
+            self.doc_terms[doc] = tuple(positions)
+            self.doc_lengths[doc] = length
+            self.total_length += length
+
+    def remove(self, record_id: str) -> bool:
+        with self.lock:
+            doc = self.doc_ids.pop(record_id, None)
+            if doc is None:
+                return False
+            for term in self.doc_terms.pop(doc):
+                postings = self.postings[term]
+                del postings[doc]
+                if not postings:
+                    del self.postings[term]
+                    del self.vocabulary[bisect_left(self.vocabulary, term)]
+            del self.record_ids[doc]
+            self.total_length -= self.doc_lengths.pop(doc)
+            return True
+
+    # -------------------------
+    # Queries
+    # -------------------------
+    def expand_prefix(self, prefix: str) -> list:
+        start = bisect_left(self.vocabulary, prefix)
+        terms = []
+        for term in self.vocabulary[start:]:
+            if not term.startswith(prefix):
+                break
+            terms.append(term)
+        if len(terms) > MAX_PREFIX_TERMS:
+            terms = heapq.nlargest(MAX_PREFIX_TERMS, terms, key=lambda term: len(self.postings[term]))
+        return terms
+
+    def _idf(self, term: str) -> float:
+        doc_freq = len(self.postings[term])
+        return math.log(1 + (len(self.doc_ids) - doc_freq + 0.5) / (doc_freq + 0.5))
+
+    @staticmethod
+    def _has_phrase(postings: list, doc: int) -> bool:
+        following = [p[doc] for p in postings[1:]]
+        for start in postings[0][doc]:
+            if all(start + offset in positions for offset, positions in enumerate(following, 1)):
+                return True
+        return False
+
+    def search(self, query: str, limit: int = 20, record_ids=None):
+        """
+        Returns (total, [(record_id, score), ...]) best first. record_ids, if
+        given, restricts matches to those records (other filters already applied).
+        """
+        with self.lock:
+            clauses = parse_query(query)
+            if not clauses or not self.doc_ids:
+                return 0, []
+
+            # Each clause -> candidate docs and the terms that score them
+            sets, scored_terms, phrases = [], [], []
+            for kind, value in clauses:
+                if kind == "term":
+                    if value not in self.postings:
+                        return 0, []
+                    sets.append(self.postings[value].keys())
+                    scored_terms.append(value)
+                elif kind == "prefix":
+                    terms = self.expand_prefix(value)
+                    if not terms:
+                        return 0, []
+                    if len(terms) == 1:
+                        sets.append(self.postings[terms[0]].keys())
+                    else:
+                        docs = set()
+                        for term in terms:
+                            docs.update(self.postings[term])
+                        sets.append(docs)
+                    scored_terms.extend(terms)
+                else:
+                    if any(term not in self.postings for term in value):
+                        return 0, []
+                    sets.extend(self.postings[term].keys() for term in value)
+                    scored_terms.extend(value)
+                    phrases.append([self.postings[term] for term in value])
+
+            if record_ids is not None:
+                sets.append({self.doc_ids[r] for r in record_ids if r in self.doc_ids})
+
+            # Intersect smallest first so the work is bounded by the rarest clause
+            sets.sort(key=len)
+            candidates = sets[0]
+            for docs in sets[1:]:
+                if not candidates:
+                    break
+                candidates = candidates & docs
+            for postings in phrases:
+                candidates = {doc for doc in candidates if self._has_phrase(postings, doc)}
+            if not candidates:
+                return 0, []
+
+            # BM25 with the length normalisation folded into two constants:
+            # idf * tf * (K1 + 1) / (tf + K1 * (1 - B + B * length / avg_length))
+            lengths = self.doc_lengths
+            base, per_length = K1 * (1 - B), K1 * B * len(self.doc_ids) / self.total_length
+            scores = None
+            for term in dict.fromkeys(scored_terms):
+                postings = self.postings[term]
+                weight = self._idf(term) * (K1 + 1)
+                if len(postings) <= 2 * len(candidates):
+                    # Walking the postings is cheaper than probing them per candidate
+                    term_scores = {doc: weight * len(positions) / (len(positions) + base + per_length * lengths[doc])
+                                   for doc, positions in postings.items() if doc in candidates}
+                else:
+                    term_scores = {doc: weight * len(postings[doc]) / (len(postings[doc]) + base + per_length * lengths[doc])
+                                   for doc in candidates if doc in postings}
+                if scores is None:
+                    scores = term_scores
+                else:
+                    for doc, value in term_scores.items():
+                        scores[doc] = scores.get(doc, 0.0) + value
+
+            ranked = heapq.nlargest(limit, scores.items(), key=itemgetter(1))
+            return len(candidates), [(self.record_ids[doc], round(score, 4)) for doc, score in ranked]
+
+# Global instance, filled from the record index (and cached extractions) on first use
+text_index = None
+
+def get_text_index() -> RecordTextIndex:
+    global text_index
+    if text_index is None:
+        index, engine = RecordTextIndex(), get_extraction_engine()
+        for record in get_record_index().list():
+            extraction = engine.cached(record["sha256"]) if record.get("text_length") else None
+            index.add(record, extraction["text"] if extraction else "")
+        text_index = index
+        print(f"Text index ready: {len(text_index)} records, {len(text_index.vocabulary)} terms")
+    return text_index
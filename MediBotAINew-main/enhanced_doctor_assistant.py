@@ -4,9 +4,9 @@ Enhanced Doctor Assistant API with Medical Knowledge Integration
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import Dict, Any, Optional
-import json
-import random
-from medical_knowledge import get_medical_response, analyze_vitals_comprehensive, CLINICAL_SCENARIOS
+from datetime import datetime, timezone
+from medical_knowledge import MEDICAL_KNOWLEDGE, get_medical_response, analyze_vitals_comprehensive, CLINICAL_SCENARIOS
+from utils.fuzzy_index import FuzzyIndex
 
 router = APIRouter()
 
@@ -28,8 +28,120 @@ class AnalysisRequest(BaseModel):
     symptoms: Optional[str] = None
     history: Optional[str] = None
 
-@router.post("/api/doctor-assistant/chat")
-async def enhanced_chat(request: ChatRequest):
+# ---------------------------
+# Catalogs, built once at import
+# ---------------------------
+PROTOCOLS = {
+    "sepsis": {
+        "name": "Sepsis Management Protocol",
+        "steps": [
+            "Recognize sepsis using qSOFA or SIRS criteria",
+            "Obtain blood cultures before antibiotics",
+            "Administer broad-spectrum antibiotics within 1 hour",
+            "Fluid resuscitation: 30ml/kg crystalloid",
+            "Monitor lactate levels",
+            "Consider vasopressors if hypotensive after fluids"
+        ],
+        "timeframes": {
+            "antibiotics": "1 hour",
+            "cultures": "Before antibiotics",
+            "fluids": "Within 3 hours"
+        }
+    },
+    "stroke": {
+        "name": "Acute Stroke Protocol",
+        "steps": [
+            "FAST assessment (Face, Arms, Speech, Time)",
+            "Immediate CT head without contrast",
+            "Check blood glucose",
+            "Assess for tPA eligibility",
+            "Blood pressure management",
+            "Neurological monitoring"
+        ],
+        "timeframes": {
+            "ct_scan": "Within 25 minutes",
+            "tpa_decision": "Within 60 minutes",
+            "door_to_needle": "Within 60 minutes"
+        }
+    },
+    "cardiac_arrest": {
+        "name": "Cardiac Arrest Protocol (ACLS)",
+        "steps": [
+            "Check responsiveness and pulse",
+            "Begin high-quality CPR (30:2 ratio)",
+            "Apply AED/defibrillator",
+            "Establish advanced airway",
+            "Administer epinephrine every 3-5 minutes",
+            "Consider reversible causes (H's and T's)"
+        ],
+        "medications": {
+            "epinephrine": "1mg IV/IO every 3-5 minutes",
+            "amiodarone": "300mg IV for VF/VT",
+            "atropine": "Removed from ACLS 2020"
+        }
+    }
+}
+
+DRUGS = {
+    "metoprolol": {
+        "class": "Beta-blocker",
+        "indications": ["Hypertension", "Angina", "Heart failure", "Post-MI"],
+        "mechanism": "Selective beta-1 receptor antagonist",
+        "dosing": {
+            "hypertension": "25-100mg BID",
+            "heart_failure": "12.5-200mg BID",
+            "post_mi": "25-200mg BID"
+        },
+        "contraindications": ["Severe bradycardia", "Heart block", "Cardiogenic shock"],
+        "side_effects": ["Bradycardia", "Fatigue", "Dizziness", "Depression"],
+        "monitoring": ["Heart rate", "Blood pressure", "Signs of heart failure"]
+    },
+    "lisinopril": {
+        "class": "ACE Inhibitor",
+        "indications": ["Hypertension", "Heart failure", "Post-MI", "Diabetic nephropathy"],
+        "mechanism": "Inhibits angiotensin-converting enzyme",
+        "dosing": {
+            "hypertension": "10-40mg daily",
+            "heart_failure": "5-40mg daily",
+            "post_mi": "5-10mg daily"
+        },
+        "contraindications": ["Pregnancy", "Angioedema history", "Bilateral renal artery stenosis"],
+        "side_effects": ["Dry cough", "Hyperkalemia", "Angioedema", "Hypotension"],
+        "monitoring": ["Kidney function", "Potassium", "Blood pressure"]
+    }
+}
+
+# Basic entries from the knowledge base fill in drugs without a detailed monograph
+for _name, _info in MEDICAL_KNOWLEDGE["medications"].items():
+    DRUGS.setdefault(_name, _info)
+
+CATALOGS = {
+    "protocols": (PROTOCOLS, FuzzyIndex(PROTOCOLS)),
+    "drugs": (DRUGS, FuzzyIndex(DRUGS))
+}
+
+# Names offered when a lookup has no exact match
+MAX_SUGGESTIONS = 5
+
+def lookup(catalog: str, name: str):
+    """
+    (key, entry) only when the name matches a catalog key ignoring case and
+    separators. A fuzzy hit is never served as the entry - a near-miss drug
+    name would return another drug's dosing - so misses give (None, None).
+    """
+    entries, index = CATALOGS[catalog]
+    key = index.exact(name)
+    return (key, entries[key]) if key is not None else (None, None)
+
+def suggest(catalog: str, name: str) -> list:
+    """Closest catalog names for a "did you mean" answer"""
+    _, index = CATALOGS[catalog]
+    return [key for key, _ in index.search(name, limit=MAX_SUGGESTIONS)]
+
+# The /engine/ prefix keeps these routes from shadowing the LLM-backed
+# /api/doctor-assistant/chat and /analyze routes in main.py
+@router.post("/api/doctor-assistant/engine/chat")
+def enhanced_chat(request: ChatRequest):
     """Enhanced chat endpoint with medical knowledge"""
     try:
         # Get medical response using knowledge base
@@ -39,215 +151,72 @@ async def enhanced_chat(request: ChatRequest):
             "response": response,
             "confidence": 0.95,
             "sources": ["Medical Knowledge Base", "Clinical Guidelines"],
-            "timestamp": "2024-01-01T00:00:00Z"
+            "timestamp": datetime.now(timezone.utc).isoformat()
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Chat processing error: {str(e)}")
 
-@router.post("/api/doctor-assistant/analyze")
-async def enhanced_analysis(request: AnalysisRequest):
+@router.post("/api/doctor-assistant/engine/analyze")
+def enhanced_analysis(request: AnalysisRequest):
     """Enhanced vital signs analysis with clinical context"""
     try:
-        vitals = request.vitals
-        
-        # Comprehensive analysis
-        analysis_parts = []
-        
-        # Heart rate analysis
-        hr = vitals.get('heart_rate', 0)
-        if hr < 50:
-            analysis_parts.append("🔴 CRITICAL: Severe bradycardia detected. Consider atropine or pacing.")
-        elif hr < 60:
-            analysis_parts.append("🟡 Bradycardia present. Monitor for symptoms of decreased cardiac output.")
-        elif hr > 120:
-            analysis_parts.append("🔴 Significant tachycardia. Evaluate for underlying causes (fever, dehydration, arrhythmia).")
-        elif hr > 100:
-            analysis_parts.append("🟡 Mild tachycardia. Consider causes: anxiety, pain, medications.")
-        else:
-            analysis_parts.append("✅ Heart rate within normal limits.")
-        
-        # Blood pressure analysis
-        bp = vitals.get('bp', 0)
-        if bp > 180:
-            analysis_parts.append("🔴 HYPERTENSIVE CRISIS: Immediate intervention required. Consider IV antihypertensives.")
-        elif bp > 140:
-            analysis_parts.append("🟡 Stage 2 hypertension. Evaluate for target organ damage.")
-        elif bp < 80:
-            analysis_parts.append("🔴 Severe hypotension. Assess for shock, consider fluid resuscitation.")
-        elif bp < 90:
-            analysis_parts.append("🟡 Hypotension present. Monitor closely, evaluate causes.")
-        else:
-            analysis_parts.append("✅ Blood pressure within acceptable range.")
-        
-        # Oxygen saturation
-        spo2 = vitals.get('spo2', 0)
-        if spo2 < 85:
-            analysis_parts.append("🔴 CRITICAL: Severe hypoxemia. Immediate oxygen therapy and respiratory support needed.")
-        elif spo2 < 90:
-            analysis_parts.append("🔴 Moderate hypoxemia. High-flow oxygen therapy indicated.")
-        elif spo2 < 95:
-            analysis_parts.append("🟡 Mild hypoxemia. Supplemental oxygen may be beneficial.")
-        else:
-            analysis_parts.append("✅ Oxygen saturation adequate.")
-        
-        # Glucose analysis
-        glucose = vitals.get('glucose', 0)
-        if glucose > 250:
-            analysis_parts.append("🔴 Severe hyperglycemia. Check for DKA, consider insulin therapy.")
-        elif glucose > 180:
-            analysis_parts.append("🟡 Hyperglycemia present. Monitor for complications.")
-        elif glucose < 60:
-            analysis_parts.append("🔴 Hypoglycemia detected. Immediate glucose administration needed.")
-        elif glucose < 70:
-            analysis_parts.append("🟡 Mild hypoglycemia. Monitor closely, consider glucose supplementation.")
-        else:
-            analysis_parts.append("✅ Glucose levels within normal range.")
-        
-        # Risk stratification
-        risk_factors = []
-        if hr < 50 or hr > 120: risk_factors.append("cardiac")
-        if bp > 180 or bp < 80: risk_factors.append("hemodynamic")
-        if spo2 < 90: risk_factors.append("respiratory")
-        if glucose < 60 or glucose > 250: risk_factors.append("metabolic")
-        
-        risk_level = "HIGH" if len(risk_factors) >= 2 else "MODERATE" if len(risk_factors) == 1 else "LOW"
-        
-        # Clinical recommendations
-        recommendations = []
-        if risk_level == "HIGH":
-            recommendations.extend([
-                "Continuous monitoring required",
-                "Consider ICU consultation",
-                "Frequent vital sign checks (q15min)",
-                "Prepare for potential interventions"
-            ])
-        elif risk_level == "MODERATE":
-            recommendations.extend([
-                "Enhanced monitoring (q30min)",
-                "Trending vital signs",
-                "Consider additional diagnostics",
-                "Notify physician of changes"
-            ])
-        else:
-            recommendations.extend([
-                "Continue routine monitoring",
-                "Document trends",
-                "Standard care protocols"
-            ])
-        
-        analysis = "\\n".join(analysis_parts)
+        result = analyze_vitals_comprehensive(request.vitals)
         
         return {
-            "analysis": analysis,
-            "risk_level": risk_level,
-            "risk_factors": risk_factors,
-            "recommendations": recommendations,
+            "analysis": "\n".join(result["findings"]),
+            "risk_level": result["risk_level"],
+            "risk_factors": result["risk_factors"],
+            "recommendations": result["recommendations"],
             "confidence": 0.92,
-            "timestamp": "2024-01-01T00:00:00Z"
+            "timestamp": datetime.now(timezone.utc).isoformat()
         }
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Analysis error: {str(e)}")
 
+@router.get("/api/doctor-assistant/scenarios")
+def list_clinical_scenarios():
+    """Emergency scenarios the engine recognises"""
+    return {name: scenario["title"] for name, scenario in CLINICAL_SCENARIOS.items()}
+
 @router.get("/api/doctor-assistant/protocols/{protocol_name}")
-async def get_clinical_protocol(protocol_name: str):
+def get_clinical_protocol(protocol_name: str):
     """Get specific clinical protocols"""
-    protocols = {
-        "sepsis": {
-            "name": "Sepsis Management Protocol",
-            "steps": [
-                "Recognize sepsis using qSOFA or SIRS criteria",
-                "Obtain blood cultures before antibiotics",
-                "Administer broad-spectrum antibiotics within 1 hour",
-                "Fluid resuscitation: 30ml/kg crystalloid",
-                "Monitor lactate levels",
-                "Consider vasopressors if hypotensive after fluids"
-            ],
-            "timeframes": {
-                "antibiotics": "1 hour",
-                "cultures": "Before antibiotics",
-                "fluids": "Within 3 hours"
-            }
-        },
-        "stroke": {
-            "name": "Acute Stroke Protocol",
-            "steps": [
-                "FAST assessment (Face, Arms, Speech, Time)",
-                "Immediate CT head without contrast",
-                "Check blood glucose",
-                "Assess for tPA eligibility",
-                "Blood pressure management",
-                "Neurological monitoring"
-            ],
-            "timeframes": {
-                "ct_scan": "Within 25 minutes",
-                "tpa_decision": "Within 60 minutes",
-                "door_to_needle": "Within 60 minutes"
-            }
-        },
-        "cardiac_arrest": {
-            "name": "Cardiac Arrest Protocol (ACLS)",
-            "steps": [
-                "Check responsiveness and pulse",
-                "Begin high-quality CPR (30:2 ratio)",
-                "Apply AED/defibrillator",
-                "Establish advanced airway",
-                "Administer epinephrine every 3-5 minutes",
-                "Consider reversible causes (H's and T's)"
-            ],
-            "medications": {
-                "epinephrine": "1mg IV/IO every 3-5 minutes",
-                "amiodarone": "300mg IV for VF/VT",
-                "atropine": "Removed from ACLS 2020"
-            }
-        }
-    }
-    
-    if protocol_name.lower() not in protocols:
-        raise HTTPException(status_code=404, detail="Protocol not found")
+    key, protocol = lookup("protocols", protocol_name)
+    if protocol is None:
+        raise HTTPException(status_code=404, detail={
+            "message": "Protocol not found",
+            "did_you_mean": suggest("protocols", protocol_name)
+        })
     
-    return protocols[protocol_name.lower()]
+    return {**protocol, "matched": key}
 
 @router.get("/api/doctor-assistant/drug-info/{drug_name}")
-async def get_drug_information(drug_name: str):
-    """Get medication information"""
-    drugs = {
-        "metoprolol": {
-            "class": "Beta-blocker",
-            "indications": ["Hypertension", "Angina", "Heart failure", "Post-MI"],
-            "mechanism": "Selective beta-1 receptor antagonist",
-            "dosing": {
-                "hypertension": "25-100mg BID",
-                "heart_failure": "12.5-200mg BID",
-                "post_mi": "25-200mg BID"
-            },
-            "contraindications": ["Severe bradycardia", "Heart block", "Cardiogenic shock"],
-            "side_effects": ["Bradycardia", "Fatigue", "Dizziness", "Depression"],
-            "monitoring": ["Heart rate", "Blood pressure", "Signs of heart failure"]
-        },
-        "lisinopril": {
-            "class": "ACE Inhibitor",
-            "indications": ["Hypertension", "Heart failure", "Post-MI", "Diabetic nephropathy"],
-            "mechanism": "Inhibits angiotensin-converting enzyme",
-            "dosing": {
-                "hypertension": "10-40mg daily",
-                "heart_failure": "5-40mg daily",
-                "post_mi": "5-10mg daily"
-            },
-            "contraindications": ["Pregnancy", "Angioedema history", "Bilateral renal artery stenosis"],
-            "side_effects": ["Dry cough", "Hyperkalemia", "Angioedema", "Hypotension"],
-            "monitoring": ["Kidney function", "Potassium", "Blood pressure"]
-        }
-    }
-    
-    drug_lower = drug_name.lower()
-    if drug_lower not in drugs:
+def get_drug_information(drug_name: str):
+    """Get medication information; a misspelled name gets "did you mean" names, never another drug's data"""
+    key, drug = lookup("drugs", drug_name)
+    if drug is None:
         return {
             "message": f"Detailed information for {drug_name} not available in current database.",
-            "suggestion": "Please consult drug reference or pharmacist for complete information."
+            "suggestion": "Please consult drug reference or pharmacist for complete information.",
+            "did_you_mean": suggest("drugs", drug_name)
         }
     
-    return drugs[drug_lower]
+    return {**drug, "matched": key}
+
+@router.get("/api/doctor-assistant/autocomplete/{catalog}")
+def autocomplete(catalog: str, q: str, limit: int = 10):
+    """Prefix completions, with fuzzy matches when nothing starts with the query"""
+    if catalog not in CATALOGS:
+        raise HTTPException(status_code=404, detail="Unknown catalog")
+    
+    limit = max(1, min(limit, 50))
+    _, index = CATALOGS[catalog]
+    suggestions = index.complete(q, limit)
+    if not suggestions:
+        suggestions = [key for key, _ in index.search(q, limit)]
+    
+    return {"query": q, "suggestions": suggestions}
 
 # Add router to main FastAPI app
 def setup_enhanced_doctor_assistant(app):
@@ -0,0 +1,170 @@
+# extraction/engine.py
+"""
+Extraction Engine - text and lab values from uploaded documents, off the event loop
+
+Parsing is pure Python and CPU bound, so it runs in a process pool
+(EXTRACTION_WORKERS, default one per core) instead of threads. Results are
+cached by SHA-256 of the file contents - in memory and in the records
+database - so a document is parsed once no matter how often it is uploaded.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from dotenv import load_dotenv
+
+from db.database import RECORDS_DB_PATH
+from extraction.lab_values import extract_lab_values
+from extraction.pdf_text import extract_pages, is_pdf
+from storage.streaming import guess_content_type
+
+load_dotenv()
+
+EXTRACTION_WORKERS = int(os.getenv("EXTRACTION_WORKERS", "0")) or os.cpu_count() or 1
+MEMORY_CACHE_SIZE = 1024
+
+# Bump when parsing changes so cached results are recomputed
+EXTRACTOR_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS extractions (
+    sha256 TEXT PRIMARY KEY,
+    version INTEGER NOT NULL,
+    result TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+def extractable(file_name: str) -> bool:
+    """Whether the file is a PDF or text; other binaries (images) would only decode to garbage"""
+    content_type = guess_content_type(file_name)
+    return content_type == "application/pdf" or content_type.startswith("text/")
+
+def extract_document(data: bytes) -> dict:
+    """Text, pages and lab values of one document (runs inside a pool worker)"""
+    started = time.perf_counter()
+    if is_pdf(data):
+        pages = extract_pages(data)
+        kind = "pdf"
+    else:
+        pages = [data.decode("utf-8", errors="replace")]
+        kind = "text"
+    text = "\n\n".join(pages)
+    return {
+        "kind": kind,
+        "pages": len(pages),
+        "text": text,
+        "lab_values": extract_lab_values(text),
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
+
+def extract_path(path: str) -> dict:
+    # Workers read the file themselves so large documents aren't pickled across processes
+    with open(path, "rb") as f:
+        return extract_document(f.read())
+
+class ExtractionEngine:
+
+    def __init__(self, db_path: str = RECORDS_DB_PATH, workers: int = EXTRACTION_WORKERS):
+        self.db_path = db_path
+        self.workers = workers
+        self._executor = None
+        self._memory = OrderedDict()
+        self._local = threading.local()
+        # One parse per sha even if several uploads of it arrive together
+        self._pending = {}
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        conn = self._conn()
+        conn.executescript(SCHEMA)
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    # -------------------------
+    # Cache
+    # -------------------------
+    def cached(self, sha256: str):
+        result = self._memory.get(sha256)
+        if result is not None:
+            self._memory.move_to_end(sha256)
+            return result
+        row = self._conn().execute(
+            "SELECT result FROM extractions WHERE sha256 = ? AND version = ?", (sha256, EXTRACTOR_VERSION)
+        ).fetchone()
+        if row is None:
+            return None
+        result = json.loads(row[0])
+        self._remember(sha256, result)
+        return result
+
+    def _remember(self, sha256: str, result: dict):
+        self._memory[sha256] = result
+        self._memory.move_to_end(sha256)
+        if len(self._memory) > MEMORY_CACHE_SIZE:
+            self._memory.popitem(last=False)
+
+    def _store(self, sha256: str, result: dict):
+        self._remember(sha256, result)
+        with self._conn() as conn:
+            conn.execute("INSERT OR REPLACE INTO extractions (sha256, version, result, created_at) VALUES (?, ?, ?, ?)",
+                         (sha256, EXTRACTOR_VERSION, json.dumps(result), time.time()))
+
+    # -------------------------
+    # Extraction
+    # -------------------------
+    async def _extract(self, sha256: str, fn, arg) -> dict:
+        result = self.cached(sha256)
+        if result is not None:
+            return result
+        pending = self._pending.get(sha256)
+        if pending is None:
+            pending = asyncio.get_running_loop().run_in_executor(self.executor, fn, arg)
+            self._pending[sha256] = pending
+            try:
+                result = await pending
+            finally:
+                del self._pending[sha256]
+            self._store(sha256, result)
+            return result
+        return await asyncio.shield(pending)
+
+    async def extract_bytes(self, data: bytes, sha256: str = None) -> dict:
+        return await self._extract(sha256 or hashlib.sha256(data).hexdigest(), extract_document, data)
+
+    async def extract_file(self, path: str, sha256: str) -> dict:
+        """sha256 must be the hash of the file's contents (uploads already compute it)"""
+        return await self._extract(sha256, extract_path, path)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+# Global instance
+extraction_engine = None
+
+def get_extraction_engine() -> ExtractionEngine:
+    global extraction_engine
+    if extraction_engine is None:
+        extraction_engine = ExtractionEngine()
+    return extraction_engine
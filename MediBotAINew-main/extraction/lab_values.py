@@ -0,0 +1,179 @@
+# extraction/lab_values.py
+"""
+Lab Values - structured results parsed from report text
+
+Recognises the two layouts report generators use:
+  - table rows:  "Hemoglobin  8.5 g/dL  12.0-16.0  LOW"
+  - labelled:    "Heart Rate: 85 bpm", "QRS Duration: 90 ms (Normal: <120 ms)"
+and returns the same keys reports_agent has always used (wbc, hemoglobin,
+heart_rate, ...) so analysis code reads extracted values unchanged.
+"""
+import re
+
+# key -> label patterns (matched case-insensitively at the start of a line)
+ANALYTES = {
+    # Hematology
+    "wbc": [r"white blood cell(?: count)?", r"wbc(?: count)?", r"leukocytes?"],
+    "rbc": [r"red blood cell(?: count)?", r"rbc(?: count)?", r"erythrocytes?"],
+    "hemoglobin": [r"ha?emoglobin", r"hgb", r"hb"],
+    "hematocrit": [r"ha?ematocrit", r"hct"],
+    "platelets": [r"platelet(?: count)?s?", r"plt"],
+    "mcv": [r"mcv", r"mean corpuscular volume"],
+    "neutrophils": [r"neutrophils?"],
+    "lymphocytes": [r"lymphocytes?"],
+    # Chemistry
+    "glucose": [r"(?:fasting )?(?:blood )?glucose"],
+    "sodium": [r"sodium", r"na\+?"],
+    "potassium": [r"potassium", r"k\+?"],
+    "creatinine": [r"creatinine"],
+    "bun": [r"bun", r"blood urea nitrogen"],
+    "troponin": [r"troponin(?: [it])?"],
+    "hba1c": [r"hba1c", r"ha?emoglobin a1c"],
+    "cholesterol": [r"total cholesterol", r"cholesterol"],
+    "ldl": [r"ldl(?: cholesterol)?"],
+    "hdl": [r"hdl(?: cholesterol)?"],
+    "triglycerides": [r"triglycerides"],
+    "crp": [r"c-reactive protein", r"crp"],
+    "tsh": [r"tsh"],
+    # ECG
+    "heart_rate": [r"heart rate", r"ventricular rate", r"hr"],
+    "pr_interval": [r"pr interval"],
+    "qrs_duration": [r"qrs duration", r"qrs"],
+    "qtc": [r"qtc"],
+    "qt_interval": [r"qt interval"],
+    # Echo / vitals
+    "ejection_fraction": [r"ejection fraction", r"lvef", r"ef"],
+    "lv_end_diastolic_dimension": [r"lv end diastolic dimension", r"lvedd"],
+    "lv_end_systolic_dimension": [r"lv end systolic dimension", r"lvesd"],
+    "left_atrial_dimension": [r"left atrial dimension", r"la dimension"],
+    "blood_pressure": [r"blood pressure", r"bp"],
+    "spo2": [r"spo2", r"oxygen saturation"],
+    "temperature": [r"temperature", r"temp"],
+}
+
+# Longest labels first so "QTc" wins over "QT" and "WBC Count" over "WBC"
+LABELS = sorted(((alias, key) for key, aliases in ANALYTES.items() for alias in aliases),
+                key=lambda item: -len(item[0]))
+LABEL_RE = re.compile(
+    r"^[\s•\-*]*(?:" + "|".join(f"(?P<k{i}>{alias})" for i, (alias, _) in enumerate(LABELS)) + r")\b\s*(?::\s*|\s{2,}|\s(?=[<>≤≥\d]))",
+    re.I,
+)
+NUMBER = r"[<>≤≥]?\s*\d{1,3}(?:,\d{3})+(?:\.\d+)?|[<>≤≥]?\s*\d+(?:\.\d+)?"
+VALUE_RE = re.compile(
+    rf"^(?P<value>{NUMBER})(?:\s*/\s*(?P<diastolic>\d+))?\s*(?P<unit>[^\s\d(][^\s(]*(?:\s(?!\s)[a-zA-Z/µ%]+)?)?"
+)
+RANGE_RE = re.compile(rf"(?P<low>{NUMBER})\s*[-–]\s*(?P<high>{NUMBER})|(?P<op>[<>≤≥])\s*(?P<bound>\d+(?:\.\d+)?)")
+FLAG_RE = re.compile(r"\b(CRITICAL|HIGH|LOW|NORMAL|ABNORMAL|H|L)\s*$")
+FLAGS = {"H": "HIGH", "L": "LOW"}
+
+# Free-text fields kept for imaging and narrative reports
+SECTION_RE = re.compile(r"^(IMPRESSION|FINDINGS|INTERPRETATION|CRITICAL FINDINGS?|CRITICAL VALUES)\s*:\s*(.*)$", re.I)
+RHYTHM_RE = re.compile(r"^[\s•\-*]*rhythm\s*:\s*(.+)$", re.I)
+
+def _number(text: str) -> float:
+    value = float(re.sub(r"[<>≤≥,\s]", "", text))
+    return int(value) if value.is_integer() else value
+
+def _flag(value: float, low, high, op, bound) -> str:
+    if low is not None:
+        return "LOW" if value < low else "HIGH" if value > high else "NORMAL"
+    if op in ("<", "≤"):
+        return "HIGH" if value > bound or (op == "<" and value == bound) else "NORMAL"
+    if op in (">", "≥"):
+        return "LOW" if value < bound or (op == ">" and value == bound) else "NORMAL"
+    return ""
+
+def parse_line(line: str):
+    """One result from a line, or None: {key, label, value, unit, reference, flag}"""
+    match = LABEL_RE.match(line)
+    if not match:
+        return None
+    index = next(int(name[1:]) for name, value in match.groupdict().items() if value)
+    label, key = LABELS[index]
+    rest = line[match.end():].strip()
+
+    value_match = VALUE_RE.match(rest)
+    if not value_match:
+        return None
+    result = {
+        "key": key,
+        "label": match.group(f"k{index}").strip(),
+        "value": _number(value_match.group("value")),
+        "unit": (value_match.group("unit") or "").strip(),
+        "reference": "",
+        "flag": "",
+    }
+    if value_match.group("diastolic"):
+        result["value"] = f"{result['value']}/{value_match.group('diastolic')}"
+        return result
+    if result["unit"].upper() in ("HIGH", "LOW", "NORMAL", "CRITICAL"):
+        result["unit"] = ""
+
+    remainder = rest[value_match.end():]
+    flag = FLAG_RE.search(remainder)
+    if flag:
+        result["flag"] = FLAGS.get(flag.group(1).upper(), flag.group(1).upper())
+        remainder = remainder[:flag.start()]
+    reference = RANGE_RE.search(remainder)
+    if reference:
+        result["reference"] = reference.group(0).strip()
+        if not result["flag"]:
+            low = _number(reference.group("low")) if reference.group("low") else None
+            high = _number(reference.group("high")) if reference.group("high") else None
+            bound = float(reference.group("bound")) if reference.group("bound") else None
+            result["flag"] = _flag(result["value"], low, high, reference.group("op"), bound)
+    return result
+
+def extract_lab_values(text: str) -> dict:
+    """
+    Structured data for a report's text: {"<key>": value, ..., "results": [...]},
+    plus rhythm, findings and impression when present. The first value seen for
+    a key wins (tables come before the narrative that repeats them).
+    """
+    data, results, findings = {}, [], []
+    section = None
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+
+        section_match = SECTION_RE.match(line)
+        if section_match:
+            section = section_match.group(1).upper()
+            if section_match.group(2):
+                _add_section_text(data, findings, section, section_match.group(2))
+            continue
+
+        rhythm = RHYTHM_RE.match(line)
+        if rhythm:
+            data.setdefault("rhythm", rhythm.group(1).strip())
+            continue
+
+        result = parse_line(line)
+        if result is not None:
+            if result["key"] not in data:
+                data[result["key"]] = result["value"]
+                results.append(result)
+            continue
+
+        if section and line.isupper() and line.endswith(":"):
+            section = None
+        elif section:
+            _add_section_text(data, findings, section, line)
+
+    if findings:
+        data["findings"] = findings
+    if results:
+        data["results"] = results
+    return data
+
+def _add_section_text(data: dict, findings: list, section: str, text: str):
+    text = re.sub(r"^\d+\.\s*", "", text).strip()
+    if not text:
+        return
+    if section == "IMPRESSION":
+        data["impression"] = f"{data['impression']}; {text}" if "impression" in data else text
+    elif section.startswith("CRITICAL"):
+        data.setdefault("critical", []).append(text)
+    else:
+        findings.append(text)
@@ -0,0 +1,252 @@
+# extraction/pdf_text.py
+"""
+PDF text extraction - standard library only
+
+Handles what report generators (ReportLab, most lab systems) emit: page
+content streams with FlateDecode / ASCII85Decode / ASCIIHexDecode filters,
+simple-font text shown with Tj, TJ, ' and ". Text runs are placed using the
+q/Q/cm and text matrices, then grouped into lines by baseline so table rows
+come out as one line ("White Blood Cell Count  12,500 /µL  4,500-11,000  H").
+Scanned (image-only) PDFs yield no text; there is no OCR here.
+"""
+import base64
+import re
+import zlib
+
+OBJECT_RE = re.compile(rb"(\d+)\s+(\d+)\s+obj\b(.*?)\bendobj", re.S)
+STREAM_RE = re.compile(rb"^(.*?)\bstream\r?\n(.*?)\r?\n?endstream", re.S)
+REF_RE = re.compile(rb"(\d+)\s+(\d+)\s+R\b")
+TOKEN_RE = re.compile(rb"""
+    \((?:\\.|[^\\()]|\((?:\\.|[^\\()])*\))*\)   # literal string, one level of nested parens
+  | <[0-9A-Fa-f\s]*>                           # hex string
+  | \[ | \]
+  | /[^\s/\[\]()<>{}%]+                         # name
+  | [-+]?(?:\d+\.?\d*|\.\d+)                    # number
+  | [A-Za-z'"*]+\d?\*?                          # operator
+""", re.X)
+
+ESCAPES = {b"n": b"\n", b"r": b"\r", b"t": b"\t", b"b": b"\b", b"f": b"\f",
+           b"(": b"(", b")": b")", b"\\": b"\\"}
+
+# Symbol-font glyphs that matter in lab units (µ is 0x6D in the Symbol encoding)
+SYMBOL_CHARS = {"m": "µ", "\xb0": "°", "\xb1": "±", "\xa3": "≤", "\xb3": "≥"}
+
+# Gap (in points) between runs on a line that becomes a column break
+COLUMN_GAP = 6.0
+
+# Without font metrics, a glyph is taken as half the font size wide (close for Helvetica/Times)
+AVERAGE_GLYPH_WIDTH = 0.5
+
+# Bullets and other control bytes some generators draw with the base font
+CONTROL_RE = re.compile(r"[\x00-\x1f\x7f\x81\x95]")
+
+def _decode_stream(header: bytes, raw: bytes) -> bytes:
+    filters = re.findall(rb"/(ASCII85Decode|A85|ASCIIHexDecode|AHx|FlateDecode|Fl)\b", header)
+    for name in filters:
+        if name in (b"ASCII85Decode", b"A85"):
+            raw = raw.strip()
+            if raw.startswith(b"<~"):
+                raw = raw[2:]
+            if raw.endswith(b"~>"):
+                raw = raw[:-2]
+            raw = base64.a85decode(raw)
+        elif name in (b"ASCIIHexDecode", b"AHx"):
+            raw = bytes.fromhex(re.sub(rb"[^0-9A-Fa-f]", b"", raw.split(b">")[0]).decode("ascii").ljust(2, "0"))
+        else:
+            raw = zlib.decompressobj().decompress(raw)
+    if re.search(rb"/(LZWDecode|DCTDecode|JBIG2Decode|CCITTFaxDecode|JPXDecode)\b", header):
+        return b""
+    return raw
+
+def _literal(token: bytes) -> bytes:
+    body, out, i = token[1:-1], bytearray(), 0
+    while i < len(body):
+        c = body[i:i + 1]
+        if c != b"\\":
+            out += c
+            i += 1
+            continue
+        nxt = body[i + 1:i + 2]
+        if nxt in ESCAPES:
+            out += ESCAPES[nxt]
+            i += 2
+        elif nxt.isdigit():
+            octal = re.match(rb"[0-7]{1,3}", body[i + 1:i + 4]).group()
+            out.append(int(octal, 8) & 0xFF)
+            i += 1 + len(octal)
+        elif nxt in (b"\n", b"\r"):
+            i += 2
+        else:
+            out += nxt
+            i += 2
+    return bytes(out)
+
+def _string(token: bytes, symbol: bool) -> str:
+    raw = bytes.fromhex(re.sub(rb"\s", b"", token[1:-1]).decode("ascii").ljust(2, "0")) \
+        if token.startswith(b"<") else _literal(token)
+    text = raw.decode("cp1252", errors="replace")
+    if symbol:
+        text = "".join(SYMBOL_CHARS.get(ch, ch) for ch in text)
+    return text
+
+def _multiply(m, n):
+    a, b, c, d, e, f = m
+    a2, b2, c2, d2, e2, f2 = n
+    return (a * a2 + b * c2, a * b2 + b * d2, c * a2 + d * c2, c * b2 + d * d2,
+            e * a2 + f * c2 + e2, e * b2 + f * d2 + f2)
+
+IDENTITY = (1.0, 0.0, 0.0, 1.0, 0.0, 0.0)
+
+# Operators that move text or the coordinate system; drawing operators (m, l, re, f, rg ...)
+# only discard their operands, and numbers stay bytes until one of these needs them
+POSITION_OPERATORS = {b"q", b"Q", b"cm", b"BT", b"Tm", b"Td", b"TD", b"TL", b"Tf", b"T*",
+                      b"Tj", b"'", b'"', b"TJ"}
+
+def _floats(operands: list, count: int) -> tuple:
+    return tuple(float(value) for value in operands[-count:])
+
+def content_runs(content: bytes, symbol_fonts=(), dingbat_fonts=()) -> list:
+    """Interpret a content stream; returns (x, y, x_end, text) runs in device space"""
+    runs, operands, array = [], [], None
+    ctm, stack = IDENTITY, []
+    tm = line = IDENTITY
+    leading, font_size, symbol, dingbat = 0.0, 12.0, False, False
+
+    def show(text):
+        nonlocal tm
+        if not text:
+            return
+        x, y = _multiply(tm, ctm)[4:6]
+        # Advance past the run so the next Tj on this line lands after it
+        tm = _multiply((1, 0, 0, 1, len(text) * font_size * AVERAGE_GLYPH_WIDTH, 0), tm)
+        text = CONTROL_RE.sub("", text)
+        if text.strip() and not dingbat:
+            runs.append((x, y, _multiply(tm, ctm)[4], text))
+
+    def next_line(tx=0.0, ty=None):
+        nonlocal tm, line
+        line = _multiply((1, 0, 0, 1, tx, -leading if ty is None else ty), line)
+        tm = line
+
+    for token in TOKEN_RE.findall(content):
+        first = token[:1]
+        if first in b"(<":
+            value = _string(token, symbol)
+            (array if array is not None else operands).append(value)
+        elif token == b"[":
+            array = []
+        elif token == b"]":
+            operands.append(array)
+            array = None
+        elif first == b"/" or first in b"+-.0123456789":
+            (array if array is not None else operands).append(token)
+        elif token not in POSITION_OPERATORS:
+            operands = []
+        else:
+            op = token
+            try:
+                if op == b"q":
+                    stack.append(ctm)
+                elif op == b"Q":
+                    ctm = stack.pop() if stack else IDENTITY
+                elif op == b"cm":
+                    ctm = _multiply(_floats(operands, 6), ctm)
+                elif op == b"BT":
+                    tm = line = IDENTITY
+                elif op == b"Tm":
+                    tm = line = _floats(operands, 6)
+                elif op == b"Td":
+                    next_line(*_floats(operands, 2))
+                elif op == b"TD":
+                    tx, ty = _floats(operands, 2)
+                    leading = -ty
+                    next_line(tx, ty)
+                elif op == b"TL":
+                    leading = float(operands[-1])
+                elif op == b"Tf":
+                    font_size = float(operands[-1])
+                    symbol = operands[-2] in symbol_fonts
+                    dingbat = operands[-2] in dingbat_fonts
+                elif op == b"T*":
+                    next_line()
+                elif op == b"Tj":
+                    show(operands[-1])
+                elif op == b"'":
+                    next_line()
+                    show(operands[-1])
+                elif op == b'"':
+                    next_line()
+                    show(operands[-1])
+                elif op == b"TJ":
+                    # Large negative kerning between pieces is a word gap
+                    pieces = []
+                    for item in operands[-1]:
+                        if isinstance(item, str):
+                            pieces.append(item)
+                        elif float(item) < -200 and pieces:
+                            pieces.append(" ")
+                    show("".join(pieces))
+            except (IndexError, TypeError, ValueError):
+                pass
+            operands = []
+    return runs
+
+def runs_to_lines(runs: list) -> list:
+    """Group runs sharing a baseline, top of page first; wide gaps become double spaces"""
+    rows = {}
+    for x, y, x_end, text in runs:
+        rows.setdefault(round(y), []).append((x, x_end, text))
+    lines = []
+    for y in sorted(rows, reverse=True):
+        parts, last_end = [], None
+        for x, x_end, text in sorted(rows[y], key=lambda run: run[0]):
+            if last_end is not None and x - last_end > COLUMN_GAP:
+                parts.append("  ")
+            parts.append(text)
+            last_end = x_end
+        lines.append(re.sub(r" {3,}", "  ", "".join(parts)).strip())
+    return [line for line in lines if line]
+
+def _fonts_named(objects: dict, base_font: bytes) -> set:
+    """Resource names (/F3 ...) of fonts with the given BaseFont"""
+    names = set()
+    for body in objects.values():
+        if re.search(rb"/BaseFont\s*/" + base_font + rb"\b", body):
+            match = re.search(rb"/Name\s*/([^\s/>]+)", body)
+            if match:
+                names.add(b"/" + match.group(1))
+    return names
+
+def extract_pages(data: bytes) -> list:
+    """Text of each page (list of strings), in page-tree order"""
+    objects = {}
+    for match in OBJECT_RE.finditer(data):
+        objects[int(match.group(1))] = match.group(3)
+
+    def stream_of(number: int) -> bytes:
+        body = objects.get(number, b"")
+        match = STREAM_RE.match(body.strip())
+        if not match:
+            return b""
+        try:
+            return _decode_stream(match.group(1), match.group(2))
+        except Exception:
+            return b""
+
+    symbol_fonts = _fonts_named(objects, b"Symbol")
+    dingbat_fonts = _fonts_named(objects, b"ZapfDingbats")
+    pages = []
+    for number in sorted(objects):
+        body = objects[number]
+        if not re.search(rb"/Type\s*/Page\b(?!s)", body):
+            continue
+        contents = re.search(rb"/Contents\s*(\[[^\]]*\]|\d+\s+\d+\s+R)", body)
+        if not contents:
+            pages.append("")
+            continue
+        content = b"\n".join(stream_of(int(ref[0])) for ref in REF_RE.findall(contents.group(1)))
+        pages.append("\n".join(runs_to_lines(content_runs(content, symbol_fonts, dingbat_fonts))))
+    return pages
+
+def is_pdf(data: bytes) -> bool:
+    return data[:1024].lstrip().startswith(b"%PDF")
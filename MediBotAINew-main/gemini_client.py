@@ -1,18 +1,10 @@
-import google.generativeai as genai
-import os
-
-# Configure Gemini API
-GEMINI_API_KEY = "AIzaSyBvrtl0key-gen-lang-client-0084923736"
-genai.configure(api_key=GEMINI_API_KEY)
-
-# Initialize model
-model = genai.GenerativeModel('gemini-pro')
+from llm.registry import get_backend
 
 def get_gemini_response(prompt: str) -> str:
     """Get response from Gemini AI"""
     try:
-        response = model.generate_content(prompt)
-        return response.text
+        # The Gemini SDK is imported and configured on first use only
+        return get_backend("gemini").generate(prompt)
     except Exception as e:
         return f"AI temporarily unavailable: {str(e)}"
 
@@ -0,0 +1,257 @@
+# jobs/job_queue.py
+"""
+Job Queue - asyncio worker pool for background work, with job state in SQLite
+
+Requests submit a job and return straight away; workers run the handler
+registered for the job's kind. A failing job is retried with jittered
+exponential backoff until max_attempts. Job rows live in the records
+database, so anything still queued or running when the process stopped is
+picked up again by start(). Finished jobs are pruned after JOB_RETENTION_DAYS,
+except the latest job of each subject, which status reads still need.
+"""
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+
+from dotenv import load_dotenv
+
+from db.database import RECORDS_DB_PATH
+
+load_dotenv()
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+# Done and failed jobs older than this are deleted (0 = keep them all)
+JOB_RETENTION_DAYS = float(os.getenv("JOB_RETENTION_DAYS", "7"))
+PRUNE_INTERVAL_SECONDS = 3600
+RETRY_BASE_SECONDS = 1.0
+RETRY_MAX_SECONDS = 300.0
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    step TEXT NOT NULL DEFAULT '',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    last_error TEXT NOT NULL DEFAULT '',
+    result TEXT NOT NULL DEFAULT 'null',
+    run_at REAL NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_subject ON jobs (subject, created_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, run_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_finished ON jobs (status, updated_at);
+"""
+
+def retry_delay(attempt: int) -> float:
+    """1s, 2s, 4s ... capped, with jitter so failed jobs don't retry in lockstep"""
+    delay = min(RETRY_BASE_SECONDS * 2 ** (attempt - 1), RETRY_MAX_SECONDS)
+    return delay * random.uniform(0.5, 1.0)
+
+class JobQueue:
+    """
+    Handlers are `async def handler(payload, set_step)`; set_step(name) records
+    progress for status reads. Blocking or CPU-heavy work inside a handler
+    should be offloaded (run_in_threadpool) so the event loop stays free.
+    """
+
+    def __init__(self, db_path: str = RECORDS_DB_PATH, workers: int = JOB_WORKERS,
+                 max_attempts: int = JOB_MAX_ATTEMPTS, retention_days: float = JOB_RETENTION_DAYS):
+        self.db_path = db_path
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retention_days = retention_days
+        self.handlers = {}
+        self._local = threading.local()
+        self._queue = None
+        self._tasks = []
+        self._timers = set()
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        conn = self._conn()
+        conn.executescript(SCHEMA)
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _update(self, job_id: str, **fields):
+        fields["updated_at"] = time.time()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._conn() as conn:
+            conn.execute(f"UPDATE jobs SET {assignments} WHERE job_id = ?", (*fields.values(), job_id))
+
+    @staticmethod
+    def _job(row) -> dict:
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"])
+        return job
+
+    def register(self, kind: str, handler):
+        self.handlers[kind] = handler
+
+    # -------------------------
+    # Submitting and reading
+    # -------------------------
+    def submit(self, kind: str, subject: str, payload: dict = None) -> dict:
+        """Persist a job and hand it to the workers; subject is what status lookups use (e.g. a record_id)"""
+        now = time.time()
+        job_id = f"JOB_{uuid.uuid4().hex[:12].upper()}"
+        with self._conn() as conn:
+            conn.execute(
+                "INSERT INTO jobs (job_id, kind, subject, payload, status, max_attempts, run_at, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, kind, subject, json.dumps(payload or {}), QUEUED, self.max_attempts, now, now, now)
+            )
+        if self._queue is not None:
+            self._queue.put_nowait(job_id)
+        return self.get(job_id)
+
+    def get(self, job_id: str):
+        row = self._conn().execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return self._job(row) if row else None
+
+    def latest(self, subject: str):
+        """Most recent job for a subject, or None"""
+        row = self._conn().execute(
+            "SELECT * FROM jobs WHERE subject = ? ORDER BY created_at DESC, rowid DESC LIMIT 1", (subject,)
+        ).fetchone()
+        return self._job(row) if row else None
+
+    def counts(self) -> dict:
+        rows = self._conn().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+    def prune(self, now: float = None) -> int:
+        """Delete done and failed jobs past the retention window; returns how many went"""
+        if self.retention_days <= 0:
+            return 0
+        cutoff = (now or time.time()) - self.retention_days * 86400
+        with self._conn() as conn:
+            deleted = conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND updated_at < ? "
+                "AND rowid NOT IN (SELECT MAX(rowid) FROM jobs GROUP BY subject)",
+                (DONE, FAILED, cutoff)
+            ).rowcount
+        if deleted:
+            print(f"Pruned {deleted} finished jobs")
+        return deleted
+
+    async def _prune_loop(self):
+        while True:
+            await asyncio.sleep(PRUNE_INTERVAL_SECONDS)
+            self.prune()
+
+    async def wait(self, job_id: str, poll: float = 0.02) -> dict:
+        """Resolve once the job is done or has failed for good"""
+        while True:
+            job = self.get(job_id)
+            if job is None or job["status"] in (DONE, FAILED):
+                return job
+            await asyncio.sleep(poll)
+
+    # -------------------------
+    # Workers
+    # -------------------------
+    async def start(self):
+        """Start the workers, prune old jobs and requeue jobs interrupted by the last shutdown"""
+        if self._queue is not None:
+            return
+        self._queue = asyncio.Queue()
+        self.prune()
+        with self._conn() as conn:
+            conn.execute("UPDATE jobs SET status = ? WHERE status = ?", (QUEUED, RUNNING))
+        for row in self._conn().execute("SELECT job_id, run_at FROM jobs WHERE status = ? ORDER BY run_at", (QUEUED,)):
+            self._schedule(row["job_id"], row["run_at"])
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._prune_loop()))
+
+    async def stop(self):
+        """Cancel the workers; a job cut off mid-run is left queued for the next start"""
+        for timer in self._timers:
+            timer.cancel()
+        self._timers.clear()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+
+    def _schedule(self, job_id: str, run_at: float):
+        delay = run_at - time.time()
+        if delay <= 0:
+            self._queue.put_nowait(job_id)
+            return
+        queue = self._queue
+
+        def release():
+            self._timers.discard(timer)
+            queue.put_nowait(job_id)
+
+        timer = asyncio.get_running_loop().call_later(delay, release)
+        self._timers.add(timer)
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            except Exception as e:
+                print(f"Job worker error on {job_id}: {e}")
+
+    async def _run(self, job_id: str):
+        job = self.get(job_id)
+        if job is None or job["status"] != QUEUED:
+            return
+        handler = self.handlers.get(job["kind"])
+        if handler is None:
+            self._update(job_id, status=FAILED, last_error=f"No handler for job kind '{job['kind']}'")
+            return
+
+        attempts = job["attempts"] + 1
+        self._update(job_id, status=RUNNING, attempts=attempts)
+        try:
+            result = await handler(job["payload"], lambda step: self._update(job_id, step=step))
+        except asyncio.CancelledError:
+            self._update(job_id, status=QUEUED, attempts=attempts - 1)
+            raise
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            if attempts >= job["max_attempts"]:
+                print(f"Job {job_id} failed after {attempts} attempts: {error}")
+                self._update(job_id, status=FAILED, last_error=error)
+                return
+            run_at = time.time() + retry_delay(attempts)
+            self._update(job_id, status=QUEUED, last_error=error, run_at=run_at)
+            self._schedule(job_id, run_at)
+            return
+        self._update(job_id, status=DONE, step="", result=json.dumps(result))
+
+# Global instance
+job_queue = None
+
+def get_job_queue() -> JobQueue:
+    global job_queue
+    if job_queue is None:
+        job_queue = JobQueue()
+    return job_queue
@@ -0,0 +1,287 @@
+"""
+Knowledge Retrieval - BM25 index over the medical knowledge base and data/*.txt
+
+Build a memory-mapped index file ahead of time with:
+    python knowledge_index.py build
+Otherwise the index is built in memory on first use.
+"""
+import glob
+import json
+import math
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections import Counter, defaultdict
+
+from medical_knowledge import MEDICAL_KNOWLEDGE
+from utils.tokenizer import tokenize
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BASE_DIR, "data")
+INDEX_PATH = os.getenv("KNOWLEDGE_INDEX_PATH", os.path.join(DATA_DIR, "knowledge_index.bin"))
+
+MAGIC = b"BM25IDX1"
+
+# Standard BM25 parameters
+K1 = 1.2
+B = 0.75
+
+# Passages longer than this are split into overlapping windows
+MAX_PASSAGE_WORDS = 120
+
+# Share of the query's IDF weight the top passage must cover to answer directly
+CONFIDENCE_THRESHOLD = 0.75
+# A confident passage must also be about the question: its title shares a term
+# with the query, or its BM25 score alone reaches this. Confidence only says the
+# query's words appear somewhere in the passage ("pneumonia" in a list of causes).
+DIRECT_ANSWER_SCORE = 6.0
+
+# ---------------------------
+# Passages
+# ---------------------------
+def _title(key: str) -> str:
+    return key.replace("_", " ").title()
+
+def knowledge_passages() -> list:
+    """One passage per vital sign, condition, medication and emergency list"""
+    passages = []
+
+    for vital, ranges in MEDICAL_KNOWLEDGE["vital_signs"].items():
+        passages.append({
+            "title": f"{_title(vital)} Ranges",
+            "text": "\n".join(f"{_title(level)}: {value}" for level, value in ranges.items()),
+            "source": f"vital_signs.{vital}"
+        })
+
+    for condition, info in MEDICAL_KNOWLEDGE["common_conditions"].items():
+        passages.append({
+            "title": _title(condition),
+            "text": "\n".join(f"{_title(field)}: {value}" for field, value in info.items()),
+            "source": f"common_conditions.{condition}"
+        })
+
+    for medication, info in MEDICAL_KNOWLEDGE["medications"].items():
+        passages.append({
+            "title": _title(medication),
+            "text": "\n".join(f"{_title(field)}: {value}" for field, value in info.items()),
+            "source": f"medications.{medication}"
+        })
+
+    for group, items in MEDICAL_KNOWLEDGE["emergency_criteria"].items():
+        passages.append({
+            "title": "When To Call Emergency Services",
+            "text": "\n".join(f"- {item}" for item in items),
+            "source": f"emergency_criteria.{group}"
+        })
+
+    return passages
+
+def text_file_passages(data_dir: str = DATA_DIR) -> list:
+    """Split every data/*.txt file on blank lines, windowing long paragraphs"""
+    passages = []
+
+    for path in sorted(glob.glob(os.path.join(data_dir, "*.txt"))):
+        with open(path, encoding="utf-8") as f:
+            content = f.read()
+
+        name = os.path.basename(path)
+        for number, paragraph in enumerate(p.strip() for p in content.split("\n\n")):
+            if not paragraph:
+                continue
+            lines = paragraph.split("\n")
+            # A short first line ending with ":" is a heading
+            title = lines[0].rstrip(":") if len(lines) > 1 and lines[0].endswith(":") else _title(os.path.splitext(name)[0])
+
+            words = paragraph.split()
+            if len(words) <= MAX_PASSAGE_WORDS:
+                chunks = [paragraph]
+            else:
+                step = MAX_PASSAGE_WORDS // 2
+                chunks = [" ".join(words[i:i + MAX_PASSAGE_WORDS]) for i in range(0, len(words) - step, step)]
+
+            for chunk in chunks:
+                passages.append({"title": title, "text": chunk, "source": f"{name}#{number}"})
+
+    return passages
+
+def source_paths() -> list:
+    return [os.path.join(BASE_DIR, "medical_knowledge.py")] + glob.glob(os.path.join(DATA_DIR, "*.txt"))
+
+# ---------------------------
+# BM25 index
+# ---------------------------
+class BM25Index:
+    """
+    Inverted index with flat uint32 postings: [doc_id, tf, doc_id, tf, ...].
+
+    terms maps a term to (offset, doc_count) into the postings array. The same
+    layout is written to disk so a saved index can be memory-mapped and queried
+    without deserializing the postings.
+    """
+
+    def __init__(self, passages, terms, postings, doc_lengths, mapped=None):
+        self.passages = passages
+        self.terms = terms
+        self.postings = postings
+        self.doc_lengths = doc_lengths
+        self.doc_count = len(passages)
+        self.avg_length = (sum(doc_lengths) / self.doc_count) if self.doc_count else 0.0
+        self._mapped = mapped
+
+    @classmethod
+    def build(cls, passages):
+        postings_by_term = defaultdict(list)
+        doc_lengths = array("I")
+
+        for doc_id, passage in enumerate(passages):
+            tokens = tokenize(passage["title"] + " " + passage["text"])
+            doc_lengths.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                postings_by_term[term].append((doc_id, tf))
+
+        terms = {}
+        postings = array("I")
+        for term in sorted(postings_by_term):
+            entries = postings_by_term[term]
+            terms[term] = (len(postings) // 2, len(entries))
+            for doc_id, tf in entries:
+                postings.extend((doc_id, tf))
+
+        return cls(passages, terms, postings, doc_lengths)
+
+    def idf(self, doc_freq: int) -> float:
+        return math.log(1 + (self.doc_count - doc_freq + 0.5) / (doc_freq + 0.5))
+
+    def search(self, query: str, limit: int = 3) -> list:
+        """Return up to `limit` hits as dicts with score, confidence and passage"""
+        query_terms = set(tokenize(query))
+        if not query_terms or not self.doc_count:
+            return []
+
+        scores = defaultdict(float)
+        matched_weight = defaultdict(float)
+        total_weight = 0.0
+        # Terms the knowledge base has never seen weigh as much as the rarest known term
+        unknown_idf = self.idf(0)
+
+        for term in query_terms:
+            entry = self.terms.get(term)
+            if entry is None:
+                total_weight += unknown_idf
+                continue
+
+            offset, doc_freq = entry
+            idf = self.idf(doc_freq)
+            total_weight += idf
+            for i in range(offset, offset + doc_freq):
+                doc_id = self.postings[2 * i]
+                tf = self.postings[2 * i + 1]
+                norm = K1 * (1 - B + B * self.doc_lengths[doc_id] / self.avg_length)
+                scores[doc_id] += idf * tf * (K1 + 1) / (tf + norm)
+                matched_weight[doc_id] += idf
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+        return [
+            {
+                "score": round(score, 4),
+                "confidence": round(matched_weight[doc_id] / total_weight, 4),
+                **self.passages[doc_id]
+            }
+            for doc_id, score in ranked
+        ]
+
+    # -------------------------
+    # Persistence
+    # -------------------------
+    def save(self, path: str):
+        header = json.dumps({
+            "passages": self.passages,
+            "terms": self.terms,
+            "postings_count": len(self.postings),
+            "doc_count": self.doc_count
+        }).encode("utf-8")
+        # Keep the uint32 arrays 4-byte aligned
+        padding = (-(len(MAGIC) + 4 + len(header))) % 4
+
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(MAGIC)
+            f.write(struct.pack("<I", len(header) + padding))
+            f.write(header + b" " * padding)
+            f.write(array("I", self.postings).tobytes())
+            f.write(array("I", self.doc_lengths).tobytes())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str):
+        """Memory-map a saved index; postings are read straight from the page cache"""
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if mapped[:len(MAGIC)] != MAGIC:
+            mapped.close()
+            raise ValueError(f"{path} is not a knowledge index file")
+
+        header_size = struct.unpack_from("<I", mapped, len(MAGIC))[0]
+        header_start = len(MAGIC) + 4
+        header = json.loads(mapped[header_start:header_start + header_size])
+
+        data_start = header_start + header_size
+        words = memoryview(mapped)[data_start:].cast("I")
+        postings = words[:header["postings_count"]]
+        doc_lengths = words[header["postings_count"]:header["postings_count"] + header["doc_count"]]
+
+        terms = {term: tuple(entry) for term, entry in header["terms"].items()}
+        return cls(header["passages"], terms, postings, doc_lengths, mapped=mapped)
+
+# ---------------------------
+# Shared instance
+# ---------------------------
+knowledge_index = None
+
+def _index_is_fresh(path: str) -> bool:
+    if not os.path.exists(path):
+        return False
+    built = os.path.getmtime(path)
+    return all(os.path.getmtime(source) <= built for source in source_paths())
+
+def build_knowledge_index() -> BM25Index:
+    return BM25Index.build(knowledge_passages() + text_file_passages())
+
+def get_knowledge_index() -> BM25Index:
+    """Load the prebuilt index if it is up to date, otherwise build it in memory"""
+    global knowledge_index
+    if knowledge_index is None:
+        if _index_is_fresh(INDEX_PATH):
+            try:
+                knowledge_index = BM25Index.load(INDEX_PATH)
+            except Exception as e:
+                print(f"Could not load knowledge index, rebuilding: {e}")
+        if knowledge_index is None:
+            knowledge_index = build_knowledge_index()
+        print(f"Knowledge index ready: {knowledge_index.doc_count} passages, {len(knowledge_index.terms)} terms")
+    return knowledge_index
+
+def retrieve(query: str, limit: int = 3):
+    """(passage that can answer directly or None, all hits for LLM context)"""
+    hits = get_knowledge_index().search(query, limit=limit)
+    query_terms = set(tokenize(query))
+    for hit in hits:
+        # A well-covered passage may answer even if a longer one scored a bit higher
+        if hit["confidence"] < CONFIDENCE_THRESHOLD or hit["score"] < 0.5 * hits[0]["score"]:
+            continue
+        if hit["score"] >= DIRECT_ANSWER_SCORE or query_terms & set(tokenize(hit["title"])):
+            return hit, hits
+    return None, hits
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "build":
+        index = build_knowledge_index()
+        index.save(INDEX_PATH)
+        print(f"Wrote {INDEX_PATH}: {index.doc_count} passages, {len(index.terms)} terms")
+    else:
+        query = " ".join(sys.argv[1:]) or "normal temperature range"
+        for hit in get_knowledge_index().search(query):
+            print(f"{hit['score']:7.3f}  conf={hit['confidence']:.2f}  {hit['title']}  ({hit['source']})")
@@ -0,0 +1,44 @@
+"""
+Common interface shared by every LLM backend
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+class LLMBackend:
+    name = "base"
+
+    # Threads used by generate_batch when the backend has no native batching
+    batch_workers = 4
+
+    def start(self):
+        """Optional warm-up hook, called once at application startup"""
+
+    def stop(self):
+        """Optional shutdown hook"""
+
+    def status(self) -> dict:
+        return {"backend": self.name, "ready": True}
+
+    def generate(self, prompt: str, format: str = None, timeout: float = None,
+                 num_predict: int = None, stream: bool = False):
+        """
+        Complete a prompt.
+
+        Returns the full text, or an iterator of text chunks when stream=True.
+        format="json" asks the model for a JSON document. Raises on failure so
+        callers can fall back to rule-based answers.
+        """
+        raise NotImplementedError
+
+    def generate_batch(self, prompts: list, format: str = None, timeout: float = None,
+                       num_predict: int = None, max_workers: int = None) -> list:
+        """Complete several prompts concurrently; failed prompts come back as None"""
+        def run(prompt):
+            try:
+                return self.generate(prompt, format=format, timeout=timeout, num_predict=num_predict)
+            except Exception as e:
+                print(f"{self.name} batch item failed: {e}")
+                return None
+
+        workers = max(1, min(max_workers or self.batch_workers, len(prompts)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(run, prompts))
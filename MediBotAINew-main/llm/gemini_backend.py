@@ -0,0 +1,48 @@
+"""
+Gemini backend - Google Generative AI, only imported when selected
+"""
+import os
+
+from llm.base import LLMBackend
+
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-pro")
+GEMINI_TIMEOUT = float(os.getenv("GEMINI_TIMEOUT", "30"))
+
+class GeminiBackend(LLMBackend):
+    name = "gemini"
+
+    def __init__(self, model_name=GEMINI_MODEL, timeout=GEMINI_TIMEOUT):
+        # Heavy SDK import happens here, on first use, never at app import
+        import google.generativeai as genai
+
+        api_key = os.getenv("GEMINI_API_KEY")
+        if not api_key:
+            raise ValueError("GEMINI_API_KEY must be set to use the Gemini backend")
+
+        genai.configure(api_key=api_key)
+        self.model_name = model_name
+        self.timeout = timeout
+        self.model = genai.GenerativeModel(model_name)
+
+    def status(self) -> dict:
+        return {"backend": self.name, "model": self.model_name, "ready": True}
+
+    def _config(self, format, num_predict):
+        config = {}
+        if num_predict:
+            config["max_output_tokens"] = num_predict
+        if format == "json":
+            config["response_mime_type"] = "application/json"
+        return config or None
+
+    def generate(self, prompt: str, format: str = None, timeout: float = None,
+                 num_predict: int = None, stream: bool = False):
+        response = self.model.generate_content(
+            prompt,
+            generation_config=self._config(format, num_predict),
+            stream=stream,
+            request_options={"timeout": timeout or self.timeout}
+        )
+        if stream:
+            return (chunk.text for chunk in response)
+        return response.text
@@ -0,0 +1,240 @@
+"""
+Ollama Model Lifecycle Manager - resolves, warms up and keeps the configured model loaded
+"""
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+import requests
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Configuration (see .env.example / docker-compose.yml)
+OLLAMA_HOST = os.getenv("OLLAMA_HOST", "http://localhost:11434")
+OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "phi3:mini")
+OLLAMA_TIMEOUT = float(os.getenv("OLLAMA_TIMEOUT", "30"))
+# -1 keeps the model resident until Ollama restarts
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "-1")
+# Cap on generated tokens so response time stays bounded
+OLLAMA_NUM_PREDICT = int(os.getenv("OLLAMA_NUM_PREDICT", "512"))
+# How often to check the model is still loaded and re-warm it if not
+OLLAMA_KEEPALIVE_INTERVAL = float(os.getenv("OLLAMA_KEEPALIVE_INTERVAL", "300"))
+
+def parse_keep_alive(value):
+    """Ollama takes seconds as a number or a duration string like "30m"; -1 means forever"""
+    text = str(value).strip()
+    if text.lstrip("-").isdigit():
+        return int(text)
+    return text
+
+class ModelManager:
+    def __init__(self, host=OLLAMA_HOST, model=OLLAMA_MODEL, keep_alive=OLLAMA_KEEP_ALIVE,
+                 num_predict=OLLAMA_NUM_PREDICT, timeout=OLLAMA_TIMEOUT,
+                 keepalive_interval=OLLAMA_KEEPALIVE_INTERVAL):
+        self.host = host.rstrip("/")
+        self.configured_model = model
+        self.model = model
+        self.keep_alive = parse_keep_alive(keep_alive)
+        self.num_predict = num_predict
+        self.timeout = timeout
+        self.keepalive_interval = keepalive_interval
+
+        # unloaded -> loading -> ready, error if Ollama can't be reached,
+        # missing if the configured model isn't installed there
+        self.state = "unloaded"
+        self.load_seconds = None
+        self.ready_at = None
+        self.last_error = None
+
+        self.lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    # -------------------------
+    # Lifecycle
+    # -------------------------
+    def start(self):
+        """Resolve and warm the model in the background, then keep it loaded"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="ollama-model-manager", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        if self.resolve_model():
+            self.warm_up()
+        while not self._stop.wait(self.keepalive_interval):
+            if self.state == "missing":
+                # Picked up once someone runs `ollama pull <model>`
+                if self.resolve_model():
+                    self.warm_up()
+            elif not self.is_loaded():
+                print(f"Model {self.model} was unloaded, warming it again")
+                self.warm_up()
+
+    def resolve_model(self):
+        """
+        Find the configured model among the installed ones ("name" also matches
+        "name:latest"). Returns its installed name, or None and state "missing"
+        when it isn't installed - another model is never substituted.
+        """
+        try:
+            response = requests.get(f"{self.host}/api/tags", timeout=5)
+            response.raise_for_status()
+            installed = [m["name"] for m in response.json().get("models", [])]
+        except Exception as e:
+            print(f"Could not list Ollama models, using {self.configured_model}: {e}")
+            return self.model
+
+        wanted = self.configured_model
+        candidates = [wanted] if ":" in wanted else [wanted, f"{wanted}:latest"]
+        resolved = next((name for name in candidates if name in installed), None)
+        if resolved is None:
+            with self.lock:
+                self.state = "missing"
+                self.last_error = (f"Model {wanted} is not installed in Ollama "
+                                   f"(run `ollama pull {wanted}`); installed: {', '.join(installed) or 'none'}")
+            print(self.last_error)
+            return None
+
+        with self.lock:
+            if self.state == "missing":
+                self.state = "unloaded"
+                self.last_error = None
+        self.model = resolved
+        return self.model
+
+    def warm_up(self) -> bool:
+        """Load the model with a one-token prompt and pin it with keep_alive"""
+        with self.lock:
+            self.state = "loading"
+        started = time.perf_counter()
+
+        try:
+            response = requests.post(
+                f"{self.host}/api/generate",
+                json={
+                    "model": self.model,
+                    "prompt": "ok",
+                    "stream": False,
+                    "keep_alive": self.keep_alive,
+                    "options": {"num_predict": 1}
+                },
+                timeout=max(self.timeout, 120)
+            )
+            response.raise_for_status()
+        except Exception as e:
+            with self.lock:
+                self.state = "error"
+                self.last_error = str(e)
+            print(f"Model warm-up failed for {self.model}: {e}")
+            return False
+
+        with self.lock:
+            self.state = "ready"
+            self.load_seconds = round(time.perf_counter() - started, 3)
+            self.ready_at = datetime.now().isoformat()
+            self.last_error = None
+        print(f"Model {self.model} ready in {self.load_seconds}s")
+        return True
+
+    def is_loaded(self) -> bool:
+        """Ask Ollama whether the model is currently resident in memory"""
+        try:
+            response = requests.get(f"{self.host}/api/ps", timeout=5)
+            response.raise_for_status()
+            loaded = [m.get("name") for m in response.json().get("models", [])]
+            return self.model in loaded
+        except Exception:
+            return False
+
+    def status(self) -> dict:
+        with self.lock:
+            return {
+                "configured_model": self.configured_model,
+                "model": self.model,
+                "state": self.state,
+                "ready": self.state == "ready",
+                "load_seconds": self.load_seconds,
+                "ready_at": self.ready_at,
+                "keep_alive": self.keep_alive,
+                "num_predict": self.num_predict,
+                "last_error": self.last_error
+            }
+
+    # -------------------------
+    # Generation
+    # -------------------------
+    def _check_installed(self):
+        if self.state == "missing":
+            raise RuntimeError(self.last_error)
+
+    def _payload(self, prompt, format, num_predict, stream):
+        payload = {
+            "model": self.model,
+            "prompt": prompt,
+            "stream": stream,
+            "keep_alive": self.keep_alive,
+            "options": {"num_predict": min(num_predict or self.num_predict, self.num_predict)}
+        }
+        if format:
+            payload["format"] = format
+        return payload
+
+    def _mark_ready(self):
+        # A successful call means the model is loaded
+        with self.lock:
+            if self.state != "ready":
+                self.state = "ready"
+                self.ready_at = datetime.now().isoformat()
+
+    def generate(self, prompt: str, format: str = None, num_predict: int = None, timeout: float = None) -> str:
+        """Run a non-streaming completion on the managed model, raises on failure"""
+        self._check_installed()
+        response = requests.post(
+            f"{self.host}/api/generate",
+            json=self._payload(prompt, format, num_predict, stream=False),
+            timeout=timeout or self.timeout
+        )
+        if response.status_code != 200:
+            raise RuntimeError(f"Ollama API error: {response.status_code}")
+
+        self._mark_ready()
+        return response.json()["response"]
+
+    def generate_stream(self, prompt: str, format: str = None, num_predict: int = None, timeout: float = None):
+        """Yield response text chunks as Ollama produces them"""
+        self._check_installed()
+        with requests.post(
+            f"{self.host}/api/generate",
+            json=self._payload(prompt, format, num_predict, stream=True),
+            timeout=timeout or self.timeout,
+            stream=True
+        ) as response:
+            if response.status_code != 200:
+                raise RuntimeError(f"Ollama API error: {response.status_code}")
+            self._mark_ready()
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if chunk.get("response"):
+                    yield chunk["response"]
+                if chunk.get("done"):
+                    break
+
+# Global instance
+model_manager = None
+
+def get_model_manager():
+    global model_manager
+    if model_manager is None:
+        model_manager = ModelManager()
+    return model_manager
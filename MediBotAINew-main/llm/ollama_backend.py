@@ -0,0 +1,26 @@
+"""
+Ollama backend - local models served by the Ollama daemon
+"""
+from llm.base import LLMBackend
+from llm.model_manager import get_model_manager
+
+class OllamaBackend(LLMBackend):
+    name = "ollama"
+
+    def __init__(self):
+        self.manager = get_model_manager()
+
+    def start(self):
+        self.manager.start()
+
+    def stop(self):
+        self.manager.stop()
+
+    def status(self) -> dict:
+        return {"backend": self.name, **self.manager.status()}
+
+    def generate(self, prompt: str, format: str = None, timeout: float = None,
+                 num_predict: int = None, stream: bool = False):
+        if stream:
+            return self.manager.generate_stream(prompt, format=format, num_predict=num_predict, timeout=timeout)
+        return self.manager.generate(prompt, format=format, num_predict=num_predict, timeout=timeout)
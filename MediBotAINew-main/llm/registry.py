@@ -0,0 +1,46 @@
+"""
+LLM Backend Registry - backends are imported lazily and picked by configuration
+"""
+import importlib
+import os
+import threading
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Backend name -> "module:ClassName"; modules are only imported when requested
+BACKENDS = {
+    "ollama": "llm.ollama_backend:OllamaBackend",
+    "gemini": "llm.gemini_backend:GeminiBackend",
+    "stub": "llm.stub_backend:StubBackend",
+}
+
+DEFAULT_BACKEND = os.getenv("LLM_BACKEND", "ollama")
+
+_instances = {}
+_lock = threading.Lock()
+
+def register_backend(name: str, target: str):
+    """Register a backend as "module:ClassName" without importing it"""
+    BACKENDS[name] = target
+
+def available_backends() -> list:
+    return sorted(BACKENDS)
+
+def get_backend(name: str = None):
+    """Return the (cached) backend instance, importing its module on first use"""
+    name = (name or DEFAULT_BACKEND).lower()
+
+    with _lock:
+        if name in _instances:
+            return _instances[name]
+
+        if name not in BACKENDS:
+            raise ValueError(f"Unknown LLM backend '{name}', expected one of {available_backends()}")
+
+        module_name, class_name = BACKENDS[name].split(":")
+        backend_class = getattr(importlib.import_module(module_name), class_name)
+        backend = backend_class()
+        _instances[name] = backend
+        return backend
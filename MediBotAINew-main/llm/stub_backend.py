@@ -0,0 +1,50 @@
+"""
+Deterministic local stub backend - no network, used by tests and benchmarks
+"""
+import hashlib
+import json
+import os
+import time
+
+from llm.base import LLMBackend
+
+# Optional artificial latency to simulate inference in benchmarks
+STUB_LATENCY_MS = float(os.getenv("LLM_STUB_LATENCY_MS", "0"))
+
+class StubBackend(LLMBackend):
+    name = "stub"
+
+    def __init__(self, latency_ms=STUB_LATENCY_MS):
+        self.latency_ms = latency_ms
+        self.calls = 0
+
+    def status(self) -> dict:
+        return {"backend": self.name, "ready": True, "calls": self.calls}
+
+    def _respond(self, prompt, format):
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:12]
+        if format == "json":
+            # Same shape as the doctor assistant's structured analysis
+            return json.dumps({
+                "overall_status": "stable",
+                "risk_level": "low",
+                "medical_notes": [f"Stub analysis {digest}"],
+                "recommendations": ["Continue standard care"],
+                "follow_up": ["Continue monitoring"]
+            })
+        return f"Stub response {digest}: consult your healthcare provider for personalized advice."
+
+    def generate(self, prompt: str, format: str = None, timeout: float = None,
+                 num_predict: int = None, stream: bool = False):
+        self.calls += 1
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+
+        text = self._respond(prompt, format)
+        if num_predict and format != "json":
+            # Roughly one token per word
+            text = " ".join(text.split(" ")[:num_predict])
+        if stream:
+            words = text.split(" ")
+            return iter([word + " " for word in words[:-1]] + words[-1:])
+        return text
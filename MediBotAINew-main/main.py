@@ -1,10 +1,11 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 import requests
 import random
 import time
 import math
+import uuid
 # from gemini_client import get_gemini_response, get_medical_analysis
 
 from agents.health_agent import HealthAgent
@@ -16,6 +17,12 @@ from reports_agent import setup_reports_agent
 from reminders_agent import setup_reminders_agent
 from chat_endpoint import handle_chat
 from medical_records_system import setup_medical_records_system
+from records_import import setup_records_import
+from enhanced_doctor_assistant import setup_enhanced_doctor_assistant
+from analysis_jobs import AnalysisJobStore
+from llm.registry import get_backend
+from knowledge_index import get_knowledge_index
+from extraction.engine import get_extraction_engine
 
 # Initialize FastAPI
 app = FastAPI(title="MediBot AI Backend")
@@ -39,6 +46,9 @@ message_bus.register("health_agent", health_agent)
 message_bus.register("ingest_agent", ingest_agent)
 message_bus.register("doctor_assistant", doctor_assistant)
 
+# Background LLM enrichment for two-phase analyses
+analysis_jobs = AnalysisJobStore()
+
 # Setup Reports Agent
 setup_reports_agent(app)
 
@@ -48,6 +58,30 @@ setup_reminders_agent(app)
 # Setup Medical Records System
 setup_medical_records_system(app)
 
+# Setup bulk import (POST /api/medical-records/bulk-upload)
+setup_records_import(app)
+
+# Setup Enhanced Doctor Assistant (deterministic knowledge-base engine)
+setup_enhanced_doctor_assistant(app)
+
+# Warm the configured LLM backend (LLM_BACKEND) so the first analysis doesn't pay the load time
+@app.on_event("startup")
+def warm_up_llm():
+    get_backend().start()
+
+# Build (or memory-map) the knowledge base retrieval index before the first chat
+@app.on_event("startup")
+def load_knowledge_index():
+    get_knowledge_index()
+
+@app.on_event("shutdown")
+def stop_llm_backend():
+    get_backend().stop()
+
+@app.on_event("shutdown")
+def stop_extraction_workers():
+    get_extraction_engine().close()
+
 # ---------------------------
 # Pydantic Models for API
 # ---------------------------
@@ -67,6 +101,11 @@ class VitalsInput(BaseModel):
 def home():
     return {"message": "MediBot Backend Running"}
 
+@app.get("/api/llm/status")
+def llm_status():
+    """Load / ready state of the configured LLM backend"""
+    return get_backend().status()
+
 @app.post("/api/health/analyze")
 def analyze_vitals(vitals: VitalsInput):
     """
@@ -153,18 +192,43 @@ def latest_data():
 def analyze_vitals_assistant(request: dict):
     """
     Doctor Assistant analysis endpoint
+
+    mode="two_phase" returns the rule-based assessment immediately with an
+    analysis_id; the LLM result is fetched later from /analysis/{analysis_id}
     """
     vitals = request.get("vitals", {})
+    
+    if request.get("mode") == "two_phase":
+        job = analysis_jobs.start(
+            vitals,
+            doctor_assistant.analyze_vitals_fast,
+            doctor_assistant.llm_analysis
+        )
+        return job
+    
     analysis = doctor_assistant.analyze_vitals(vitals)
     return {"analysis": analysis}
 
+@app.get("/api/doctor-assistant/analysis/{analysis_id}")
+async def get_assistant_analysis(analysis_id: str, wait: float = 0):
+    """
+    Poll a two-phase analysis; wait > 0 long-polls until the LLM result is in
+    """
+    job = await analysis_jobs.wait(analysis_id, wait)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Analysis not found")
+    return job
+
 @app.post("/api/doctor-assistant/chat")
 def chat_with_assistant(request: dict):
     """
     Chat endpoint with medical context filtering
+
+    Pass the returned session_id back to keep conversation context
     """
     query = request.get("message", "")
-    response = handle_chat(query)
-    return {"response": response}
+    session_id = request.get("session_id") or f"chat_{uuid.uuid4().hex[:12]}"
+    response = handle_chat(query, session_id)
+    return {"response": response, "session_id": session_id}
 
 
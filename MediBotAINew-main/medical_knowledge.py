@@ -1,6 +1,7 @@
 """
 Medical Knowledge Base - Provides specific medical information for accurate responses
 """
+from utils.keyword_matcher import KeywordMatcher
 
 MEDICAL_KNOWLEDGE = {
     "vital_signs": {
@@ -102,6 +103,121 @@ MEDICAL_KNOWLEDGE = {
     }
 }
 
+CLINICAL_SCENARIOS = {
+    "chest_pain": {
+        "title": "Chest Pain",
+        "keywords": ["chest pain", "chest pressure", "chest tightness", "angina"],
+        "assessment": [
+            "Obtain a 12-lead ECG within 10 minutes",
+            "Check troponin and repeat at 3 hours",
+            "Record heart rate, blood pressure and SpO2"
+        ],
+        "red_flags": [
+            "Pain lasting more than 5 minutes or radiating to arm, jaw or back",
+            "Sweating, nausea or shortness of breath with the pain",
+            "ST changes on ECG"
+        ],
+        "actions": [
+            "Aspirin 300 mg unless contraindicated",
+            "Oxygen only if SpO2 below 94%",
+            "Activate the cardiac pathway if ST elevation is present"
+        ]
+    },
+    "shortness_of_breath": {
+        "title": "Shortness of Breath",
+        "keywords": ["shortness of breath", "breathless", "dyspnea", "difficulty breathing"],
+        "assessment": [
+            "Respiratory rate, SpO2 and work of breathing",
+            "Auscultate the chest, check for wheeze or crackles",
+            "Consider chest X-ray and arterial blood gas"
+        ],
+        "red_flags": [
+            "SpO2 below 90% or respiratory rate above 30",
+            "Unable to speak in full sentences",
+            "Altered consciousness or cyanosis"
+        ],
+        "actions": [
+            "Sit the patient upright and titrate oxygen to SpO2 94-98%",
+            "Treat the underlying cause (bronchospasm, heart failure, pneumonia)",
+            "Escalate to a MER call if red flags are present"
+        ]
+    },
+    "sepsis": {
+        "title": "Suspected Sepsis",
+        "keywords": ["sepsis", "septic", "infection with fever"],
+        "assessment": [
+            "qSOFA: respiratory rate 22 or more, altered mentation, systolic BP 100 or less",
+            "Lactate, blood cultures and full blood count",
+            "Look for a source of infection"
+        ],
+        "red_flags": [
+            "Systolic BP below 90 mmHg or lactate above 2 mmol/L",
+            "New confusion",
+            "Reduced urine output"
+        ],
+        "actions": [
+            "Blood cultures before antibiotics",
+            "Broad-spectrum antibiotics within 1 hour",
+            "30 mL/kg crystalloid if hypotensive or lactate 4 or above"
+        ]
+    },
+    "stroke": {
+        "title": "Suspected Stroke",
+        "keywords": ["stroke", "facial droop", "slurred speech", "arm weakness"],
+        "assessment": [
+            "FAST: Face, Arms, Speech, Time of onset",
+            "Check blood glucose to exclude hypoglycemia",
+            "Urgent non-contrast CT head"
+        ],
+        "red_flags": [
+            "Onset within the last 4.5 hours (thrombolysis window)",
+            "Reduced consciousness",
+            "Blood pressure above 185/110 mmHg"
+        ],
+        "actions": [
+            "Activate the stroke team immediately",
+            "Keep nil by mouth until swallow is assessed",
+            "Record the time last known well"
+        ]
+    },
+    "hypoglycemia": {
+        "title": "Hypoglycemia",
+        "keywords": ["hypoglycemia", "hypo", "low blood sugar", "low glucose"],
+        "assessment": [
+            "Capillary glucose below 70 mg/dL confirms hypoglycemia",
+            "Assess consciousness and ability to swallow",
+            "Review insulin and sulfonylurea doses"
+        ],
+        "red_flags": [
+            "Glucose below 54 mg/dL",
+            "Confusion, seizures or unconsciousness"
+        ],
+        "actions": [
+            "Conscious patient: 15-20 g fast-acting carbohydrate, recheck in 15 minutes",
+            "Unconscious patient: IV dextrose or IM glucagon",
+            "Give a longer-acting carbohydrate once glucose recovers"
+        ]
+    },
+    "hypertensive_crisis": {
+        "title": "Hypertensive Crisis",
+        "keywords": ["hypertensive crisis", "hypertensive emergency", "very high blood pressure"],
+        "assessment": [
+            "Repeat blood pressure in both arms",
+            "Look for end-organ damage: chest pain, headache, vision change, confusion",
+            "ECG, renal function and urinalysis"
+        ],
+        "red_flags": [
+            "Blood pressure above 180/120 mmHg with symptoms",
+            "Neurological deficit or chest pain"
+        ],
+        "actions": [
+            "With end-organ damage: IV antihypertensives in a monitored setting",
+            "Lower mean arterial pressure by no more than 25% in the first hour",
+            "Without symptoms: restart or adjust oral therapy and review within days"
+        ]
+    }
+}
+
 def get_vital_assessment(vital_type: str, value: float) -> dict:
     """Get detailed assessment for a specific vital sign"""
     
@@ -160,3 +276,188 @@ def get_medication_info(medication: str) -> dict:
             return info
     
     return None
+
+def analyze_vitals_comprehensive(vitals: dict) -> dict:
+    """Rule-based multi-vital analysis with risk stratification; missing vitals are skipped"""
+    findings = []
+    risk_factors = []
+    
+    hr = vitals.get("heart_rate")
+    if hr is not None:
+        if hr < 50:
+            findings.append("🔴 CRITICAL: Severe bradycardia detected. Consider atropine or pacing.")
+        elif hr < 60:
+            findings.append("🟡 Bradycardia present. Monitor for symptoms of decreased cardiac output.")
+        elif hr > 120:
+            findings.append("🔴 Significant tachycardia. Evaluate for underlying causes (fever, dehydration, arrhythmia).")
+        elif hr > 100:
+            findings.append("🟡 Mild tachycardia. Consider causes: anxiety, pain, medications.")
+        else:
+            findings.append("✅ Heart rate within normal limits.")
+        if hr < 50 or hr > 120:
+            risk_factors.append("cardiac")
+    
+    bp = vitals.get("bp")
+    if bp is not None:
+        if bp > 180:
+            findings.append("🔴 HYPERTENSIVE CRISIS: Immediate intervention required. Consider IV antihypertensives.")
+        elif bp > 140:
+            findings.append("🟡 Stage 2 hypertension. Evaluate for target organ damage.")
+        elif bp < 80:
+            findings.append("🔴 Severe hypotension. Assess for shock, consider fluid resuscitation.")
+        elif bp < 90:
+            findings.append("🟡 Hypotension present. Monitor closely, evaluate causes.")
+        else:
+            findings.append("✅ Blood pressure within acceptable range.")
+        if bp > 180 or bp < 80:
+            risk_factors.append("hemodynamic")
+    
+    spo2 = vitals.get("spo2")
+    if spo2 is not None:
+        if spo2 < 85:
+            findings.append("🔴 CRITICAL: Severe hypoxemia. Immediate oxygen therapy and respiratory support needed.")
+        elif spo2 < 90:
+            findings.append("🔴 Moderate hypoxemia. High-flow oxygen therapy indicated.")
+        elif spo2 < 95:
+            findings.append("🟡 Mild hypoxemia. Supplemental oxygen may be beneficial.")
+        else:
+            findings.append("✅ Oxygen saturation adequate.")
+        if spo2 < 90:
+            risk_factors.append("respiratory")
+    
+    glucose = vitals.get("glucose")
+    if glucose is not None:
+        if glucose > 250:
+            findings.append("🔴 Severe hyperglycemia. Check for DKA, consider insulin therapy.")
+        elif glucose > 180:
+            findings.append("🟡 Hyperglycemia present. Monitor for complications.")
+        elif glucose < 60:
+            findings.append("🔴 Hypoglycemia detected. Immediate glucose administration needed.")
+        elif glucose < 70:
+            findings.append("🟡 Mild hypoglycemia. Monitor closely, consider glucose supplementation.")
+        else:
+            findings.append("✅ Glucose levels within normal range.")
+        if glucose < 60 or glucose > 250:
+            risk_factors.append("metabolic")
+    
+    temperature = vitals.get("temperature")
+    if temperature is not None:
+        if temperature > 39.4:
+            findings.append("🔴 High fever. Screen for sepsis, obtain cultures.")
+        elif temperature > 37.5:
+            findings.append("🟡 Fever present. Monitor trend, consider antipyretics.")
+        elif temperature < 35:
+            findings.append("🔴 Hypothermia. Active rewarming required.")
+        else:
+            findings.append("✅ Temperature within normal range.")
+        if temperature > 39.4 or temperature < 35:
+            risk_factors.append("thermal")
+    
+    resp_rate = vitals.get("resp_rate")
+    if resp_rate is not None:
+        if resp_rate > 30 or resp_rate < 8:
+            findings.append("🔴 CRITICAL respiratory rate. Consider MER call.")
+        elif resp_rate > 20:
+            findings.append("🟡 Tachypnea present. Assess work of breathing.")
+        elif resp_rate < 12:
+            findings.append("🟡 Bradypnea present. Review sedatives and opioids.")
+        else:
+            findings.append("✅ Respiratory rate within normal range.")
+        if resp_rate > 30 or resp_rate < 8:
+            risk_factors.append("ventilatory")
+    
+    risk_level = "HIGH" if len(risk_factors) >= 2 else "MODERATE" if len(risk_factors) == 1 else "LOW"
+    
+    if risk_level == "HIGH":
+        recommendations = [
+            "Continuous monitoring required",
+            "Consider ICU consultation",
+            "Frequent vital sign checks (q15min)",
+            "Prepare for potential interventions"
+        ]
+    elif risk_level == "MODERATE":
+        recommendations = [
+            "Enhanced monitoring (q30min)",
+            "Trending vital signs",
+            "Consider additional diagnostics",
+            "Notify physician of changes"
+        ]
+    else:
+        recommendations = [
+            "Continue routine monitoring",
+            "Document trends",
+            "Standard care protocols"
+        ]
+    
+    return {
+        "findings": findings,
+        "risk_level": risk_level,
+        "risk_factors": risk_factors,
+        "recommendations": recommendations
+    }
+
+# Keyword automaton over scenarios, conditions, medications and vital signs, built on first use
+_response_matcher = None
+
+def _get_response_matcher() -> KeywordMatcher:
+    global _response_matcher
+    if _response_matcher is None:
+        entries = []
+        for name, scenario in CLINICAL_SCENARIOS.items():
+            entries += [(kw, (0, "scenario", name)) for kw in scenario["keywords"]]
+        entries += [(name, (1, "condition", name)) for name in MEDICAL_KNOWLEDGE["common_conditions"]]
+        entries += [(name, (2, "medication", name)) for name in MEDICAL_KNOWLEDGE["medications"]]
+        vital_keywords = {
+            "heart_rate": ["heart rate", "pulse"],
+            "blood_pressure": ["blood pressure", "bp"],
+            "spo2": ["spo2", "oxygen", "saturation"],
+            "glucose": ["glucose", "blood sugar"],
+            "temperature": ["temperature", "fever"]
+        }
+        for vital, keywords in vital_keywords.items():
+            entries += [(kw, (3, "vital", vital)) for kw in keywords]
+        _response_matcher = KeywordMatcher(entries)
+    return _response_matcher
+
+def _format_fields(title: str, fields: dict) -> str:
+    lines = [f"**{title.upper()}**", ""]
+    lines += [f"**{key.replace('_', ' ').title()}:** {value}" for key, value in fields.items()]
+    return "\n".join(lines)
+
+def get_medical_response(message: str, vitals: dict = None) -> str:
+    """Deterministic answer from the knowledge base, no LLM involved"""
+    matches = _get_response_matcher().payloads(message)
+    best = min(matches) if matches else None
+    
+    if best is None:
+        response = None
+    elif best[1] == "scenario":
+        scenario = CLINICAL_SCENARIOS[best[2]]
+        response = "\n".join(
+            [f"**{scenario['title'].upper()}**", "", "**Assessment:**"] +
+            [f"• {item}" for item in scenario["assessment"]] +
+            ["", "**Red Flags:**"] + [f"• {item}" for item in scenario["red_flags"]] +
+            ["", "**Immediate Actions:**"] + [f"• {item}" for item in scenario["actions"]]
+        )
+    elif best[1] == "condition":
+        response = _format_fields(best[2], MEDICAL_KNOWLEDGE["common_conditions"][best[2]])
+    elif best[1] == "medication":
+        response = _format_fields(best[2], MEDICAL_KNOWLEDGE["medications"][best[2]])
+    else:
+        response = _format_fields(f"{best[2].replace('_', ' ')} ranges", MEDICAL_KNOWLEDGE["vital_signs"][best[2]])
+    
+    if response is None:
+        # Fall back to passage retrieval over the whole knowledge base
+        from knowledge_index import get_knowledge_index
+        hits = get_knowledge_index().search(message, limit=1)
+        if hits and hits[0]["confidence"] >= 0.5:
+            response = f"**{hits[0]['title'].upper()}**\n\n{hits[0]['text']}"
+        else:
+            response = ("I can answer questions about vital signs, common conditions, medications "
+                        "and emergency scenarios. Please rephrase your question with more clinical detail.")
+    
+    if vitals:
+        analysis = analyze_vitals_comprehensive(vitals)
+        response += "\n\n**CURRENT VITALS (" + analysis["risk_level"] + " RISK):**\n" + "\n".join(analysis["findings"])
+    
+    return response + "\n\nConsult your healthcare provider for personalized medical advice."
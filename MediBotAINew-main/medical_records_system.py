@@ -1,30 +1,183 @@
 """
 Centralized Medical Records System - Cloud-based report storage and retrieval
 """
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException
-from pydantic import BaseModel
-from typing import List, Optional
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Path, Request
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel, constr
+from typing import Dict, List, Literal, Optional
 from datetime import datetime
 import uuid
 import json
 import os
 import base64
-from supabase_storage import get_supabase_storage
+import io
+import tempfile
+from anyio import from_thread
+from db.database import get_records_store
+from db.record_index import RECORD_KEY_SHAPE, get_record_index
+from db.text_index import get_text_index
+from extraction.engine import extractable, get_extraction_engine
+from jobs.job_queue import get_job_queue
+from starlette.concurrency import run_in_threadpool
+from storage.backends import get_cold_storage_backend, get_storage_backend
+from storage.blob_store import SHA256_PATTERN, BlobStore, is_blob_key
+from storage.compression import IDENTITY, open_decoded
+from storage.uploads import save_upload
+from storage.streaming import content_disposition, etag_matches, guess_content_type, stream_bytes, stream_decoded_file, stream_file
+from storage.zip_stream import HashingReader, zip_chunks, zip_date_time
+from utils.pagination import clamp_limit, decode_cursor, encode_cursor, ndjson_lines, page_keys, parse_fields, project
+from utils.versioned import VersionedResponses, changes_response
 
 router = APIRouter()
 
-# Supabase Cloud Storage
-RECORDS_DATABASE = []
+# Record metadata is persisted in SQLite (db/database.py) and served from the in-memory
+# indexes in db/record_index.py; files go to Supabase or local disk
 
-# Initialize Supabase
-try:
-    storage = get_supabase_storage()
-    USE_CLOUD = True
-except Exception as e:
-    print(f"Supabase not configured, using local storage: {e}")
-    USE_CLOUD = False
-    CLOUD_STORAGE_PATH = "cloud_medical_records"
-    os.makedirs(CLOUD_STORAGE_PATH, exist_ok=True)
+# File storage: Supabase when configured, local disk otherwise (storage/backends.py)
+storage = get_storage_backend()
+
+# Content-addressed file storage: each distinct file is kept once under its SHA-256,
+# compressed, in a hot or cold tier (storage/blob_store.py)
+blob_store = None
+
+def get_blob_store() -> BlobStore:
+    global blob_store
+    if blob_store is None:
+        blob_store = BlobStore(storage, get_records_store().path, get_cold_storage_backend())
+    return blob_store
+
+async def read_record_file(record: dict) -> bytes:
+    """Original bytes of a record's file, whatever its encoding or tier"""
+    if is_blob_key(record["file_path"]):
+        return await get_blob_store().read(record["sha256"])
+    return await storage.get_bytes(record["file_path"])
+
+def _new_record(record_id, patient_id, patient_name, test_type, lab_name, test_date, notes,
+                      file_name, file_path, file_size, sha256, deduplicated) -> dict:
+    return {
+        "record_id": record_id,
+        "patient_id": patient_id or f"PAT_{uuid.uuid4().hex[:6].upper()}",
+        "patient_name": patient_name,
+        "test_type": test_type,
+        "lab_name": lab_name,
+        "test_date": test_date,
+        "upload_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "file_name": file_name,
+        "file_path": file_path,
+        "file_size": file_size,
+        "sha256": sha256,
+        "deduplicated": deduplicated,
+        "notes": notes,
+        # Filled in by the background pipeline (process_record)
+        "ai_summary": "",
+        # No direct link: the stored object is compressed (key + .gz/.zst) and tiering
+        # moves it under cold/, so clients fetch /{record_id}/file or /download instead
+        "cloud_url": "",
+        "storage_type": storage.name
+    }
+
+async def _save_record(record: dict) -> dict:
+    """
+    Persist a record whose blob reference is already taken; gives the reference back on failure.
+    Returns the queued processing job.
+    """
+    try:
+        get_records_store().insert(record)
+    except Exception:
+        await get_blob_store().release(record["sha256"])
+        raise
+    get_record_index().add(record)
+    get_text_index().add(record)
+    return get_job_queue().submit(PROCESS_RECORD, record["record_id"], {"record_id": record["record_id"]})
+
+async def store_record_file(staging_path: str, sha256: str, size: int, file_name: str, record_id: str = None,
+                            patient_id="", patient_name="", test_type="", lab_name="", test_date="", notes=""):
+    """
+    Store a staged file (identical content is kept once) and create its record.
+    Returns (record, processing job). Shared by the upload route and bulk import.
+    """
+    # Identical content is stored once; a re-upload only adds a reference
+    file_path, created = await get_blob_store().add(staging_path, sha256, size)
+    record = _new_record(record_id or f"MR_{uuid.uuid4().hex[:8].upper()}", patient_id, patient_name,
+                               test_type, lab_name, test_date, notes, file_name, file_path, size, sha256, not created)
+    job = await _save_record(record)
+    return record, job
+
+async def reference_record_file(sha256: str, file_name: str, patient_id="", patient_name="",
+                                test_type="", lab_name="", test_date="", notes=""):
+    """Create a record for content already stored; None if the content is unknown"""
+    file_path = await get_blob_store().add_reference(sha256)
+    if file_path is None:
+        return None
+    info = get_blob_store().info(sha256)
+    record = _new_record(f"MR_{uuid.uuid4().hex[:8].upper()}", patient_id, patient_name,
+                               test_type, lab_name, test_date, notes, file_name, file_path, info["size"], sha256, True)
+    job = await _save_record(record)
+    return record, job
+
+# ---------------------------
+# Background processing: extraction, summary and indexing run after the upload returns
+# ---------------------------
+PROCESS_RECORD = "process_record"
+
+async def extract_record(record: dict) -> dict:
+    """Text and lab values of the record's file, parsed in the extraction process pool"""
+    if not extractable(record["file_name"]):
+        return {"text": "", "lab_values": {}}
+    engine = get_extraction_engine()
+    sha256 = record.get("sha256")
+    cached = engine.cached(sha256) if sha256 else None
+    if cached is not None:
+        # Skip fetching (and decompressing) the file
+        return cached
+    if is_blob_key(record["file_path"]):
+        location = get_blob_store().local_file(sha256)
+        local_path = location[0] if location and location[1] == IDENTITY else None
+    else:
+        local_path = storage.local_path(record["file_path"])
+    if sha256 and local_path is not None:
+        return await engine.extract_file(local_path, sha256)
+    return await engine.extract_bytes(await read_record_file(record), sha256)
+
+async def process_record(payload: dict, set_step) -> dict:
+    """Job handler; every step is safe to repeat when a retry runs it again"""
+    record = get_record_index().get(payload["record_id"])
+    if record is None:
+        return {"skipped": "record deleted"}
+    
+    set_step("extract")
+    extraction = await extract_record(record)
+    text = extraction["text"]
+    
+    set_step("summarize")
+    summary = generate_ai_summary(record["test_type"], record["file_name"])
+    
+    set_step("index")
+    # Re-read: the metadata may have been edited (batch update) while this job ran
+    current = get_record_index().get(record["record_id"])
+    if current is None:
+        return {"skipped": "record deleted"}
+    updated = {**current, "ai_summary": summary, "text_length": len(text), "lab_values": extraction["lab_values"]}
+    get_records_store().insert(updated)
+    get_record_index().update(updated)
+    get_text_index().add(updated, text)
+    return {"text_length": len(text), "ai_summary": summary, "lab_values": len(extraction["lab_values"].get("results", []))}
+
+get_job_queue().register(PROCESS_RECORD, process_record)
+
+def _verify_failed(record: dict):
+    print(f"Integrity check failed for {record['record_id']} (blob {record['sha256']})")
+    raise HTTPException(status_code=500, detail="Stored file failed its integrity check")
+
+class RecordByHash(BaseModel):
+    sha256: constr(pattern=SHA256_PATTERN)
+    file_name: str
+    patient_id: str = ""
+    patient_name: str = ""
+    test_type: str = ""
+    lab_name: str = ""
+    test_date: str = ""
+    notes: str = ""
 
 class MedicalRecord(BaseModel):
     patient_id: str
@@ -73,144 +226,400 @@ async def upload_medical_record(
         # Generate unique record ID
         record_id = f"MR_{uuid.uuid4().hex[:8].upper()}"
         
-        # Read file content
-        file_content = await file.read()
-        file_size = len(file_content)
-        
-        # Save to Supabase cloud storage
-        file_path = f"{record_id}_{file.filename}"
-        
-        if USE_CLOUD:
-            public_url = storage.upload_file(file_content, file_path)
-        else:
-            # Fallback to local storage
-            local_path = os.path.join(CLOUD_STORAGE_PATH, file_path)
-            with open(local_path, "wb") as f:
-                f.write(file_content)
-            public_url = f"local://{local_path}"
-        
-        # Create record metadata
-        record = {
-            "record_id": record_id,
-            "patient_id": patient_id or f"PAT_{uuid.uuid4().hex[:6].upper()}",
-            "patient_name": patient_name,
-            "test_type": test_type,
-            "lab_name": lab_name,
-            "test_date": test_date,
-            "upload_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "file_name": file.filename,
-            "file_path": file_path,
-            "file_size": file_size,
-            "notes": notes,
-            "ai_summary": generate_ai_summary(test_type, file.filename),
-            "cloud_url": public_url,
-            "storage_type": "supabase" if USE_CLOUD else "local"
-        }
-        
-        # Store in database
-        RECORDS_DATABASE.append(record)
+        # Stream to a staging file, hashing and enforcing MAX_UPLOAD_MB as it arrives.
+        # Local staging sits next to the blobs so storing it is a rename.
+        fd, staging_path = tempfile.mkstemp(suffix=".upload", dir=storage.staging_dir)
+        os.close(fd)
+        try:
+            upload = await save_upload(file, staging_path)
+            # Store in database; extraction and summary happen in the background
+            record, job = await store_record_file(
+                staging_path, upload["sha256"], upload["size"], file.filename,
+                record_id=record_id, patient_id=patient_id, patient_name=patient_name,
+                test_type=test_type, lab_name=lab_name, test_date=test_date, notes=notes
+            )
+        finally:
+            if os.path.exists(staging_path):
+                os.remove(staging_path)
         
         return {
             "success": True,
             "message": "Medical record uploaded successfully",
-            "record": record
+            "record": record,
+            "job_id": job["job_id"]
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
+@router.post("/api/medical-records/upload-by-hash")
+async def upload_medical_record_by_hash(request: RecordByHash):
+    """Create a record for content the server already stores, without sending the file again"""
+    
+    stored = await reference_record_file(request.sha256.lower(), request.file_name, request.patient_id,
+                                         request.patient_name, request.test_type, request.lab_name,
+                                         request.test_date, request.notes)
+    if stored is None:
+        raise HTTPException(status_code=404, detail="Unknown content, upload the file instead")
+    record, job = stored
+    
+    return {
+        "success": True,
+        "message": "Medical record created from existing content",
+        "record": record,
+        "job_id": job["job_id"]
+    }
+
+@router.get("/api/medical-records/blobs/{sha256}")
+async def get_blob_info(sha256: str = Path(pattern=SHA256_PATTERN)):
+    """Check whether content is already stored (clients can then skip the upload)"""
+    
+    info = get_blob_store().info(sha256.lower())
+    if info is None:
+        raise HTTPException(status_code=404, detail="Content not stored")
+    return info
+
+@router.get("/api/medical-records/storage/stats")
+async def get_storage_stats():
+    """Stored vs logical bytes across all records, compression ratio, tier sizes and decode cost"""
+    return get_blob_store().stats()
+
+@router.post("/api/medical-records/storage/tiering")
+async def run_storage_tiering(cold_after_days: Optional[float] = None):
+    """Run the hot/cold tiering sweep now instead of waiting for the next interval"""
+    blobs = get_blob_store()
+    if cold_after_days is None:
+        return await blobs.retier()
+    return await blobs.retier(cold_after_days)
+
+# Serialized /list responses per record index version
+list_responses = VersionedResponses("records")
+
 @router.get("/api/medical-records/list")
-async def list_medical_records(patient_id: Optional[str] = None):
-    """List all medical records or filter by patient ID"""
+async def list_medical_records(
+    request: Request,
+    patient_id: Optional[str] = None,
+    limit: Optional[int] = None,
+    after: Optional[str] = None,
+    fields: Optional[str] = None,
+    format: Optional[str] = None
+):
+    """
+    List all medical records or filter by patient ID.
+
+    Records come in upload order. `limit` and `after` page through them with a
+    keyset cursor (`next_after` in the response), `fields=record_id,test_type`
+    returns only those fields and `format=ndjson` streams every match.
+    JSON responses carry an ETag; If-None-Match gets a 304 while nothing changed.
+    """
+    index = get_record_index()
+    version = index.version.value
+    field_list = parse_fields(fields)
+    
+    if format == "ndjson":
+        snapshot = list(index.listing_keys(patient_id))
+        records = (index.get(record_id) for _, _, record_id in snapshot)
+        return StreamingResponse(
+            ndjson_lines((r for r in records if r is not None), field_list),
+            media_type="application/x-ndjson"
+        )
+    
+    def build():
+        keys = index.listing_keys(patient_id)
+        page, next_key = page_keys(keys, clamp_limit(limit), decode_cursor(after, RECORD_KEY_SHAPE) if after else None)
+        records = [index.get(record_id) for _, _, record_id in page]
+        
+        response = {
+            "total": len(keys),
+            "records": [project(r, field_list) for r in records if r is not None]
+        }
+        if limit is not None:
+            response["next_after"] = encode_cursor(next_key) if next_key else None
+        return response, {}
+    
+    variant = json.dumps([patient_id, limit, after, field_list])
+    return list_responses.respond(request.headers, version, variant, build)
+
+@router.get("/api/medical-records/changes")
+async def get_record_changes(since: Optional[int] = None, epoch: Optional[str] = None, fields: Optional[str] = None):
+    """
+    Records inserted, updated or deleted after sequence number `since`.
+
+    Clients keep the returned `seq` and `epoch` and pass them back; the answer
+    is one entry per changed record_id. The first call (no `since`), or one the
+    change log no longer reaches back to, gets reset=true with a full snapshot.
+    """
+    index = get_record_index()
+    field_list = parse_fields(fields)
+    # Holding the index lock keeps the snapshot and the seq in step
+    with index.lock:
+        return changes_response(index.version, since, epoch,
+                                lambda: [index.get(record_id) for _, _, record_id in index.listing_keys(None)],
+                                field_list)
+
+DEFAULT_SEARCH_LIMIT = 50
+
+# Declared before /{record_id} so "search" is not captured as a record ID
+@router.get("/api/medical-records/search")
+async def search_medical_records(
+    test_type: Optional[str] = None,
+    lab_name: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    q: Optional[str] = None,
+    limit: Optional[int] = None
+):
+    """
+    Search medical records by various criteria.
+    
+    q is a full-text query over metadata, notes and extracted report text
+    (words, prefix*, "exact phrase"); matches come back ranked, with a score.
+    """
     
-    if patient_id:
-        filtered_records = [r for r in RECORDS_DATABASE if r["patient_id"] == patient_id]
+    if not q:
+        results = get_record_index().search(test_type, lab_name, date_from, date_to)
         return {
-            "total": len(filtered_records),
-            "records": filtered_records
+            "total": len(results),
+            "records": results
         }
     
+    allowed = None
+    if test_type or lab_name or date_from or date_to:
+        allowed = [record["record_id"] for record in get_record_index().search(test_type, lab_name, date_from, date_to)]
+    total, hits = get_text_index().search(q, clamp_limit(limit) or DEFAULT_SEARCH_LIMIT, allowed)
+    
+    index = get_record_index()
     return {
-        "total": len(RECORDS_DATABASE),
-        "records": RECORDS_DATABASE
+        "total": total,
+        "records": [{**index.get(record_id), "score": score} for record_id, score in hits]
     }
 
 @router.get("/api/medical-records/{record_id}")
 async def get_medical_record(record_id: str):
     """Get specific medical record details"""
     
-    for record in RECORDS_DATABASE:
-        if record["record_id"] == record_id:
-            return record
+    record = get_record_index().get(record_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Record not found")
     
-    raise HTTPException(status_code=404, detail="Record not found")
+    return record
+
+@router.get("/api/medical-records/{record_id}/status")
+async def get_processing_status(record_id: str):
+    """Background processing state of a record (queued, running, done or failed)"""
+
+    if get_record_index().get(record_id) is None:
+        raise HTTPException(status_code=404, detail="Record not found")
+
+    job = get_job_queue().latest(record_id)
+    if job is None:
+        # Uploaded before background processing existed; processed inline back then
+        return {"record_id": record_id, "status": "done", "job_id": None}
+
+    return {
+        "record_id": record_id,
+        "job_id": job["job_id"],
+        "status": job["status"],
+        "step": job["step"],
+        "attempts": job["attempts"],
+        "max_attempts": job["max_attempts"],
+        "last_error": job["last_error"],
+        "result": job["result"],
+        "updated_at": datetime.fromtimestamp(job["updated_at"]).strftime("%Y-%m-%d %H:%M:%S")
+    }
 
 @router.get("/api/medical-records/{record_id}/download")
 async def download_medical_record(record_id: str):
-    """Download medical record file"""
-    
-    for record in RECORDS_DATABASE:
-        if record["record_id"] == record_id:
-            file_path = record["file_path"]
-            
-            try:
-                if USE_CLOUD:
-                    file_content = storage.download_file(file_path)
-                else:
-                    local_path = os.path.join(CLOUD_STORAGE_PATH, file_path)
-                    with open(local_path, "rb") as f:
-                        file_content = f.read()
-                
-                # Return base64 encoded file
-                return {
-                    "record_id": record_id,
-                    "file_name": record["file_name"],
-                    "file_content": base64.b64encode(file_content).decode('utf-8'),
-                    "content_type": "application/pdf"
-                }
-            except Exception as e:
-                raise HTTPException(status_code=404, detail=f"File not found: {str(e)}")
-    
-    raise HTTPException(status_code=404, detail="Record not found")
+    """Download medical record file as base64 JSON (prefer /file, which streams)"""
+    
+    record = get_record_index().get(record_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Record not found")
+    
+    file_path = record["file_path"]
+    
+    try:
+        file_content = await read_record_file(record)
+    except Exception as e:
+        raise HTTPException(status_code=404, detail=f"File not found: {str(e)}")
+    
+    if is_blob_key(file_path) and not BlobStore.verify_bytes(file_content, record["sha256"]):
+        _verify_failed(record)
+    
+    # Return base64 encoded file
+    return {
+        "record_id": record_id,
+        "file_name": record["file_name"],
+        "file_content": base64.b64encode(file_content).decode('utf-8'),
+        "content_type": guess_content_type(record["file_name"])
+    }
+
+@router.get("/api/medical-records/{record_id}/file")
+async def stream_medical_record(record_id: str, request: Request):
+    """Stream the record's file with Range, ETag / If-None-Match and its real content type"""
+    
+    record = get_record_index().get(record_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Record not found")
+    
+    content_addressed = is_blob_key(record["file_path"])
+    if content_addressed:
+        # The content hash is the strongest validator there is
+        etag = f'"{record["sha256"]}"'
+    else:
+        # Stored files never change under a record, so the ID and size identify the version
+        etag = f'"{record_id}-{record["file_size"]:x}"'
+    
+    if content_addressed:
+        location = get_blob_store().local_file(record["sha256"])
+        local_path, encoding = location if location else (None, IDENTITY)
+    else:
+        local_path, encoding = storage.local_path(record["file_path"]), IDENTITY
+    if local_path is None:
+        # Remote backend: the object has to be fetched, unless the client's copy is current
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        try:
+            file_content = await read_record_file(record)
+        except Exception as e:
+            raise HTTPException(status_code=404, detail=f"File not found: {str(e)}")
+        if content_addressed and not BlobStore.verify_bytes(file_content, record["sha256"]):
+            _verify_failed(record)
+        return stream_bytes(file_content, record["file_name"], request.headers, etag)
+    
+    if content_addressed and os.path.exists(local_path):
+        # Hashed once per on-disk version, later reads hit the verification cache
+        if not await run_in_threadpool(get_blob_store().verify_file, local_path, record["sha256"], encoding):
+            _verify_failed(record)
+    if encoding != IDENTITY:
+        # Compressed at rest: decoded chunk by chunk as it is sent
+        return stream_decoded_file(local_path, encoding, record["file_size"], record["file_name"],
+                                   request.headers, etag)
+    return stream_file(local_path, record["file_name"], request.headers, etag if content_addressed else None)
 
 @router.delete("/api/medical-records/{record_id}")
 async def delete_medical_record(record_id: str):
     """Delete medical record from cloud storage"""
     
-    global RECORDS_DATABASE
-    
-    for i, record in enumerate(RECORDS_DATABASE):
-        if record["record_id"] == record_id:
-            # Delete file from storage
-            file_path = record["file_path"]
-            
-            try:
-                if USE_CLOUD:
-                    storage.delete_file(file_path)
-                else:
-                    local_path = os.path.join(CLOUD_STORAGE_PATH, file_path)
-                    if os.path.exists(local_path):
-                        os.remove(local_path)
-            except Exception as e:
-                print(f"Error deleting file: {e}")
-            
-            # Remove from database
-            RECORDS_DATABASE.pop(i)
-            
-            return {
-                "success": True,
-                "message": "Medical record deleted successfully"
-            }
-    
-    raise HTTPException(status_code=404, detail="Record not found")
+    record = get_records_store().delete(record_id)
+    get_record_index().remove(record_id)
+    get_text_index().remove(record_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Record not found")
+    
+    # Delete file from storage; shared content goes only with its last record
+    await _release_files([record])
+    
+    return {
+        "success": True,
+        "message": "Medical record deleted successfully"
+    }
+
+# ---------------------------
+# Batch operations
+# ---------------------------
+MAX_BATCH_OPERATIONS = 1000
+
+# Metadata a batch update may change; file, hash and pipeline fields are not editable
+UPDATABLE_FIELDS = ("patient_id", "patient_name", "test_type", "lab_name", "test_date", "notes")
+
+class BatchOperation(BaseModel):
+    op: Literal["fetch", "update", "delete"]
+    record_id: str
+    changes: Dict[str, str] = {}
+
+class BatchRequest(BaseModel):
+    operations: List[BatchOperation]
+    # Sparse fieldset for returned records, as in /list
+    fields: Optional[str] = None
+
+async def _release_files(records: list):
+    """Give back deleted records' files: blob references in one batch, other paths in one bulk delete"""
+    await get_blob_store().release_many([record["sha256"] for record in records if is_blob_key(record["file_path"])])
+    paths = [record["file_path"] for record in records if not is_blob_key(record["file_path"])]
+    if paths:
+        try:
+            await storage.delete_many(paths)
+        except Exception as e:
+            print(f"Error deleting files: {e}")
+
+def _record_text(record: dict) -> str:
+    """Extracted report text for re-indexing a record whose metadata changed"""
+    extraction = get_extraction_engine().cached(record["sha256"]) if record.get("text_length") else None
+    return extraction["text"] if extraction else ""
+
+def _batch_error(operation: BatchOperation, status: int, error: str) -> dict:
+    return {"op": operation.op, "record_id": operation.record_id, "status": status, "error": error}
+
+@router.post("/api/medical-records/batch")
+async def batch_medical_records(request: BatchRequest):
+    """
+    Fetch, update and delete many records in one request. Operations on the same
+    record apply in request order; all writes commit in one transaction. Results
+    come back in request order with an HTTP-style status per item.
+    """
+    
+    if len(request.operations) > MAX_BATCH_OPERATIONS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_OPERATIONS} operations per batch")
+    fields = parse_fields(request.fields)
+    index = get_record_index()
+    
+    # Records this batch changed: record_id -> new version, or None once deleted.
+    # Nothing awaits until the writes below, so no other request interleaves.
+    staged, deleted, results = {}, {}, []
+    for operation in request.operations:
+        record_id = operation.record_id
+        current = staged[record_id] if record_id in staged else index.get(record_id)
+        if current is None:
+            results.append(_batch_error(operation, 404, "Record not found"))
+            continue
+        
+        if operation.op == "update":
+            unknown = sorted(set(operation.changes) - set(UPDATABLE_FIELDS))
+            if unknown:
+                results.append(_batch_error(operation, 422, f"Fields can't be updated: {', '.join(unknown)}"))
+                continue
+            if operation.changes.get("patient_id", current["patient_id"]) == "":
+                results.append(_batch_error(operation, 422, "patient_id can't be empty"))
+                continue
+            current = staged[record_id] = {**current, **operation.changes}
+        elif operation.op == "delete":
+            staged[record_id] = None
+            deleted[record_id] = current
+            results.append({"op": operation.op, "record_id": record_id, "status": 200})
+            continue
+        results.append({"op": operation.op, "record_id": record_id, "status": 200, "record": project(current, fields)})
+    
+    upserts = [record for record in staged.values() if record is not None]
+    get_records_store().write_batch(upserts, list(deleted))
+    text_index = get_text_index()
+    for record in upserts:
+        index.update(record)
+        text_index.add(record, _record_text(record))
+    for record_id in deleted:
+        index.remove(record_id)
+        text_index.remove(record_id)
+    await _release_files(list(deleted.values()))
+    
+    failed = sum(1 for result in results if result["status"] != 200)
+    return {
+        "results": results,
+        "succeeded": len(results) - failed,
+        "failed": failed,
+        "updated": len(upserts),
+        "deleted": len(deleted)
+    }
 
 @router.get("/api/medical-records/patient/{patient_id}/history")
 async def get_patient_history(patient_id: str):
     """Get complete medical history for a patient"""
     
-    patient_records = [r for r in RECORDS_DATABASE if r["patient_id"] == patient_id]
+    # Newest first, already ordered by the per-patient index
+    sorted_records = get_record_index().patient_history(patient_id)
     
-    if not patient_records:
+    if not sorted_records:
         return {
             "patient_id": patient_id,
             "total_records": 0,
@@ -218,9 +627,6 @@ async def get_patient_history(patient_id: str):
             "timeline": []
         }
     
-    # Sort by test date
-    sorted_records = sorted(patient_records, key=lambda x: x["test_date"], reverse=True)
-    
     # Create timeline
     timeline = []
     for record in sorted_records:
@@ -233,39 +639,79 @@ async def get_patient_history(patient_id: str):
     
     return {
         "patient_id": patient_id,
-        "patient_name": patient_records[0]["patient_name"],
-        "total_records": len(patient_records),
+        "patient_name": sorted_records[0]["patient_name"],
+        "total_records": len(sorted_records),
         "records": sorted_records,
         "timeline": timeline
     }
 
-@router.get("/api/medical-records/search")
-async def search_medical_records(
-    test_type: Optional[str] = None,
-    lab_name: Optional[str] = None,
-    date_from: Optional[str] = None,
-    date_to: Optional[str] = None
-):
-    """Search medical records by various criteria"""
-    
-    results = RECORDS_DATABASE.copy()
-    
-    if test_type:
-        results = [r for r in results if test_type.lower() in r["test_type"].lower()]
-    
-    if lab_name:
-        results = [r for r in results if lab_name.lower() in r["lab_name"].lower()]
-    
-    if date_from:
-        results = [r for r in results if r["test_date"] >= date_from]
+# ---------------------------
+# Patient export
+# ---------------------------
+# Record fields copied into the export manifest (storage internals are left out)
+MANIFEST_FIELDS = ("record_id", "patient_id", "patient_name", "test_type", "lab_name", "test_date",
+                   "upload_date", "file_name", "file_size", "sha256", "notes", "ai_summary", "lab_values")
+
+def _open_record_file(record: dict):
+    """Readable file of a record's original bytes; runs in the response's worker thread"""
+    if is_blob_key(record["file_path"]):
+        location = get_blob_store().local_file(record["sha256"])
+        if location is not None:
+            return open_decoded(*location)
+    else:
+        local_path = storage.local_path(record["file_path"])
+        if local_path is not None:
+            return open(local_path, "rb")
+    # Remote storage: fetch this one file on the event loop
+    return io.BytesIO(from_thread.run(read_record_file, record))
+
+def _archive_name(record: dict) -> str:
+    file_name = os.path.basename(record["file_name"].replace("\\", "/")) or "file"
+    return f"records/{record['test_date'] or 'undated'}_{record['record_id']}_{file_name}"
+
+def _export_entries(records: list, manifest: dict):
+    """ZIP entries for each record's file, then manifest.json describing what was included"""
+    for record in records:
+        item = {field: record.get(field) for field in MANIFEST_FIELDS if field in record}
+        try:
+            source = HashingReader(_open_record_file(record))
+        except Exception as e:
+            item.update(archive_path=None, error=f"File not found: {e}")
+            manifest["records"].append(item)
+            continue
+        item["archive_path"] = _archive_name(record)
+        yield item["archive_path"], record["file_size"], zip_date_time(record["test_date"]), lambda: source
+        # The member has been written by now, so its digest is complete
+        if record.get("sha256"):
+            item["verified"] = source.hexdigest() == record["sha256"]
+        manifest["records"].append(item)
+
+    manifest["files"] = sum(1 for item in manifest["records"] if item["archive_path"])
+    content = json.dumps(manifest, indent=2).encode("utf-8")
+    yield "manifest.json", len(content), zip_date_time(manifest["exported_at"]), lambda: io.BytesIO(content)
+
+@router.get("/api/medical-records/patient/{patient_id}/export.zip")
+async def export_patient_records(patient_id: str):
+    """Every file in a patient's history plus a JSON manifest, zipped while it streams"""
     
-    if date_to:
-        results = [r for r in results if r["test_date"] <= date_to]
+    records = get_record_index().patient_history(patient_id)
+    if not records:
+        raise HTTPException(status_code=404, detail="No records for this patient")
     
-    return {
-        "total": len(results),
-        "records": results
+    manifest = {
+        "patient_id": patient_id,
+        "patient_name": records[0]["patient_name"],
+        "exported_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "total_records": len(records),
+        "records": []
     }
+    # No temp file and no buffering: members are read from storage as the client receives them
+    download_name = "".join(c if c.isalnum() or c in "-_" else "_" for c in patient_id)
+    return StreamingResponse(
+        zip_chunks(_export_entries(records, manifest)),
+        media_type="application/zip",
+        headers={"Content-Disposition": content_disposition("attachment", f"{download_name}_records.zip")}
+    )
 
 def generate_ai_summary(test_type: str, file_name: str) -> str:
     """Generate AI summary for medical report"""
@@ -289,5 +735,9 @@ def generate_ai_summary(test_type: str, file_name: str) -> str:
     return "Medical diagnostic report. Review with healthcare provider for detailed interpretation."
 
 def setup_medical_records_system(app):
-    """Setup medical records system routes"""
+    """Setup medical records system routes and the background processing workers"""
     app.include_router(router)
+    app.on_event("startup")(get_job_queue().start)
+    app.on_event("shutdown")(get_job_queue().stop)
+    app.on_event("startup")(get_blob_store().start_tiering)
+    app.on_event("shutdown")(get_blob_store().stop_tiering)
@@ -0,0 +1,130 @@
+# models/conversation_memory.py
+"""
+Per-session chat memory with a fixed token budget.
+
+Recent turns are kept verbatim; turns that fall out of the window are folded
+into a rolling summary that is updated incrementally (never rebuilt from the
+full transcript). Sessions live in an LRU and expire when idle, so both the
+prompt size and the memory footprint stay flat.
+"""
+import re
+import threading
+import time
+from collections import OrderedDict
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for English text)"""
+    return max(1, len(text) // 4)
+
+def _gist(text: str, max_words: int = 24) -> str:
+    """First sentence of a turn, capped, with markdown noise removed"""
+    text = re.sub(r"[*#`>]+", "", text).strip()
+    first = re.split(r"(?<=[.!?])\s|\n", text, maxsplit=1)[0]
+    words = first.split()
+    if len(words) > max_words:
+        return " ".join(words[:max_words]) + "..."
+    return " ".join(words)
+
+class ConversationMemory:
+    def __init__(self, token_budget=800, summary_budget=200, max_recent_turns=6,
+                 max_sessions=1000, idle_ttl=3600):
+        self.token_budget = token_budget
+        self.summary_budget = summary_budget
+        self.max_recent_turns = max_recent_turns
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+
+        # session_id -> session, least recently used first
+        self.sessions = OrderedDict()
+        self.lock = threading.Lock()
+
+    # -------------------------
+    # Session bookkeeping
+    # -------------------------
+    def _session(self, session_id: str) -> dict:
+        now = time.time()
+        self._evict_idle(now)
+
+        session = self.sessions.get(session_id)
+        if session is None:
+            session = {"turns": [], "turn_tokens": 0, "summary": [], "summary_tokens": 0}
+            self.sessions[session_id] = session
+            while len(self.sessions) > self.max_sessions:
+                self.sessions.popitem(last=False)
+        else:
+            self.sessions.move_to_end(session_id)
+
+        session["last_active"] = now
+        return session
+
+    def _evict_idle(self, now: float):
+        # Oldest sessions are at the front, stop at the first active one
+        while self.sessions:
+            session_id, session = next(iter(self.sessions.items()))
+            if now - session["last_active"] < self.idle_ttl:
+                break
+            self.sessions.popitem(last=False)
+
+    # -------------------------
+    # Turns and summary
+    # -------------------------
+    def add_turn(self, session_id: str, role: str, text: str):
+        # A single huge reply may not take more than half the window
+        max_turn_tokens = (self.token_budget - self.summary_budget) // 2
+        if estimate_tokens(text) > max_turn_tokens:
+            text = text[:max_turn_tokens * 4] + "..."
+
+        with self.lock:
+            session = self._session(session_id)
+            tokens = estimate_tokens(text)
+            session["turns"].append((role, text, tokens))
+            session["turn_tokens"] += tokens
+            self._compact(session)
+
+    def _compact(self, session: dict):
+        window = self.token_budget - self.summary_budget
+        turns = session["turns"]
+
+        while len(turns) > 1 and (len(turns) > self.max_recent_turns or session["turn_tokens"] > window):
+            role, text, tokens = turns.pop(0)
+            session["turn_tokens"] -= tokens
+            self._fold(session, role, text)
+
+    def _fold(self, session: dict, role: str, text: str):
+        speaker = "User asked" if role == "user" else "Assistant said"
+        line = f"{speaker}: {_gist(text)}"
+        session["summary"].append((line, estimate_tokens(line)))
+        session["summary_tokens"] += session["summary"][-1][1]
+
+        # Forget the oldest summary lines once the summary is over budget
+        while session["summary_tokens"] > self.summary_budget and len(session["summary"]) > 1:
+            _, tokens = session["summary"].pop(0)
+            session["summary_tokens"] -= tokens
+
+    def build_context(self, session_id: str) -> str:
+        """Summary plus recent turns, always within the token budget"""
+        with self.lock:
+            session = self.sessions.get(session_id)
+            if session is None:
+                return ""
+            summary = [line for line, _ in session["summary"]]
+            turns = list(session["turns"])
+
+        parts = []
+        if summary:
+            parts.append("Earlier in this conversation:\n" + "\n".join(f"- {line}" for line in summary))
+        if turns:
+            labels = {"user": "User", "assistant": "Assistant"}
+            parts.append("Recent conversation:\n" + "\n".join(f"{labels.get(role, role)}: {text}" for role, text, _ in turns))
+        return "\n\n".join(parts)
+
+    def context_tokens(self, session_id: str) -> int:
+        with self.lock:
+            session = self.sessions.get(session_id)
+            if session is None:
+                return 0
+            return session["summary_tokens"] + session["turn_tokens"]
+
+    def clear(self, session_id: str):
+        with self.lock:
+            self.sessions.pop(session_id, None)
@@ -0,0 +1,343 @@
+"""
+Bulk Import - load a directory or a batch of report files into the medical records system
+
+Command line (with the API server stopped - records go straight into the store):
+    python records_import.py <directory> [--patient-id ID] [--concurrency N] [--batch-id ID] [--no-process]
+HTTP:
+    POST /api/medical-records/bulk-upload          many files in one multipart request
+    GET  /api/medical-records/imports/{batch_id}   progress of a batch
+
+Metadata comes from file names the way reports_agent does it (test type from
+words in the name, plus a YYYY-MM-DD or YYYYMMDD date when present); a
+patient folder (<directory>/<patient_id>/<file>) supplies the patient ID.
+Each file's outcome is logged per batch in SQLite, so running an interrupted
+import again skips everything it already stored.
+"""
+import argparse
+import asyncio
+import hashlib
+import os
+import re
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import List
+
+from dotenv import load_dotenv
+from fastapi import APIRouter, File, Form, HTTPException, UploadFile
+from starlette.concurrency import run_in_threadpool
+
+from db.database import get_records_store
+from extraction.engine import get_extraction_engine
+from jobs.job_queue import get_job_queue
+from medical_records_system import reference_record_file, storage, store_record_file
+from reports_agent import report_type_from_filename
+from storage.blob_store import sha256_of_file
+from storage.uploads import save_upload
+
+load_dotenv()
+
+router = APIRouter()
+
+IMPORT_CONCURRENCY = int(os.getenv("IMPORT_CONCURRENCY", "8"))
+
+# Seconds between progress lines on the command line
+PROGRESS_INTERVAL = 1.0
+
+DATE_RE = re.compile(r"(?<!\d)(20\d{2}|19\d{2})-?(0[1-9]|1[0-2])-?(0[1-9]|[12]\d|3[01])(?!\d)")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS import_items (
+    batch_id TEXT NOT NULL,
+    source TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    sha256 TEXT NOT NULL DEFAULT '',
+    status TEXT NOT NULL,
+    record_id TEXT NOT NULL DEFAULT '',
+    error TEXT NOT NULL DEFAULT '',
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (batch_id, source)
+);
+"""
+
+# ---------------------------
+# Import log (resume state)
+# ---------------------------
+class ImportLog:
+    """Outcome per (batch, source file); fingerprint says whether the file changed since"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._local = threading.local()
+        conn = self._conn()
+        conn.executescript(SCHEMA)
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def previous(self, batch_id: str, source: str):
+        """(fingerprint, sha256, record_id) of the file's earlier successful import, or None"""
+        return self._conn().execute(
+            "SELECT fingerprint, sha256, record_id FROM import_items WHERE batch_id = ? AND source = ? AND status = 'imported'",
+            (batch_id, source)
+        ).fetchone()
+
+    def mark(self, batch_id: str, source: str, fingerprint: str, status: str, sha256: str = "",
+             record_id: str = "", error: str = ""):
+        with self._conn() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO import_items (batch_id, source, fingerprint, sha256, status, record_id, error, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (batch_id, source, fingerprint, sha256, status, record_id, error, time.time())
+            )
+
+    def summary(self, batch_id: str):
+        rows = self._conn().execute(
+            "SELECT status, COUNT(*), MAX(updated_at) FROM import_items WHERE batch_id = ? GROUP BY status", (batch_id,)
+        ).fetchall()
+        if not rows:
+            return None
+        failures = self._conn().execute(
+            "SELECT source, error FROM import_items WHERE batch_id = ? AND status = 'failed' ORDER BY source LIMIT 100",
+            (batch_id,)
+        ).fetchall()
+        return {
+            "batch_id": batch_id,
+            "counts": {status: count for status, count, _ in rows},
+            "updated_at": datetime.fromtimestamp(max(updated for _, _, updated in rows)).strftime("%Y-%m-%d %H:%M:%S"),
+            "failures": [{"source": source, "error": error} for source, error in failures]
+        }
+
+# Global instance
+import_log = None
+
+def get_import_log() -> ImportLog:
+    global import_log
+    if import_log is None:
+        import_log = ImportLog(get_records_store().path)
+    return import_log
+
+# ---------------------------
+# Metadata and storage
+# ---------------------------
+def infer_metadata(source: str, patient_id: str = "", modified: float = None) -> dict:
+    """Record fields from a file's path relative to the import root"""
+    file_name = os.path.basename(source)
+    folders = os.path.dirname(source).split(os.sep) if os.path.dirname(source) else []
+    date = DATE_RE.search(file_name)
+    if date:
+        test_date = "-".join(date.groups())
+    elif modified is not None:
+        test_date = datetime.fromtimestamp(modified).strftime("%Y-%m-%d")
+    else:
+        test_date = datetime.now().strftime("%Y-%m-%d")
+    return {
+        "patient_id": patient_id or (folders[0] if folders else ""),
+        "test_type": report_type_from_filename(file_name),
+        "test_date": test_date,
+    }
+
+async def import_file(path: str, file_name: str, fields: dict, sha256: str = None, size: int = None):
+    """Store one file (left in place) as a record; returns (record, job)"""
+    if sha256 is None:
+        sha256 = await run_in_threadpool(sha256_of_file, path)
+        size = os.path.getsize(path)
+    # Content the store already has only needs a reference, not a copy
+    stored = await reference_record_file(sha256, file_name, **fields)
+    if stored is not None:
+        return stored
+    fd, staging_path = tempfile.mkstemp(suffix=".import", dir=storage.staging_dir)
+    os.close(fd)
+    try:
+        await run_in_threadpool(shutil.copyfile, path, staging_path)
+        return await store_record_file(staging_path, sha256, size, file_name, **fields)
+    finally:
+        if os.path.exists(staging_path):
+            os.remove(staging_path)
+
+class Progress:
+    def __init__(self, total: int, report=print):
+        self.total = total
+        self.imported = self.skipped = self.failed = self.deduplicated = 0
+        self.started = time.perf_counter()
+        self.finished = None
+        self._report = report
+        self._last_report = 0.0
+
+    @property
+    def done(self) -> int:
+        return self.imported + self.skipped + self.failed
+
+    def rate(self) -> float:
+        elapsed = (self.finished or time.perf_counter()) - self.started
+        return self.imported / elapsed if elapsed else 0.0
+
+    def line(self) -> str:
+        width = len(str(self.total))
+        return (f"[{self.done:>{width}}/{self.total}] {self.rate():7.1f} files/s  imported {self.imported}"
+                f" (deduplicated {self.deduplicated})  skipped {self.skipped}  failed {self.failed}")
+
+    def tick(self):
+        now = time.perf_counter()
+        if self._report and (now - self._last_report >= PROGRESS_INTERVAL or self.done == self.total):
+            self._last_report = now
+            self._report(self.line())
+
+def list_files(directory: str) -> list:
+    """Regular files under directory, skipping hidden files and folders, in a stable order"""
+    files = []
+    for root, folders, names in os.walk(directory):
+        folders[:] = sorted(folder for folder in folders if not folder.startswith("."))
+        files.extend(os.path.join(root, name) for name in sorted(names) if not name.startswith("."))
+    return files
+
+async def import_directory(directory: str, batch_id: str = None, patient_id: str = "",
+                           concurrency: int = IMPORT_CONCURRENCY, report=print) -> Progress:
+    """Import every file under directory with at most `concurrency` files in flight"""
+    directory = os.path.abspath(directory)
+    batch_id = batch_id or "DIR_" + hashlib.sha1(directory.encode("utf-8")).hexdigest()[:12].upper()
+    files = list_files(directory)
+    progress = Progress(len(files), report)
+    log = get_import_log()
+    pending = iter(files)
+
+    async def worker():
+        for path in pending:
+            source = os.path.relpath(path, directory)
+            stat = os.stat(path)
+            # Size and mtime unchanged: skip without reading the file
+            fingerprint = f"{stat.st_size}:{stat.st_mtime_ns}"
+            previous = log.previous(batch_id, source)
+            if previous and previous[0] == fingerprint:
+                progress.skipped += 1
+                progress.tick()
+                continue
+            try:
+                sha256 = await run_in_threadpool(sha256_of_file, path)
+                if previous and previous[1] == sha256:
+                    # Touched but not changed
+                    log.mark(batch_id, source, fingerprint, "imported", sha256, previous[2])
+                    progress.skipped += 1
+                else:
+                    fields = infer_metadata(source, patient_id, stat.st_mtime)
+                    record, _ = await import_file(path, os.path.basename(path), fields, sha256, stat.st_size)
+                    log.mark(batch_id, source, fingerprint, "imported", sha256, record["record_id"])
+                    progress.imported += 1
+                    progress.deduplicated += record["deduplicated"]
+            except Exception as e:
+                log.mark(batch_id, source, fingerprint, "failed", error=str(e))
+                progress.failed += 1
+            progress.tick()
+
+    if report:
+        report(f"Importing {len(files)} files from {directory} (batch {batch_id}, concurrency {concurrency})")
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    progress.finished = time.perf_counter()
+    return progress
+
+# ---------------------------
+# HTTP
+# ---------------------------
+@router.post("/api/medical-records/bulk-upload")
+async def bulk_upload_medical_records(
+    files: List[UploadFile] = File(...),
+    patient_id: str = Form(""),
+    batch_id: str = Form("")
+):
+    """
+    Upload many reports at once. Send the same batch_id again to resume a
+    batch: files already imported in it (same name and content) are skipped.
+    """
+    batch_id = batch_id or f"IMP_{uuid.uuid4().hex[:10].upper()}"
+    log = get_import_log()
+    semaphore = asyncio.Semaphore(IMPORT_CONCURRENCY)
+
+    async def one(upload: UploadFile) -> dict:
+        async with semaphore:
+            fd, staging_path = tempfile.mkstemp(suffix=".upload", dir=storage.staging_dir)
+            os.close(fd)
+            try:
+                received = await save_upload(upload, staging_path)
+                previous = log.previous(batch_id, upload.filename)
+                if previous and previous[1] == received["sha256"]:
+                    return {"file_name": upload.filename, "status": "skipped", "record_id": previous[2]}
+                fields = infer_metadata(upload.filename, patient_id)
+                record, job = await store_record_file(staging_path, received["sha256"], received["size"],
+                                                      upload.filename, **fields)
+                log.mark(batch_id, upload.filename, received["sha256"], "imported", received["sha256"],
+                         record["record_id"])
+                return {"file_name": upload.filename, "status": "imported", "record_id": record["record_id"],
+                        "deduplicated": record["deduplicated"], "job_id": job["job_id"]}
+            except Exception as e:
+                error = e.detail if isinstance(e, HTTPException) else str(e)
+                log.mark(batch_id, upload.filename, "", "failed", error=error)
+                return {"file_name": upload.filename, "status": "failed", "error": error}
+            finally:
+                if os.path.exists(staging_path):
+                    os.remove(staging_path)
+
+    results = await asyncio.gather(*(one(upload) for upload in files))
+    counts = {status: sum(result["status"] == status for result in results) for status in ("imported", "skipped", "failed")}
+    return {"batch_id": batch_id, "total": len(results), **counts, "results": results}
+
+@router.get("/api/medical-records/imports/{batch_id}")
+async def get_import_progress(batch_id: str):
+    """Per-status file counts for a bulk import (command line or HTTP)"""
+    summary = get_import_log().summary(batch_id)
+    if summary is None:
+        raise HTTPException(status_code=404, detail="Import batch not found")
+    return summary
+
+def setup_records_import(app):
+    """Setup bulk import routes"""
+    app.include_router(router)
+
+# ---------------------------
+# Command line
+# ---------------------------
+async def run_import(args) -> Progress:
+    queue = get_job_queue()
+    if args.process:
+        await queue.start()
+    try:
+        progress = await import_directory(args.directory, args.batch_id, args.patient_id, args.concurrency)
+        if args.process:
+            # Extraction and indexing run here too, so the records are complete when this returns
+            while True:
+                counts = queue.counts()
+                waiting = counts.get("queued", 0) + counts.get("running", 0)
+                if not waiting:
+                    break
+                print(f"Processing: {waiting} jobs left")
+                await asyncio.sleep(PROGRESS_INTERVAL)
+    finally:
+        await queue.stop()
+        get_extraction_engine().close()
+    return progress
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk import report files into the medical records system")
+    parser.add_argument("directory")
+    parser.add_argument("--patient-id", default="", help="patient for every file (default: first folder name)")
+    parser.add_argument("--batch-id", default=None, help="resume key (default: derived from the directory)")
+    parser.add_argument("--concurrency", type=int, default=IMPORT_CONCURRENCY)
+    parser.add_argument("--no-process", dest="process", action="store_false",
+                        help="leave extraction jobs queued for the server instead of running them now")
+    args = parser.parse_args()
+    if not os.path.isdir(args.directory):
+        sys.exit(f"Not a directory: {args.directory}")
+    result = asyncio.run(run_import(args))
+    print(result.line())
+    sys.exit(1 if result.failed else 0)
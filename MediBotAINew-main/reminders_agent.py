@@ -1,7 +1,7 @@
 """
 Reminders Agent Backend - Smart Health & Medication Reminders with AI
 """
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel
 from typing import List, Dict, Any, Optional
 import json
@@ -9,12 +9,17 @@ import uuid
 from datetime import datetime, timedelta
 import random
 # from gemini_client import get_reminder_suggestions, get_condition_reminders
+from utils.versioned import ChangeLog, VersionedResponses, changes_response
 
 router = APIRouter()
 
 # Mock reminders database - starts empty for clean demo
 MOCK_REMINDERS = []
 
+# Every change to MOCK_REMINDERS; GET /api/reminders is cached per version
+REMINDER_CHANGES = ChangeLog()
+reminder_responses = VersionedResponses("reminders")
+
 class ReminderCreate(BaseModel):
     type: str
     title: str
@@ -36,14 +41,26 @@ class AIBulkCreateRequest(BaseModel):
     medical_condition: str
 
 @router.get("/api/reminders")
-async def get_reminders():
-    """Get all reminders"""
-    # Sort by priority and next due time
-    sorted_reminders = sorted(MOCK_REMINDERS, key=lambda x: (
-        {"high": 0, "medium": 1, "low": 2}[x["priority"]],
-        x["next_due"]
-    ))
-    return sorted_reminders
+async def get_reminders(request: Request):
+    """Get all reminders (ETag / If-None-Match: 304 while nothing changed)"""
+    def build():
+        # Sort by priority and next due time
+        sorted_reminders = sorted(MOCK_REMINDERS, key=lambda x: (
+            {"high": 0, "medium": 1, "low": 2}[x["priority"]],
+            x["next_due"]
+        ))
+        return sorted_reminders, {}
+    
+    return reminder_responses.respond(request.headers, REMINDER_CHANGES.value, "", build)
+
+@router.get("/api/reminders/changes")
+async def get_reminder_changes(since: Optional[int] = None, epoch: Optional[str] = None):
+    """
+    Reminders created, updated or deleted after sequence number `since`.
+    Leave `since` out on the first call, then pass back the returned `seq` and
+    `epoch`; reset=true means the client must replace its copy with `snapshot`.
+    """
+    return changes_response(REMINDER_CHANGES, since, epoch, lambda: MOCK_REMINDERS)
 
 @router.post("/api/reminders")
 async def create_reminder(reminder: ReminderCreate):
@@ -82,6 +99,7 @@ async def create_reminder(reminder: ReminderCreate):
         }
         
         MOCK_REMINDERS.insert(0, new_reminder)
+        REMINDER_CHANGES.record("insert", reminder_id, new_reminder)
         
         return new_reminder
     except Exception as e:
@@ -91,7 +109,10 @@ async def create_reminder(reminder: ReminderCreate):
 async def delete_reminder(reminder_id: str):
     """Delete reminder"""
     global MOCK_REMINDERS
-    MOCK_REMINDERS = [r for r in MOCK_REMINDERS if r["id"] != reminder_id]
+    remaining = [r for r in MOCK_REMINDERS if r["id"] != reminder_id]
+    if len(remaining) != len(MOCK_REMINDERS):
+        REMINDER_CHANGES.record("delete", reminder_id)
+    MOCK_REMINDERS = remaining
     return {"status": "deleted"}
 
 @router.patch("/api/reminders/{reminder_id}/complete")
@@ -124,6 +145,7 @@ async def mark_reminder_complete(reminder_id: str):
                 # Set next_due far in future so it doesn't trigger alarms
                 reminder["next_due"] = (now + timedelta(days=365)).isoformat()
             
+            REMINDER_CHANGES.record("update", reminder_id, reminder)
             return reminder
     
     raise HTTPException(status_code=404, detail="Reminder not found")
@@ -191,6 +213,7 @@ async def create_ai_bulk_reminders(request: AIBulkCreateRequest):
         # Add to MOCK_REMINDERS
         for reminder in ai_reminders:
             MOCK_REMINDERS.insert(0, reminder)
+            REMINDER_CHANGES.record("insert", reminder["id"], reminder)
         
         return {
             "reminders": ai_reminders,
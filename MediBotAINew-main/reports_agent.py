@@ -1,18 +1,27 @@
 """
 Reports Agent Backend - Medical Report Analysis & Repository
 """
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import List, Dict, Any, Optional
 import json
 import uuid
 from datetime import datetime
+import os
 import random
+import tempfile
+from db.reports_repository import REPORT_KEY_SHAPE, get_reports_repository, needs_content
+from extraction.engine import extractable, get_extraction_engine
+from storage.uploads import save_upload
+from utils.pagination import clamp_limit, decode_cursor, encode_cursor, ndjson_lines, page_keys, parse_fields, project
+from utils.versioned import VersionedResponses, changes_response
 
 router = APIRouter()
 
-# Mock medical reports database - starts empty, only uploaded reports
-MOCK_REPORTS = []
+# Uploaded reports live in the bounded repository (db/reports_repository.py);
+# GET /api/reports is cached per repository version
+report_responses = VersionedResponses("reports")
 
 class ReportAnalysisRequest(BaseModel):
     report_id: str
@@ -24,12 +33,67 @@ class SendToDoctorRequest(BaseModel):
     analysis: str
 
 @router.get("/api/reports")
-async def get_reports():
-    """Get all medical reports from repository"""
-    print(f"Returning {len(MOCK_REPORTS)} reports")  # Debug log
-    # Sort by date, newest first
-    sorted_reports = sorted(MOCK_REPORTS, key=lambda x: x["date"], reverse=True)
-    return sorted_reports
+async def get_reports(
+    request: Request,
+    limit: Optional[int] = None,
+    after: Optional[str] = None,
+    fields: Optional[str] = None,
+    format: Optional[str] = None
+):
+    """
+    Get all medical reports from repository, newest first.
+
+    With `limit` the response is {total, reports, next_after} and `after` takes
+    the `next_after` cursor; without it, the list of reports. `fields` selects a
+    sparse fieldset and `format=ndjson` streams all reports.
+    JSON responses carry an ETag; If-None-Match gets a 304 while nothing changed.
+    """
+    reports = get_reports_repository()
+    print(f"Returning {len(reports)} reports")  # Debug log
+    field_list = parse_fields(fields)
+    with_content = needs_content(field_list)
+    
+    if format == "ndjson":
+        snapshot = reports.keys[::-1]
+        found = (reports.get(report_id, with_content) for _, _, report_id in snapshot)
+        return StreamingResponse(
+            ndjson_lines((r for r in found if r is not None), field_list),
+            media_type="application/x-ndjson"
+        )
+    
+    version = reports.version.value
+    
+    def build():
+        page, next_key = page_keys(reports.keys, clamp_limit(limit), decode_cursor(after, REPORT_KEY_SHAPE) if after else None,
+                                   descending=True)
+        page_reports = [project(report, field_list)
+                        for report in reports.get_many([report_id for _, _, report_id in page], with_content)]
+        if limit is None:
+            return page_reports, {}
+        return {
+            "total": len(reports),
+            "reports": page_reports,
+            "next_after": encode_cursor(next_key) if next_key else None
+        }, {}
+    
+    variant = json.dumps([limit, after, field_list])
+    return report_responses.respond(request.headers, version, variant, build)
+
+@router.get("/api/reports/changes")
+async def get_report_changes(since: Optional[int] = None, epoch: Optional[str] = None, fields: Optional[str] = None):
+    """
+    Reports added or updated after sequence number `since`, for delta sync.
+    Leave `since` out on the first call, then pass back the returned `seq` and
+    `epoch`; reset=true comes with a full snapshot. Items carry metadata only;
+    file_content comes from GET /api/reports.
+    """
+    reports = get_reports_repository()
+    return changes_response(reports.version, since, epoch, reports.newest, parse_fields(fields))
+
+@router.get("/api/reports/stats")
+async def get_reports_stats():
+    """Report count and memory accounting of the reports repository"""
+    return get_reports_repository().stats()
 
 @router.post("/api/reports/analyze")
 async def analyze_report(request: ReportAnalysisRequest):
@@ -39,10 +103,7 @@ async def analyze_report(request: ReportAnalysisRequest):
         data = request.data
         
         # Find and update report status to analyzed
-        for report in MOCK_REPORTS:
-            if report["id"] == request.report_id:
-                report["status"] = "analyzed"
-                break
+        get_reports_repository().update(request.report_id, status="analyzed")
         
         # Generate AI analysis based on report type
         analysis = generate_report_analysis(report_type, data)
@@ -61,7 +122,7 @@ async def send_to_doctor_assistant(request: SendToDoctorRequest):
     """Send report analysis to Doctor Assistant"""
     try:
         # Find the report
-        report = next((r for r in MOCK_REPORTS if r["id"] == request.report_id), None)
+        report = get_reports_repository().get(request.report_id, with_content=False)
         if not report:
             raise HTTPException(status_code=404, detail="Report not found")
         
@@ -88,29 +149,35 @@ async def send_to_doctor_assistant(request: SendToDoctorRequest):
 async def upload_report(file: UploadFile = File(...)):
     """Upload new medical report"""
     try:
-        # Read file content
-        content = await file.read()
-        print(f"Uploaded file: {file.filename}, size: {len(content)} bytes")
+        # Stream the file to disk, then parse it in the extraction process pool
+        # (cached by content hash, so re-uploads are not parsed again)
+        fd, temp_path = tempfile.mkstemp(suffix=".upload")
+        os.close(fd)
+        try:
+            upload = await save_upload(file, temp_path)
+            if extractable(file.filename):
+                extraction = await get_extraction_engine().extract_file(temp_path, upload["sha256"])
+            else:
+                # Images and other binaries: no text to read, the report data is generated
+                extraction = {"pages": 0, "text": "", "lab_values": {}, "elapsed_ms": 0}
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        print(f"Uploaded file: {file.filename}, size: {upload['size']} bytes, "
+              f"{extraction['pages']} page(s) extracted in {extraction['elapsed_ms']} ms")
         
         # Generate mock report data
         report_id = f"rpt_{uuid.uuid4().hex[:6]}"
+        while report_id in get_reports_repository():
+            report_id = f"rpt_{uuid.uuid4().hex[:6]}"
         
-        # Determine report type from filename
-        filename = file.filename.lower()
-        if "ecg" in filename:
-            report_type = "ECG"
-        elif "xray" in filename or "x-ray" in filename or "chest" in filename:
-            report_type = "X-Ray"
-        elif "blood" in filename or "lab" in filename:
-            report_type = "Blood Test"
-        elif "mri" in filename:
-            report_type = "MRI"
-        elif "ct" in filename:
-            report_type = "CT Scan"
-        elif "echo" in filename or "ultrasound" in filename:
-            report_type = "Ultrasound"
-        else:
-            report_type = "Medical Report"
+        # Determine report type from filename, then from the document's title
+        report_type = report_type_from_filename(file.filename)
+        if report_type == "Medical Report":
+            report_type = detect_report_type(extraction["text"])
+        
+        # Real values from the document; generated ones only when nothing could be read
+        lab_values = extraction["lab_values"]
         
         new_report = {
             "id": report_id,
@@ -119,11 +186,15 @@ async def upload_report(file: UploadFile = File(...)):
             "patient_id": f"PT{random.randint(100, 999)}",
             "date": datetime.now().strftime("%Y-%m-%d"),
             "status": "pending",
-            "data": generate_mock_report_data(report_type),
-            "file_content": content.decode('utf-8', errors='ignore')[:1000]  # Store first 1000 chars
+            "data": lab_values or generate_mock_report_data(report_type),
+            "data_source": "extracted" if lab_values else "generated",
+            "file_size": upload["size"],
+            "sha256": upload["sha256"],
+            "pages": extraction["pages"],
+            "file_content": extraction["text"][:1000]  # Store first 1000 chars
         }
         
-        MOCK_REPORTS.insert(0, new_report)  # Add to beginning of list
+        get_reports_repository().add(new_report)
         print(f"Added new report: {new_report['name']}")
         
         return {
@@ -132,10 +203,47 @@ async def upload_report(file: UploadFile = File(...)):
             "report": new_report,
             "message": "Report uploaded successfully"
         }
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Upload error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Upload error: {str(e)}")
 
+def report_type_from_filename(filename: str) -> str:
+    """Report type from words in the file name; "Medical Report" if none match"""
+    filename = filename.lower()
+    if "ecg" in filename:
+        return "ECG"
+    elif "xray" in filename or "x-ray" in filename or "chest" in filename:
+        return "X-Ray"
+    elif "blood" in filename or "lab" in filename:
+        return "Blood Test"
+    elif "mri" in filename:
+        return "MRI"
+    elif "ct" in filename:
+        return "CT Scan"
+    elif "echo" in filename or "ultrasound" in filename:
+        return "Ultrasound"
+    return "Medical Report"
+
+# Title words -> report type, for files whose name doesn't say what they are
+TITLE_TYPES = [
+    (("electrocardiogram", "ecg", "ekg"), "ECG"),
+    (("x-ray", "xray", "radiograph"), "X-Ray"),
+    (("blood count", "cbc", "hematology", "laboratory", "lab report"), "Blood Test"),
+    (("mri", "magnetic resonance"), "MRI"),
+    (("ct ", "computed tomography"), "CT Scan"),
+    (("echocardiogram", "ultrasound", "sonograph"), "Ultrasound"),
+]
+
+def detect_report_type(text: str) -> str:
+    """Report type from the document's first lines (its title)"""
+    head = " ".join(text.splitlines()[:3]).lower() + " "
+    for words, report_type in TITLE_TYPES:
+        if any(word in head for word in words):
+            return report_type
+    return "Medical Report"
+
 def remove_markdown(text: str) -> str:
     """Remove markdown asterisks from text"""
     return text.replace('**', '')
@@ -0,0 +1,237 @@
+# storage/backends.py
+"""
+Async storage backends for medical record files
+
+Routes await these instead of calling blocking filesystem or Supabase SDK
+functions on the event loop:
+  - LocalStorageBackend: files under LOCAL_STORAGE_PATH, I/O offloaded to threads
+  - SupabaseStorageBackend: one shared SDK client (its HTTP connection pool is
+    reused) driven by a bounded worker pool, with public URLs cached
+"""
+import asyncio
+import os
+import tempfile
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+from starlette.concurrency import run_in_threadpool
+
+load_dotenv()
+
+LOCAL_STORAGE_PATH = os.getenv("LOCAL_STORAGE_PATH", "cloud_medical_records")
+# Optional separate disk for the cold tier; unset keeps cold blobs under cold/ in the main backend
+COLD_STORAGE_PATH = os.getenv("COLD_STORAGE_PATH", "")
+SUPABASE_MAX_WORKERS = int(os.getenv("SUPABASE_MAX_WORKERS", "8"))
+# Keys per bulk remove request
+SUPABASE_DELETE_BATCH = 1000
+PUBLIC_URL_CACHE_SIZE = 4096
+
+class StorageBackend:
+    """Interface every backend implements; keys are '/'-separated object names"""
+
+    name = "base"
+    # Where uploads are staged before put_file
+    staging_dir = tempfile.gettempdir()
+
+    async def put_file(self, source_path: str, key: str, move: bool = False):
+        """Store a local file under key; with move=True the source may be consumed"""
+        raise NotImplementedError
+
+    async def put_bytes(self, content: bytes, key: str):
+        raise NotImplementedError
+
+    async def get_bytes(self, key: str) -> bytes:
+        """Raises FileNotFoundError if the key does not exist"""
+        raise NotImplementedError
+
+    async def delete(self, key: str):
+        """Remove key; deleting a missing key is not an error"""
+        raise NotImplementedError
+
+    async def delete_many(self, keys: list):
+        """Remove several keys, as few round trips as the backend allows"""
+        await asyncio.gather(*(self.delete(key) for key in keys))
+
+    async def exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    async def public_url(self, key: str) -> str:
+        raise NotImplementedError
+
+    def local_path(self, key: str):
+        """Filesystem path for zero-copy streaming, or None for remote backends"""
+        return None
+
+    def close(self):
+        pass
+
+# ---------------------------
+# Local filesystem
+# ---------------------------
+class LocalStorageBackend(StorageBackend):
+    name = "local"
+
+    def __init__(self, root: str = LOCAL_STORAGE_PATH):
+        self.root = root
+        # Staging next to the files keeps put_file(move=True) a same-disk rename
+        self.staging_dir = os.path.join(root, ".staging")
+        os.makedirs(self.staging_dir, exist_ok=True)
+
+    def local_path(self, key: str) -> str:
+        path = os.path.normpath(os.path.join(self.root, key))
+        if not path.startswith(os.path.normpath(self.root) + os.sep):
+            raise ValueError(f"Key escapes the storage root: {key}")
+        return path
+
+    def _put_file(self, source_path: str, key: str, move: bool):
+        path = self.local_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if move:
+            os.replace(source_path, path)
+            return
+        part_path = path + ".part"
+        with open(source_path, "rb") as src, open(part_path, "wb") as dst:
+            for chunk in iter(lambda: src.read(1024 * 1024), b""):
+                dst.write(chunk)
+        os.replace(part_path, path)
+
+    def _put_bytes(self, content: bytes, key: str):
+        path = self.local_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + ".part", "wb") as f:
+            f.write(content)
+        os.replace(path + ".part", path)
+
+    def _get_bytes(self, key: str) -> bytes:
+        with open(self.local_path(key), "rb") as f:
+            return f.read()
+
+    def _delete(self, key: str):
+        try:
+            os.remove(self.local_path(key))
+        except FileNotFoundError:
+            pass
+
+    async def put_file(self, source_path: str, key: str, move: bool = False):
+        await run_in_threadpool(self._put_file, source_path, key, move)
+
+    async def put_bytes(self, content: bytes, key: str):
+        await run_in_threadpool(self._put_bytes, content, key)
+
+    async def get_bytes(self, key: str) -> bytes:
+        return await run_in_threadpool(self._get_bytes, key)
+
+    async def delete(self, key: str):
+        await run_in_threadpool(self._delete, key)
+
+    async def delete_many(self, keys: list):
+        # One thread hop for the whole batch
+        await run_in_threadpool(lambda: [self._delete(key) for key in keys])
+
+    async def exists(self, key: str) -> bool:
+        return await run_in_threadpool(os.path.exists, self.local_path(key))
+
+    async def public_url(self, key: str) -> str:
+        return f"local://{os.path.join(self.root, key)}"
+
+# ---------------------------
+# Supabase
+# ---------------------------
+class SupabaseStorageBackend(StorageBackend):
+    """
+    Wraps a SupabaseStorage-like client (upload_file, download_file,
+    delete_file, list_files, get_public_url). At most max_workers SDK calls run at once,
+    so a burst of requests queues here instead of exhausting threads.
+    """
+
+    name = "supabase"
+
+    def __init__(self, client=None, max_workers: int = SUPABASE_MAX_WORKERS):
+        if client is None:
+            from supabase_storage import get_supabase_storage
+            client = get_supabase_storage()
+        self.client = client
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="supabase-io")
+        self._urls = OrderedDict()
+
+    async def _call(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+
+    def _upload_path(self, source_path: str, key: str):
+        with open(source_path, "rb") as f:
+            self.client.upload_file(f, key)
+
+    async def put_file(self, source_path: str, key: str, move: bool = False):
+        await self._call(self._upload_path, source_path, key)
+        if move:
+            os.remove(source_path)
+
+    async def put_bytes(self, content: bytes, key: str):
+        await self._call(self.client.upload_file, content, key)
+
+    async def get_bytes(self, key: str) -> bytes:
+        try:
+            return await self._call(self.client.download_file, key)
+        except FileNotFoundError:
+            raise
+        except Exception as e:
+            # The SDK raises its own error type; normalise "missing" for callers
+            if "404" in str(e) or "not found" in str(e).lower():
+                raise FileNotFoundError(key) from e
+            raise
+
+    async def delete(self, key: str):
+        await self._call(self.client.delete_file, key)
+        self._urls.pop(key, None)
+
+    async def delete_many(self, keys: list):
+        if not hasattr(self.client, "delete_files"):
+            return await super().delete_many(keys)
+        # The storage API removes a list of objects per request
+        await asyncio.gather(*(self._call(self.client.delete_files, keys[i:i + SUPABASE_DELETE_BATCH])
+                               for i in range(0, len(keys), SUPABASE_DELETE_BATCH)))
+        for key in keys:
+            self._urls.pop(key, None)
+
+    async def exists(self, key: str) -> bool:
+        folder, _, name = key.rpartition("/")
+        entries = await self._call(self.client.list_files, folder)
+        return any(entry.get("name") == name for entry in entries or [])
+
+    async def public_url(self, key: str) -> str:
+        url = self._urls.get(key)
+        if url is None:
+            url = await self._call(self.client.get_public_url, key)
+            self._urls[key] = url
+            if len(self._urls) > PUBLIC_URL_CACHE_SIZE:
+                self._urls.popitem(last=False)
+        else:
+            self._urls.move_to_end(key)
+        return url
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+
+# Global instance
+storage_backend = None
+
+def get_storage_backend() -> StorageBackend:
+    """Supabase when configured (or STORAGE_BACKEND=supabase), otherwise local disk"""
+    global storage_backend
+    if storage_backend is None:
+        choice = os.getenv("STORAGE_BACKEND", "auto").lower()
+        if choice != "local":
+            try:
+                storage_backend = SupabaseStorageBackend()
+            except Exception as e:
+                if choice == "supabase":
+                    raise
+                print(f"Supabase not configured, using local storage: {e}")
+        if storage_backend is None:
+            storage_backend = LocalStorageBackend()
+    return storage_backend
+
+def get_cold_storage_backend():
+    """Backend for the cold tier when COLD_STORAGE_PATH is set, else None (use the main backend)"""
+    return LocalStorageBackend(COLD_STORAGE_PATH) if COLD_STORAGE_PATH else None
@@ -0,0 +1,424 @@
+# storage/blob_store.py
+"""
+Content-addressed blob layer - each distinct file is stored once under its SHA-256
+
+Records point at blobs/<aa>/<sha256>; a reference count in SQLite (same
+database as the records) decides when the last record is gone and the bytes
+can be removed. Reads are checked against the hash. Reference changes for one
+hash are serialised by a striped asyncio lock, so this is safe within one
+server process.
+
+Blobs are compressed when stored (storage/compression.py picks the codec from
+the file type) and live in one of two tiers:
+  - hot: fast compression level, where every new blob starts
+  - cold: blobs not read for COLD_AFTER_DAYS, recompressed at the strongest
+    level, optionally on a separate backend (COLD_STORAGE_PATH)
+A periodic sweep moves idle blobs to cold and recently read ones back to hot.
+Reads decode transparently, so records never see the encoding or tier.
+"""
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter, OrderedDict
+from contextlib import AsyncExitStack
+
+from dotenv import load_dotenv
+from starlette.concurrency import run_in_threadpool
+
+from db.database import RECORDS_DB_PATH
+from storage.compression import (IDENTITY, LEVELS, SUFFIXES, choose_codec, decode_bytes, encode_bytes,
+                                 encode_file, open_decoded, worth_keeping)
+
+load_dotenv()
+
+BLOB_PREFIX = "blobs/"
+# Content hashes as accepted from clients (hex, either case)
+SHA256_PATTERN = r"^[0-9a-fA-F]{64}$"
+COLD_PREFIX = "cold/"
+
+HOT = "hot"
+COLD = "cold"
+
+# Blobs not read for this many days move to the cold tier (0 disables tiering)
+COLD_AFTER_DAYS = float(os.getenv("COLD_AFTER_DAYS", "7"))
+TIERING_INTERVAL_HOURS = float(os.getenv("TIERING_INTERVAL_HOURS", "6"))
+# last_access is rewritten at most this often per blob, so reads rarely write
+ACCESS_RESOLUTION_SECONDS = 3600
+# Local blob files whose hash verification is remembered
+VERIFIED_CACHE_SIZE = 4096
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    sha256 TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    refcount INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    encoding TEXT NOT NULL DEFAULT 'identity',
+    stored_size INTEGER,
+    tier TEXT NOT NULL DEFAULT 'hot',
+    last_access REAL
+);
+"""
+
+# Columns added after the table first shipped, for databases created before them
+ADDED_COLUMNS = {
+    "encoding": "TEXT NOT NULL DEFAULT 'identity'",
+    "stored_size": "INTEGER",
+    "tier": "TEXT NOT NULL DEFAULT 'hot'",
+    "last_access": "REAL",
+}
+
+# Striped locks: uploads of different content never wait on each other
+LOCK_STRIPES = 64
+
+def blob_key(sha256: str) -> str:
+    """Logical key kept on records; where the bytes physically are is object_key's job"""
+    return f"{BLOB_PREFIX}{sha256[:2]}/{sha256}"
+
+def object_key(sha256: str, tier: str = HOT, encoding: str = IDENTITY) -> str:
+    """Stored object name; an uncompressed hot blob sits at its logical key"""
+    prefix = COLD_PREFIX if tier == COLD else ""
+    return f"{prefix}{blob_key(sha256)}{SUFFIXES[encoding]}"
+
+def is_blob_key(file_path: str) -> bool:
+    return file_path.startswith(BLOB_PREFIX)
+
+def sha256_of_file(path: str, chunk_size: int = 1024 * 1024, encoding: str = IDENTITY) -> str:
+    """Hash of a file's original bytes, decoding it first if it is stored compressed"""
+    digest = hashlib.sha256()
+    with open_decoded(path, encoding) as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class BlobStore:
+    """
+    Bytes live in a StorageBackend (storage/backends.py). The blobs row is
+    written only after the backend stored the file, so a row always means the
+    bytes exist. A crash between the two leaves at worst an unreferenced file,
+    never a record without its bytes. Tier moves follow the same order: write
+    the new object, point the row at it, then delete the old one.
+    """
+
+    def __init__(self, backend, db_path: str = RECORDS_DB_PATH, cold_backend=None):
+        self.backend = backend
+        self.cold_backend = cold_backend or backend
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._locks = [asyncio.Lock() for _ in range(LOCK_STRIPES)]
+        self._local = threading.local()
+        # path -> (size, mtime_ns, verified sha256), least recently used first, so a
+        # file is hashed once per version and a rewritten file replaces its entry
+        self._verified = OrderedDict()
+        self._verified_lock = threading.Lock()
+        self.read_stats = {"reads": 0, "decoded": 0, "decode_seconds": 0.0}
+        self._tiering = None
+
+        conn = self._conn()
+        conn.executescript(SCHEMA)
+        self._migrate(conn)
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _migrate(conn: sqlite3.Connection):
+        existing = {row[1] for row in conn.execute("PRAGMA table_info(blobs)")}
+        for column, definition in ADDED_COLUMNS.items():
+            if column not in existing:
+                conn.execute(f"ALTER TABLE blobs ADD COLUMN {column} {definition}")
+        conn.execute("UPDATE blobs SET last_access = created_at WHERE last_access IS NULL")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_blobs_tier_access ON blobs (tier, last_access)")
+
+    def _lock_for(self, sha256: str) -> asyncio.Lock:
+        return self._locks[int(sha256[:8], 16) % LOCK_STRIPES]
+
+    def _backend(self, tier: str):
+        return self.cold_backend if tier == COLD else self.backend
+
+    def _locate(self, sha256: str):
+        """(encoding, tier, last_access) of a stored blob, or None"""
+        return self._conn().execute(
+            "SELECT encoding, tier, last_access FROM blobs WHERE sha256 = ?", (sha256,)
+        ).fetchone()
+
+    # -------------------------
+    # References
+    # -------------------------
+    @staticmethod
+    def _encode_staged(staging_path: str, size: int):
+        """(path to store, encoding, stored size) for a staged upload"""
+        with open(staging_path, "rb") as f:
+            head = f.read(16)
+        codec = choose_codec(head, size)
+        if codec == IDENTITY:
+            return staging_path, IDENTITY, size
+        encoded_path = staging_path + SUFFIXES[codec]
+        encoded_size = encode_file(staging_path, encoded_path, codec, LEVELS[HOT][codec])
+        if worth_keeping(size, encoded_size):
+            return encoded_path, codec, encoded_size
+        os.remove(encoded_path)
+        return staging_path, IDENTITY, size
+
+    async def add(self, staging_path: str, sha256: str, size: int):
+        """
+        Reference the blob for staged content, storing it only if it is new.
+        Returns (key, created). The staging file is consumed only when created.
+        """
+        key = blob_key(sha256)
+        async with self._lock_for(sha256):
+            conn = self._conn()
+            row = conn.execute("SELECT refcount FROM blobs WHERE sha256 = ?", (sha256,)).fetchone()
+            if row is None:
+                path, encoding, stored_size = await run_in_threadpool(self._encode_staged, staging_path, size)
+                try:
+                    await self.backend.put_file(path, object_key(sha256, HOT, encoding), move=True)
+                finally:
+                    for leftover in {path, staging_path}:
+                        if os.path.exists(leftover):
+                            os.remove(leftover)
+                now = time.time()
+                with conn:
+                    conn.execute(
+                        "INSERT INTO blobs (sha256, size, refcount, created_at, encoding, stored_size, tier, last_access) "
+                        "VALUES (?, ?, 1, ?, ?, ?, ?, ?)",
+                        (sha256, size, now, encoding, stored_size, HOT, now)
+                    )
+                return key, True
+            with conn:
+                conn.execute("UPDATE blobs SET refcount = refcount + 1 WHERE sha256 = ?", (sha256,))
+            return key, False
+
+    async def add_reference(self, sha256: str):
+        """Reference content that is already stored; None if the blob is unknown"""
+        async with self._lock_for(sha256):
+            conn = self._conn()
+            with conn:
+                updated = conn.execute("UPDATE blobs SET refcount = refcount + 1 WHERE sha256 = ?", (sha256,)).rowcount
+            return blob_key(sha256) if updated else None
+
+    async def release(self, sha256: str) -> bool:
+        """Drop one reference; the bytes are deleted with the last one. Returns True if deleted."""
+        return bool(await self.release_many([sha256]))
+
+    async def release_many(self, sha256s) -> list:
+        """
+        Drop one reference per item (a hash may repeat) in one transaction, then
+        delete the blobs that reached zero with one bulk call per tier. Returns
+        the deleted hashes.
+        """
+        counts = Counter(sha256s)
+        if not counts:
+            return []
+        async with AsyncExitStack() as stack:
+            # Every stripe involved is held until the bytes are gone, so a concurrent add()
+            # of the same content can't store a file that is then deleted. Sorted: no deadlock.
+            for stripe in sorted({int(sha256[:8], 16) % LOCK_STRIPES for sha256 in counts}):
+                await stack.enter_async_context(self._locks[stripe])
+            conn = self._conn()
+            with conn:
+                conn.executemany("UPDATE blobs SET refcount = refcount - ? WHERE sha256 = ?",
+                                 [(count, sha256) for sha256, count in counts.items()])
+                gone = [(sha256,) + row for sha256 in counts
+                        for row in conn.execute("SELECT encoding, tier FROM blobs WHERE sha256 = ? AND refcount <= 0",
+                                                (sha256,))]
+                conn.executemany("DELETE FROM blobs WHERE sha256 = ?", [(sha256,) for sha256, _, _ in gone])
+
+            for tier in (HOT, COLD):
+                keys = [object_key(sha256, tier, encoding) for sha256, encoding, blob_tier in gone if blob_tier == tier]
+                if keys:
+                    try:
+                        await self._backend(tier).delete_many(keys)
+                    except Exception as e:
+                        print(f"Error deleting {len(keys)} {tier} blobs: {e}")
+        return [sha256 for sha256, _, _ in gone]
+
+    def info(self, sha256: str):
+        row = self._conn().execute(
+            "SELECT size, refcount, encoding, COALESCE(stored_size, size), tier FROM blobs WHERE sha256 = ?", (sha256,)
+        ).fetchone()
+        if row is None:
+            return None
+        size, refcount, encoding, stored_size, tier = row
+        return {"sha256": sha256, "size": size, "refcount": refcount,
+                "encoding": encoding, "stored_size": stored_size, "tier": tier}
+
+    def stats(self) -> dict:
+        conn = self._conn()
+        blobs, stored, references, logical, encoded = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(refcount), 0), COALESCE(SUM(size * refcount), 0), "
+            "COALESCE(SUM(COALESCE(stored_size, size)), 0) FROM blobs"
+        ).fetchone()
+        tiers = conn.execute(
+            "SELECT tier, COUNT(*), COALESCE(SUM(COALESCE(stored_size, size)), 0) FROM blobs GROUP BY tier"
+        ).fetchall()
+        decoded = self.read_stats["decoded"]
+        return {
+            "blobs": blobs,
+            "references": references,
+            "stored_bytes": stored,
+            "logical_bytes": logical,
+            # Bytes actually on the backends after compression
+            "encoded_bytes": encoded,
+            "compression_ratio": round(stored / encoded, 3) if encoded else 1.0,
+            "tiers": {tier: {"blobs": count, "bytes": size} for tier, count, size in tiers},
+            "reads": self.read_stats["reads"],
+            "avg_decode_ms": round(self.read_stats["decode_seconds"] * 1000 / decoded, 3) if decoded else 0.0,
+        }
+
+    # -------------------------
+    # Reads
+    # -------------------------
+    def _touch(self, sha256: str, last_access):
+        now = time.time()
+        if last_access is None or now - last_access >= ACCESS_RESOLUTION_SECONDS:
+            with self._conn() as conn:
+                conn.execute("UPDATE blobs SET last_access = ? WHERE sha256 = ?", (now, sha256))
+
+    def _decode(self, content: bytes, encoding: str) -> bytes:
+        started = time.perf_counter()
+        content = decode_bytes(content, encoding)
+        self.read_stats["decoded"] += 1
+        self.read_stats["decode_seconds"] += time.perf_counter() - started
+        return content
+
+    async def read(self, sha256: str) -> bytes:
+        """Original bytes of a blob from whichever tier holds it; FileNotFoundError if unknown"""
+        for attempt in range(2):
+            location = self._locate(sha256)
+            if location is None:
+                raise FileNotFoundError(blob_key(sha256))
+            encoding, tier, last_access = location
+            try:
+                content = await self._backend(tier).get_bytes(object_key(sha256, tier, encoding))
+                break
+            except FileNotFoundError:
+                # A tier move may have just relocated it; look once more
+                moved_to = self._locate(sha256)
+                if attempt or moved_to is None or moved_to[:2] == location[:2]:
+                    raise
+        self.read_stats["reads"] += 1
+        self._touch(sha256, last_access)
+        if encoding == IDENTITY:
+            return content
+        return await run_in_threadpool(self._decode, content, encoding)
+
+    def local_file(self, sha256: str):
+        """(path, encoding) when the blob is on a local backend, None if remote or unknown"""
+        location = self._locate(sha256)
+        if location is None:
+            return None
+        encoding, tier, last_access = location
+        path = self._backend(tier).local_path(object_key(sha256, tier, encoding))
+        if path is None:
+            return None
+        self.read_stats["reads"] += 1
+        self._touch(sha256, last_access)
+        return path, encoding
+
+    # -------------------------
+    # Tiering
+    # -------------------------
+    def _recompress(self, content: bytes, encoding: str, sha256: str, size: int):
+        """Decode, check the hash, and encode at the cold level; returns (bytes, encoding)"""
+        original = decode_bytes(content, encoding)
+        if not self.verify_bytes(original, sha256):
+            raise ValueError(f"Blob {sha256} failed its integrity check, not moving it")
+        codec = choose_codec(original[:16], size)
+        if codec != IDENTITY:
+            encoded = encode_bytes(original, codec, LEVELS[COLD][codec])
+            if worth_keeping(size, len(encoded)):
+                return encoded, codec
+        return original, IDENTITY
+
+    async def move(self, sha256: str, tier: str) -> bool:
+        """Move a blob to a tier (recompressing for cold); False if unknown or already there"""
+        async with self._lock_for(sha256):
+            conn = self._conn()
+            row = conn.execute("SELECT encoding, tier, size FROM blobs WHERE sha256 = ?", (sha256,)).fetchone()
+            if row is None or row[1] == tier:
+                return False
+            encoding, current, size = row
+            old_key = object_key(sha256, current, encoding)
+            content = await self._backend(current).get_bytes(old_key)
+            if tier == COLD:
+                content, encoding = await run_in_threadpool(self._recompress, content, encoding, sha256, size)
+            await self._backend(tier).put_bytes(content, object_key(sha256, tier, encoding))
+            with conn:
+                conn.execute("UPDATE blobs SET tier = ?, encoding = ?, stored_size = ? WHERE sha256 = ?",
+                             (tier, encoding, len(content), sha256))
+            try:
+                await self._backend(current).delete(old_key)
+            except Exception as e:
+                print(f"Error deleting {old_key} after moving it to {tier}: {e}")
+            return True
+
+    async def retier(self, cold_after_days: float = COLD_AFTER_DAYS) -> dict:
+        """Move blobs idle for cold_after_days to cold, and cold blobs read since then back to hot"""
+        cutoff = time.time() - cold_after_days * 86400
+        conn = self._conn()
+        moves = [(sha256, COLD) for (sha256,) in conn.execute(
+            "SELECT sha256 FROM blobs WHERE tier = ? AND last_access < ?", (HOT, cutoff)).fetchall()]
+        moves += [(sha256, HOT) for (sha256,) in conn.execute(
+            "SELECT sha256 FROM blobs WHERE tier = ? AND last_access >= ?", (COLD, cutoff)).fetchall()]
+
+        result = {"demoted": 0, "promoted": 0, "failed": 0}
+        for sha256, tier in moves:
+            try:
+                if await self.move(sha256, tier):
+                    result["demoted" if tier == COLD else "promoted"] += 1
+            except Exception as e:
+                print(f"Error moving blob {sha256} to {tier}: {e}")
+                result["failed"] += 1
+        return result
+
+    async def _tiering_loop(self, interval_seconds: float, cold_after_days: float):
+        while True:
+            await asyncio.sleep(interval_seconds)
+            result = await self.retier(cold_after_days)
+            if any(result.values()):
+                print(f"Storage tiering: {result}")
+
+    async def start_tiering(self, interval_hours: float = TIERING_INTERVAL_HOURS,
+                            cold_after_days: float = COLD_AFTER_DAYS):
+        if self._tiering is None and cold_after_days > 0 and interval_hours > 0:
+            self._tiering = asyncio.create_task(self._tiering_loop(interval_hours * 3600, cold_after_days))
+
+    async def stop_tiering(self):
+        if self._tiering is not None:
+            self._tiering.cancel()
+            self._tiering = None
+
+    # -------------------------
+    # Verification
+    # -------------------------
+    @staticmethod
+    def verify_bytes(content: bytes, sha256: str) -> bool:
+        return hashlib.sha256(content).hexdigest() == sha256
+
+    def verify_file(self, path: str, sha256: str, encoding: str = IDENTITY) -> bool:
+        """Hash a local blob once per on-disk version; later reads hit the cache"""
+        stat = os.stat(path)
+        version = (stat.st_size, stat.st_mtime_ns, sha256)
+        with self._verified_lock:
+            if self._verified.get(path) == version:
+                self._verified.move_to_end(path)
+                return True
+        ok = sha256_of_file(path, encoding=encoding) == sha256
+        if ok:
+            with self._verified_lock:
+                self._verified[path] = version
+                self._verified.move_to_end(path)
+                if len(self._verified) > VERIFIED_CACHE_SIZE:
+                    self._verified.popitem(last=False)
+        return ok
@@ -0,0 +1,61 @@
+# storage/memory_client.py
+"""
+In-memory stand-in for SupabaseStorage - same methods, no network
+
+Lets SupabaseStorageBackend run offline in tests and benchmarks. `latency`
+(seconds) is slept inside every call to mimic a blocking HTTP round trip.
+"""
+import threading
+import time
+
+class InMemoryStorageClient:
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.objects = {}
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def _round_trip(self):
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.latency:
+                time.sleep(self.latency)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def upload_file(self, file_content, file_path: str) -> str:
+        content = file_content if isinstance(file_content, bytes) else file_content.read()
+        self._round_trip()
+        self.objects[file_path] = content
+        return f"memory://medical-reports/{file_path}"
+
+    def download_file(self, file_path: str) -> bytes:
+        self._round_trip()
+        if file_path not in self.objects:
+            raise Exception(f"404 Object not found: {file_path}")
+        return self.objects[file_path]
+
+    def delete_file(self, file_path: str):
+        self._round_trip()
+        self.objects.pop(file_path, None)
+
+    def delete_files(self, file_paths: list):
+        self._round_trip()
+        for file_path in file_paths:
+            self.objects.pop(file_path, None)
+
+    def list_files(self, folder: str = "") -> list:
+        self._round_trip()
+        prefix = f"{folder}/" if folder else ""
+        return [{"name": key[len(prefix):]} for key in self.objects
+                if key.startswith(prefix) and "/" not in key[len(prefix):]]
+
+    def get_public_url(self, file_path: str) -> str:
+        self._round_trip()
+        return f"memory://medical-reports/{file_path}"
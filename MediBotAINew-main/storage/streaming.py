@@ -0,0 +1,169 @@
+# storage/streaming.py
+"""
+Streaming file responses with HTTP Range, ETag / If-None-Match and real content types
+
+Starlette's FileResponse only learned Range requests in releases newer than the
+one pinned in requirements.txt, so ranges are handled here for both local files
+and in-memory payloads from cloud storage.
+"""
+import mimetypes
+import os
+from urllib.parse import quote
+
+from fastapi import HTTPException
+from fastapi.responses import Response, StreamingResponse
+
+from storage.compression import open_decoded
+
+CHUNK_SIZE = 64 * 1024
+
+def guess_content_type(file_name: str) -> str:
+    content_type, _ = mimetypes.guess_type(file_name)
+    return content_type or "application/octet-stream"
+
+def content_disposition(disposition: str, file_name: str) -> str:
+    """
+    RFC 6266 header value. Header values must be latin-1, so the quoted
+    filename is an escaped ASCII fallback and filename* carries the real
+    UTF-8 name for clients that understand it.
+    """
+    fallback = "".join(c if " " <= c <= "~" else "_" for c in file_name) or "download"
+    escaped = fallback.replace("\\", "\\\\").replace('"', '\\"')
+    value = f'{disposition}; filename="{escaped}"'
+    if fallback != file_name:
+        value += f"; filename*=UTF-8''{quote(file_name, safe='')}"
+    return value
+
+def file_etag(stat: os.stat_result) -> str:
+    """Size and modification time, the same validator nginx uses for static files"""
+    return f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison, as RFC 9110 requires for If-None-Match
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return etag.removeprefix("W/") in candidates
+
+def parse_range(range_header: str, size: int):
+    """
+    (start, end) inclusive for a single 'bytes=' range, or None to send the whole
+    file. Multi-range requests are answered with the full body, which RFC 9110
+    allows. Raises 416 when the range can't be satisfied.
+    """
+    if not range_header or not range_header.startswith("bytes=") or "," in range_header:
+        return None
+
+    first, _, last = range_header[len("bytes="):].strip().partition("-")
+    try:
+        if first:
+            start = int(first)
+            end = int(last) if last else size - 1
+        else:
+            # Suffix range: the last N bytes
+            length = int(last)
+            if length == 0:
+                raise ValueError("empty suffix range")
+            start, end = max(0, size - length), size - 1
+    except ValueError:
+        return None
+
+    if start >= size or start > end:
+        raise HTTPException(status_code=416, detail="Range not satisfiable",
+                            headers={"Content-Range": f"bytes */{size}"})
+    return start, min(end, size - 1)
+
+def iter_file(path: str, start: int, end: int, chunk_size: int = CHUNK_SIZE):
+    """Yield bytes start..end (inclusive) without holding more than one chunk"""
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = f.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+def iter_decoded(path: str, encoding: str, start: int, end: int, chunk_size: int = CHUNK_SIZE):
+    """Like iter_file for a compressed file: decoded as it is sent, never held whole"""
+    with open_decoded(path, encoding) as f:
+        # Compressed streams can't seek; decode and drop what precedes the range
+        skip = start
+        while skip > 0:
+            chunk = f.read(min(chunk_size, skip))
+            if not chunk:
+                return
+            skip -= len(chunk)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = f.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+def iter_bytes(content: bytes, start: int, end: int, chunk_size: int = CHUNK_SIZE):
+    view = memoryview(content)
+    for offset in range(start, end + 1, chunk_size):
+        yield bytes(view[offset:min(offset + chunk_size, end + 1)])
+
+def _range_response(size: int, etag: str, file_name: str, headers: dict, body_for_range):
+    """Shared 304 / 206 / 200 logic; body_for_range(start, end) returns a chunk iterator"""
+    base_headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": content_disposition("inline", file_name),
+        "Cache-Control": "private, max-age=0, must-revalidate"
+    }
+    content_type = guess_content_type(file_name)
+
+    if etag_matches(headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=base_headers)
+
+    # A Range is only honoured if If-Range (when sent) still matches this version
+    byte_range = None
+    if_range = headers.get("if-range")
+    if not if_range or if_range.strip() == etag:
+        byte_range = parse_range(headers.get("range"), size)
+
+    if byte_range is None:
+        if size == 0:
+            return Response(content=b"", media_type=content_type, headers=base_headers)
+        return StreamingResponse(body_for_range(0, size - 1), media_type=content_type,
+                                 headers={**base_headers, "Content-Length": str(size)})
+
+    start, end = byte_range
+    return StreamingResponse(
+        body_for_range(start, end),
+        status_code=206,
+        media_type=content_type,
+        headers={
+            **base_headers,
+            "Content-Length": str(end - start + 1),
+            "Content-Range": f"bytes {start}-{end}/{size}"
+        }
+    )
+
+def stream_file(path: str, file_name: str, headers, etag: str = None) -> Response:
+    """Stream a local file in constant memory; the ETag defaults to size and mtime"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="File not found")
+    return _range_response(stat.st_size, etag or file_etag(stat), file_name, headers,
+                           lambda start, end: iter_file(path, start, end))
+
+def stream_bytes(content: bytes, file_name: str, headers, etag: str) -> Response:
+    """Serve an already-downloaded payload (cloud storage) with the same semantics"""
+    return _range_response(len(content), etag, file_name, headers,
+                           lambda start, end: iter_bytes(content, start, end))
+
+def stream_decoded_file(path: str, encoding: str, size: int, file_name: str, headers, etag: str) -> Response:
+    """Stream a compressed local file as its original bytes; size is the decoded length"""
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="File not found")
+    return _range_response(size, etag, file_name, headers,
+                           lambda start, end: iter_decoded(path, encoding, start, end))
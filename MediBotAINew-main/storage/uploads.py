@@ -0,0 +1,74 @@
+# storage/uploads.py
+"""
+Chunked upload reading with incremental SHA-256, byte counting and a size limit
+
+Only one chunk of an upload is held in memory at a time; oversized uploads
+are rejected with 413 as soon as they cross the limit.
+"""
+import hashlib
+import os
+
+from dotenv import load_dotenv
+from fastapi import HTTPException, UploadFile
+from starlette.concurrency import run_in_threadpool
+
+load_dotenv()
+
+MAX_UPLOAD_BYTES = int(float(os.getenv("MAX_UPLOAD_MB", "50")) * 1024 * 1024)
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+async def read_upload(upload: UploadFile, sink=None, max_bytes: int = MAX_UPLOAD_BYTES,
+                      chunk_size: int = UPLOAD_CHUNK_SIZE) -> dict:
+    """
+    Read an upload chunk by chunk, passing each chunk to sink(chunk) if given.
+    Returns {"size", "sha256"}; raises 413 once more than max_bytes arrive.
+    """
+    digest = hashlib.sha256()
+    size = 0
+
+    while True:
+        chunk = await upload.read(chunk_size)
+        if not chunk:
+            break
+        size += len(chunk)
+        if size > max_bytes:
+            raise HTTPException(status_code=413, detail=f"File exceeds the {max_bytes // (1024 * 1024)} MB upload limit")
+        digest.update(chunk)
+        if sink is not None:
+            await sink(chunk)
+
+    return {"size": size, "sha256": digest.hexdigest()}
+
+async def save_upload(upload: UploadFile, dest_path: str, max_bytes: int = MAX_UPLOAD_BYTES,
+                      chunk_size: int = UPLOAD_CHUNK_SIZE) -> dict:
+    """
+    Stream an upload to dest_path. Writes go to a .part file in a worker thread
+    and are renamed into place only when the whole upload succeeded.
+    """
+    part_path = dest_path + ".part"
+    f = await run_in_threadpool(open, part_path, "wb")
+
+    async def write(chunk: bytes):
+        await run_in_threadpool(f.write, chunk)
+
+    try:
+        result = await read_upload(upload, write, max_bytes, chunk_size)
+        await run_in_threadpool(f.close)
+        os.replace(part_path, dest_path)
+        return result
+    except BaseException:
+        f.close()
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        raise
+
+class UploadHead:
+    """Sink that keeps only the first `limit` bytes of an upload (for previews)"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.data = bytearray()
+
+    async def __call__(self, chunk: bytes):
+        if len(self.data) < self.limit:
+            self.data += chunk[:self.limit - len(self.data)]
@@ -27,8 +27,8 @@ class SupabaseStorage:
         
         self.client = create_client(url, key)
     
-    def upload_file(self, file_content: bytes, file_path: str) -> str:
-        """Upload file to Supabase Storage"""
+    def upload_file(self, file_content, file_path: str) -> str:
+        """Upload file to Supabase Storage; accepts bytes or an open binary file"""
         self.client.storage.from_(self.bucket).upload(file_path, file_content)
         return self.client.storage.from_(self.bucket).get_public_url(file_path)
     
@@ -40,6 +40,10 @@ class SupabaseStorage:
         """Delete file from Supabase Storage"""
         self.client.storage.from_(self.bucket).remove([file_path])
     
+    def delete_files(self, file_paths: list):
+        """Delete several files in one request"""
+        self.client.storage.from_(self.bucket).remove(list(file_paths))
+    
     def list_files(self, folder: str = "") -> list:
         """List files in Supabase Storage"""
         return self.client.storage.from_(self.bucket).list(folder)
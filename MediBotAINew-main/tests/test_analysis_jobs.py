@@ -0,0 +1,81 @@
+import asyncio
+import threading
+import time
+
+import analysis_jobs
+from analysis_jobs import AnalysisJobStore
+
+def fast(vitals):
+    return f"rule-based: hr {vitals['heart_rate']}"
+
+class TestAnalysisJobStore:
+
+    def test_rule_based_result_is_returned_immediately(self):
+        release = threading.Event()
+
+        def slow_llm(vitals):
+            release.wait(5)
+            return "llm"
+
+        store = AnalysisJobStore()
+        job = store.start({"heart_rate": 80}, fast, slow_llm)
+        assert job["status"] == "pending"
+        assert job["source"] == "rule_based"
+        assert job["analysis"] == "rule-based: hr 80"
+        assert store.get(job["analysis_id"])["status"] == "pending"
+        release.set()
+
+    def test_long_poll_returns_llm_result_on_completion(self):
+        store = AnalysisJobStore()
+
+        def llm(vitals):
+            time.sleep(0.05)
+            return "llm: all normal"
+
+        async def scenario():
+            job = store.start({"heart_rate": 72}, fast, llm)
+            return await store.wait(job["analysis_id"], 5)
+
+        started = time.perf_counter()
+        done = asyncio.run(scenario())
+        assert time.perf_counter() - started < 2
+        assert done["status"] == "complete"
+        assert done["source"] == "llm"
+        assert done["analysis"] == "llm: all normal"
+        assert not store.waiters
+
+    def test_llm_failure_keeps_rule_based_result(self):
+        store = AnalysisJobStore()
+
+        def broken_llm(vitals):
+            raise RuntimeError("model not loaded")
+
+        async def scenario():
+            job = store.start({"heart_rate": 130}, fast, broken_llm)
+            return await store.wait(job["analysis_id"], 5)
+
+        done = asyncio.run(scenario())
+        assert done["status"] == "complete"
+        assert done["source"] == "rule_based"
+        assert done["analysis"] == "rule-based: hr 130"
+        assert done["enrichment_error"] == "LLM unavailable"
+
+    def test_oldest_analyses_are_evicted(self):
+        store = AnalysisJobStore(max_analyses=2)
+        ids = [store.start({"heart_rate": rate}, fast, lambda vitals: "llm")["analysis_id"] for rate in (60, 70, 80)]
+        assert store.get(ids[0]) is None
+        assert store.get(ids[2]) is not None
+        assert asyncio.run(store.wait(ids[0], 1)) is None
+
+    def test_wait_is_capped(self, monkeypatch):
+        monkeypatch.setattr(analysis_jobs, "MAX_WAIT_SECONDS", 0.1)
+        release = threading.Event()
+        store = AnalysisJobStore()
+        job = store.start({"heart_rate": 90}, fast, lambda vitals: release.wait(5) and "llm")
+
+        started = time.perf_counter()
+        polled = asyncio.run(store.wait(job["analysis_id"], 60))
+        assert time.perf_counter() - started < 1
+        assert polled["status"] == "pending"
+        assert not store.waiters
+        release.set()
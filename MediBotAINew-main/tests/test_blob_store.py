@@ -0,0 +1,158 @@
+import asyncio
+import hashlib
+import os
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from medical_records_system import router
+from storage import blob_store
+from storage.backends import LocalStorageBackend
+from storage.blob_store import BLOB_PREFIX, COLD, HOT, BlobStore, blob_key, object_key
+from storage.compression import default_codec
+
+def make_store(tmp_path):
+    root = tmp_path / "files"
+    return BlobStore(LocalStorageBackend(str(root)), str(tmp_path / "records.db")), root
+
+def stage(tmp_path, name, content):
+    path = tmp_path / name
+    path.write_bytes(content)
+    return str(path), hashlib.sha256(content).hexdigest()
+
+class TestBlobStore:
+
+    def test_identical_content_is_stored_once(self, tmp_path):
+        store, root = make_store(tmp_path)
+        first, sha = stage(tmp_path, "a.upload", b"%PDF blood test")
+        second, _ = stage(tmp_path, "b.upload", b"%PDF blood test")
+
+        async def scenario():
+            assert await store.add(first, sha, 15) == (blob_key(sha), True)
+            assert await store.add(second, sha, 15) == (blob_key(sha), False)
+            assert await store.add_reference(sha) == blob_key(sha)
+            assert await store.add_reference("0" * 64) is None
+
+        asyncio.run(scenario())
+        stats = store.stats()
+        assert (stats["blobs"], stats["references"], stats["stored_bytes"], stats["logical_bytes"]) == (1, 3, 15, 45)
+        # Too small to be worth compressing
+        assert stats["encoded_bytes"] == 15
+        assert stats["tiers"] == {"hot": {"blobs": 1, "bytes": 15}}
+        assert (root / blob_key(sha)).read_bytes() == b"%PDF blood test"
+
+    def test_bytes_removed_with_last_reference(self, tmp_path):
+        store, root = make_store(tmp_path)
+
+        async def scenario():
+            for name in ["a.upload", "b.upload"]:
+                path, sha = stage(tmp_path, name, b"x-ray")
+                await store.add(path, sha, 5)
+
+            assert await store.release(sha) is False
+            assert (root / blob_key(sha)).exists()
+            assert await store.release(sha) is True
+            assert not (root / blob_key(sha)).exists()
+            assert store.info(sha) is None
+
+        asyncio.run(scenario())
+
+    def test_verification_detects_corruption(self, tmp_path):
+        store, root = make_store(tmp_path)
+        path, sha = stage(tmp_path, "a.upload", b"ecg trace")
+        asyncio.run(store.add(path, sha, 9))
+        blob_path = str(root / blob_key(sha))
+
+        assert store.verify_file(blob_path, sha)
+        with open(blob_path, "wb") as f:
+            f.write(b"ecg trac3")
+        os.utime(blob_path, ns=(1, 1))
+        assert not store.verify_file(blob_path, sha)
+
+    def test_verification_cache_is_bounded(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(blob_store, "VERIFIED_CACHE_SIZE", 3)
+        store, _ = make_store(tmp_path)
+        paths = []
+        for i in range(5):
+            path = tmp_path / f"f{i}"
+            path.write_bytes(b"scan %d" % i)
+            paths.append(str(path))
+            assert store.verify_file(paths[-1], hashlib.sha256(b"scan %d" % i).hexdigest())
+        assert list(store._verified) == paths[2:]
+
+        # A rewritten file replaces its entry instead of adding one
+        with open(paths[4], "wb") as f:
+            f.write(b"rescan")
+        os.utime(paths[4], ns=(1, 1))
+        assert store.verify_file(paths[4], hashlib.sha256(b"rescan").hexdigest())
+        assert len(store._verified) == 3
+
+    def test_compressible_content_is_stored_compressed_and_read_back(self, tmp_path):
+        store, root = make_store(tmp_path)
+        content = b"%PDF-1.4\nHemoglobin 13.5 g/dL\nWBC 7.2\n" * 200
+        path, sha = stage(tmp_path, "a.upload", content)
+
+        async def scenario():
+            await store.add(path, sha, len(content))
+            return await store.read(sha)
+
+        assert asyncio.run(scenario()) == content
+        info = store.info(sha)
+        assert info["encoding"] == default_codec()
+        assert info["stored_size"] < len(content) // 5
+        # Records keep the logical key; the bytes sit under the encoded object name
+        local_path, encoding = store.local_file(sha)
+        assert local_path == str(root / object_key(sha, HOT, encoding))
+        assert store.verify_file(local_path, sha, encoding)
+        assert store.stats()["compression_ratio"] > 5
+
+    def test_idle_blobs_move_to_cold_tier_and_back_when_read(self, tmp_path, monkeypatch):
+        store, root = make_store(tmp_path)
+        content = b"Chest X-ray: no acute cardiopulmonary process. " * 100
+        path, sha = stage(tmp_path, "a.upload", content)
+        clock = [1_000_000.0]
+        monkeypatch.setattr(blob_store.time, "time", lambda: clock[0])
+
+        async def scenario():
+            await store.add(path, sha, len(content))
+            clock[0] += 8 * 86400
+            assert await store.retier(cold_after_days=7) == {"demoted": 1, "promoted": 0, "failed": 0}
+            assert store.info(sha)["tier"] == COLD
+            assert not [p for p in (root / BLOB_PREFIX).rglob("*") if p.is_file()]
+            # Reading a cold blob is transparent and marks it as in use again
+            assert await store.read(sha) == content
+            assert await store.retier(cold_after_days=7) == {"demoted": 0, "promoted": 1, "failed": 0}
+
+        asyncio.run(scenario())
+        assert store.info(sha)["tier"] == HOT
+        assert (root / object_key(sha, HOT, store.info(sha)["encoding"])).exists()
+
+    def test_release_many_deletes_only_unreferenced_blobs(self, tmp_path):
+        store, root = make_store(tmp_path)
+
+        async def scenario():
+            shas = []
+            for name, content in [("a", b"cbc"), ("b", b"cbc"), ("c", b"mri"), ("d", b"ecg")]:
+                path, sha = stage(tmp_path, name + ".upload", content)
+                await store.add(path, sha, len(content))
+                shas.append(sha)
+            cbc, _, mri, ecg = shas
+            # One of two cbc references, and both singletons
+            deleted = await store.release_many([cbc, mri, ecg])
+            return cbc, mri, ecg, deleted
+
+        cbc, mri, ecg, deleted = asyncio.run(scenario())
+        assert sorted(deleted) == sorted([mri, ecg])
+        assert store.info(cbc)["refcount"] == 1
+        assert (root / blob_key(cbc)).exists()
+        assert not (root / blob_key(mri)).exists() and not (root / blob_key(ecg)).exists()
+
+    def test_routes_reject_malformed_hashes(self):
+        app = FastAPI()
+        app.include_router(router)
+        client = TestClient(app)
+        response = client.post("/api/medical-records/upload-by-hash",
+                               json={"sha256": "not-a-hash", "file_name": "scan.pdf"})
+        assert response.status_code == 422
+        assert client.get("/api/medical-records/blobs/not-a-hash").status_code == 422
+        assert client.get(f"/api/medical-records/blobs/{'g' * 64}").status_code == 422
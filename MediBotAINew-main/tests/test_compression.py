@@ -0,0 +1,49 @@
+import gzip
+
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from storage.compression import GZIP, IDENTITY, choose_codec, decode_bytes, default_codec, encode_file
+from storage.streaming import stream_decoded_file
+
+class TestCompression:
+
+    def test_codec_follows_file_type(self):
+        assert choose_codec(b"%PDF-1.7\n%\xe2\xe3", 50_000) == default_codec()
+        assert choose_codec(b"Patient: PAT_001", 50_000) == default_codec()
+        # Already compressed formats and tiny files are stored as they are
+        assert choose_codec(b"\x89PNG\r\n\x1a\n", 50_000) == IDENTITY
+        assert choose_codec(b"\xff\xd8\xff\xe0", 50_000) == IDENTITY
+        assert choose_codec(b"PK\x03\x04", 50_000) == IDENTITY
+        assert choose_codec(b"%PDF-1.7", 200) == IDENTITY
+
+    def test_encoded_file_round_trips(self, tmp_path):
+        source = tmp_path / "report.pdf"
+        content = b"%PDF-1.4\nPlatelets 250 x10^3/uL\n" * 500
+        source.write_bytes(content)
+
+        size = encode_file(str(source), str(tmp_path / "report.pdf.gz"), GZIP, 6)
+        assert size == (tmp_path / "report.pdf.gz").stat().st_size < len(content) // 10
+        assert decode_bytes((tmp_path / "report.pdf.gz").read_bytes(), GZIP) == content
+
+    def test_ranges_are_served_from_the_decoded_stream(self, tmp_path):
+        content = bytes(range(256)) * 2048
+        path = tmp_path / "scan.pdf.gz"
+        path.write_bytes(gzip.compress(content))
+
+        app = FastAPI()
+
+        @app.get("/file")
+        def get_file(request: Request):
+            return stream_decoded_file(str(path), GZIP, len(content), "scan.pdf", request.headers, '"abc"')
+
+        client = TestClient(app)
+        full = client.get("/file")
+        assert full.status_code == 200
+        assert full.content == content
+        assert full.headers["content-length"] == str(len(content))
+
+        partial = client.get("/file", headers={"Range": "bytes=300000-300099"})
+        assert partial.status_code == 206
+        assert partial.content == content[300000:300100]
+        assert partial.headers["content-range"] == f"bytes 300000-300099/{len(content)}"
@@ -0,0 +1,45 @@
+import time
+from models.conversation_memory import ConversationMemory, estimate_tokens
+
+class TestConversationMemory:
+
+    def test_recent_turns_kept_verbatim(self):
+        memory = ConversationMemory()
+        memory.add_turn("s1", "user", "What is a normal heart rate?")
+        memory.add_turn("s1", "assistant", "60-100 bpm for adults at rest.")
+
+        context = memory.build_context("s1")
+        assert "User: What is a normal heart rate?" in context
+        assert "Assistant: 60-100 bpm for adults at rest." in context
+
+    def test_context_stays_within_budget(self):
+        """Prompt size must not grow with conversation length"""
+        memory = ConversationMemory(token_budget=300, summary_budget=80, max_recent_turns=4)
+        sizes = []
+        for i in range(200):
+            memory.add_turn("s1", "user", f"Question {i} about blood pressure readings and medication timing?")
+            memory.add_turn("s1", "assistant", f"Answer {i}. " + "Monitor your blood pressure twice daily. " * 5)
+            sizes.append(memory.context_tokens("s1"))
+
+        assert max(sizes) <= 300
+        assert estimate_tokens(memory.build_context("s1")) <= 300 + 20
+        # Older turns are summarized, not lost entirely
+        assert "Earlier in this conversation" in memory.build_context("s1")
+
+    def test_lru_eviction(self):
+        memory = ConversationMemory(max_sessions=2)
+        memory.add_turn("a", "user", "hello doctor")
+        memory.add_turn("b", "user", "hello doctor")
+        memory.add_turn("a", "user", "still here")
+        memory.add_turn("c", "user", "hello doctor")
+
+        assert memory.build_context("b") == ""
+        assert memory.build_context("a") != ""
+
+    def test_idle_sessions_expire(self):
+        memory = ConversationMemory(idle_ttl=0.01)
+        memory.add_turn("old", "user", "hello doctor")
+        time.sleep(0.02)
+        memory.add_turn("new", "user", "hello doctor")
+
+        assert memory.build_context("old") == ""
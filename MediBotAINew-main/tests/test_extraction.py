@@ -0,0 +1,51 @@
+import asyncio
+import hashlib
+import os
+import zlib
+
+from extraction.engine import ExtractionEngine
+from extraction.lab_values import extract_lab_values
+from extraction.pdf_text import extract_pages
+
+SAMPLES = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "mock_documents")
+
+def make_pdf(content: bytes) -> bytes:
+    stream = zlib.compress(content)
+    return (b"%PDF-1.4\n1 0 obj\n<< /Type /Page /Contents 2 0 R >>\nendobj\n"
+            b"2 0 obj\n<< /Filter /FlateDecode /Length " + str(len(stream)).encode() + b" >>\nstream\n"
+            + stream + b"\nendstream\nendobj\n%%EOF")
+
+class TestExtraction:
+
+    def test_table_rows_become_lines(self):
+        pdf = make_pdf(b"BT /F1 10 Tf 1 0 0 1 40 700 Tm (Hemoglobin) Tj ET "
+                       b"BT 1 0 0 1 200 700 Tm (8.5 g/dL) Tj ET "
+                       b"BT 1 0 0 1 300 700 Tm (12.0-16.0) Tj ET "
+                       b"BT 1 0 0 1 40 680 Tm [(Heart) -250 (Rate: 72 bpm)] TJ ET")
+        assert extract_pages(pdf) == ["Hemoglobin  8.5 g/dL  12.0-16.0\nHeart Rate: 72 bpm"]
+
+    def test_lab_values_from_sample_report(self):
+        with open(os.path.join(SAMPLES, "Blood_Test_Report.pdf"), "rb") as f:
+            data = extract_lab_values(extract_pages(f.read())[0])
+        assert (data["wbc"], data["hemoglobin"], data["platelets"]) == (12500, 8.5, 180000)
+        wbc = data["results"][0]
+        assert (wbc["unit"], wbc["reference"], wbc["flag"]) == ("/µL", "4,000-11,000", "HIGH")
+
+        ecg = extract_lab_values("Heart Rate: 85 bpm\nRhythm: Normal Sinus Rhythm\nQTc: 470 ms (Normal: <450 ms)")
+        assert ecg["heart_rate"] == 85 and ecg["rhythm"] == "Normal Sinus Rhythm"
+        assert ecg["results"][-1]["flag"] == "HIGH"
+
+    def test_results_cached_by_content_hash(self, tmp_path):
+        engine = ExtractionEngine(str(tmp_path / "records.db"), workers=1)
+        data = b"Hemoglobin  13.1 g/dL  12.0-16.0"
+        sha = hashlib.sha256(data).hexdigest()
+        try:
+            first = asyncio.run(engine.extract_bytes(data))
+            assert first["lab_values"]["hemoglobin"] == 13.1
+        finally:
+            engine.close()
+
+        # A fresh engine on the same database answers without parsing
+        reopened = ExtractionEngine(str(tmp_path / "records.db"), workers=1)
+        assert reopened.cached(sha) == first
+        assert reopened._executor is None
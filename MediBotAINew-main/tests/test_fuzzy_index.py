@@ -0,0 +1,42 @@
+import pytest
+from fastapi import HTTPException
+
+from enhanced_doctor_assistant import get_clinical_protocol, get_drug_information, lookup
+from utils.fuzzy_index import FuzzyIndex
+
+DRUGS = ["metformin", "metoprolol", "lisinopril", "amlodipine", "cardiac_arrest"]
+
+class TestFuzzyIndex:
+
+    def test_typo_finds_closest_name(self):
+        index = FuzzyIndex(DRUGS)
+        assert index.best("metfromin") == "metformin"
+        assert index.best("lisinoprill") == "lisinopril"
+
+    def test_exact_match_ignores_case_and_separators(self):
+        index = FuzzyIndex(DRUGS)
+        assert index.exact("Cardiac Arrest") == "cardiac_arrest"
+        assert index.best("zebra") is None
+
+    def test_prefix_completion_is_sorted_and_limited(self):
+        index = FuzzyIndex(DRUGS)
+        assert index.complete("met") == ["metformin", "metoprolol"]
+        assert index.complete("met", limit=1) == ["metformin"]
+        assert index.complete("x") == []
+
+class TestCatalogLookup:
+
+    def test_near_miss_drug_never_returns_another_monograph(self):
+        assert lookup("drugs", "fosinopril") == (None, None)
+        answer = get_drug_information("fosinopril")
+        assert "dosing" not in answer and "class" not in answer
+        assert "lisinopril" in answer["did_you_mean"]
+
+        assert get_drug_information("Lisinopril")["class"] == "ACE Inhibitor"
+
+    def test_protocol_miss_is_404_with_suggestions(self):
+        assert get_clinical_protocol("Cardiac Arrest")["matched"] == "cardiac_arrest"
+        with pytest.raises(HTTPException) as error:
+            get_clinical_protocol("sepsys")
+        assert error.value.status_code == 404
+        assert error.value.detail["did_you_mean"][0] == "sepsis"
@@ -0,0 +1,96 @@
+import asyncio
+
+from jobs import job_queue
+from jobs.job_queue import DONE, FAILED, QUEUED, JobQueue
+
+class TestJobQueue:
+
+    def test_jobs_run_in_background_and_record_progress(self, tmp_path):
+        queue = JobQueue(str(tmp_path / "jobs.db"), workers=2)
+
+        async def summarize(payload, set_step):
+            set_step("summarize")
+            await asyncio.sleep(0.01)
+            return {"summary": payload["text"].upper()}
+
+        queue.register("summarize", summarize)
+
+        async def scenario():
+            await queue.start()
+            job = queue.submit("summarize", "MR_1", {"text": "cbc normal"})
+            assert job["status"] == QUEUED
+            done = await queue.wait(job["job_id"])
+            await queue.stop()
+            return done
+
+        done = asyncio.run(scenario())
+        assert done["status"] == DONE
+        assert done["result"] == {"summary": "CBC NORMAL"}
+        assert done["attempts"] == 1
+        assert queue.latest("MR_1")["job_id"] == done["job_id"]
+
+    def test_retries_with_backoff_then_fails(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(job_queue, "RETRY_BASE_SECONDS", 0.01)
+        queue = JobQueue(str(tmp_path / "jobs.db"), max_attempts=3)
+        calls = []
+
+        async def flaky(payload, set_step):
+            calls.append(payload["record_id"])
+            if len(calls) < 2:
+                raise IOError("storage timeout")
+            return "ok"
+
+        async def broken(payload, set_step):
+            raise ValueError("corrupt file")
+
+        queue.register("flaky", flaky)
+        queue.register("broken", broken)
+
+        async def scenario():
+            await queue.start()
+            flaky_job = queue.submit("flaky", "MR_1", {"record_id": "MR_1"})
+            broken_job = queue.submit("broken", "MR_2")
+            results = await asyncio.gather(queue.wait(flaky_job["job_id"]), queue.wait(broken_job["job_id"]))
+            await queue.stop()
+            return results
+
+        flaky_done, broken_done = asyncio.run(scenario())
+        assert (flaky_done["status"], flaky_done["attempts"]) == (DONE, 2)
+        assert (broken_done["status"], broken_done["attempts"]) == (FAILED, 3)
+        assert broken_done["last_error"] == "ValueError: corrupt file"
+
+    def test_pending_jobs_survive_restart(self, tmp_path):
+        db_path = str(tmp_path / "jobs.db")
+        JobQueue(db_path).submit("index", "MR_9", {"record_id": "MR_9"})
+
+        restarted = JobQueue(db_path)
+        seen = []
+
+        async def index(payload, set_step):
+            seen.append(payload["record_id"])
+
+        restarted.register("index", index)
+
+        async def scenario():
+            await restarted.start()
+            job = await restarted.wait(restarted.latest("MR_9")["job_id"])
+            await restarted.stop()
+            return job
+
+        assert asyncio.run(scenario())["status"] == DONE
+        assert seen == ["MR_9"]
+
+    def test_old_finished_jobs_are_pruned_except_each_subjects_latest(self, tmp_path):
+        queue = JobQueue(str(tmp_path / "jobs.db"), retention_days=7)
+        old = [queue.submit("index", subject)["job_id"] for subject in ("MR_1", "MR_1", "MR_2", "MR_3")]
+        for job_id, status in zip(old, (DONE, DONE, FAILED, QUEUED)):
+            queue._update(job_id, status=status)
+        newer = queue.submit("index", "MR_2")["job_id"]
+        queue._update(newer, status=DONE)
+
+        later = queue.get(newer)["updated_at"] + 8 * 86400
+        assert queue.prune(now=later) == 2
+        # MR_1 keeps its latest job; MR_2's old failure goes; queued jobs are never pruned
+        assert [queue.latest(subject)["job_id"] for subject in ("MR_1", "MR_2", "MR_3")] == [old[1], newer, old[3]]
+        assert queue.counts() == {DONE: 2, QUEUED: 1}
+        assert JobQueue(str(tmp_path / "other.db"), retention_days=0).prune(now=later) == 0
@@ -0,0 +1,38 @@
+from utils.keyword_matcher import KeywordMatcher
+from context_filter import is_medical_context
+from chat_endpoint import route_query, blood_pressure_answer, condition_answer
+
+class TestKeywordMatcher:
+
+    def test_finds_overlapping_keywords_in_one_pass(self):
+        matcher = KeywordMatcher([("heart", 1), ("heart rate", 2), ("rate", 3)])
+        assert sorted(matcher.payloads("my heart rate")) == [1, 2, 3]
+        assert matcher.payloads("heart heart rate") == [1, 1, 2, 3]
+
+    def test_word_boundaries(self):
+        matcher = KeywordMatcher([("bp", "bp"), ("lab", "lab")])
+        assert matcher.payloads("subpar label") == []
+        assert matcher.payloads("check my BP, lab results") == ["bp", "lab"]
+
+    def test_plural_suffix_allowed(self):
+        matcher = KeywordMatcher([("medication", "med")])
+        assert matcher.payloads("my medications") == ["med"]
+        assert matcher.payloads("medicationsx") == []
+
+    def test_context_filter(self):
+        assert is_medical_context("What is a normal heart rate?")
+        assert not is_medical_context("What's the weather tomorrow?")
+        # Medical keywords win over non-medical ones
+        assert is_medical_context("Is travel safe with hypertension?")
+
+    def test_intent_priority_matches_legacy_order(self):
+        # Conditions were checked before vital signs
+        is_medical, intent = route_query("my bp and hypertension")
+        assert is_medical
+        assert intent[2] is condition_answer and intent[3] == "hypertension"
+
+        _, intent = route_query("what is normal blood pressure")
+        assert intent[2] is blood_pressure_answer
+
+        _, intent = route_query("subpar results")
+        assert intent is None
@@ -0,0 +1,52 @@
+from knowledge_index import BM25Index, knowledge_passages, retrieve, text_file_passages
+from medical_knowledge import MEDICAL_KNOWLEDGE
+
+PASSAGES = [
+    {"title": "Heart Rate", "text": "Normal resting heart rate is 60-100 bpm", "source": "a"},
+    {"title": "Blood Pressure", "text": "Normal blood pressure is below 120/80 mmHg", "source": "b"},
+    {"title": "Metformin", "text": "Metformin treats type 2 diabetes, 500-2000 mg daily", "source": "c"},
+]
+
+class TestKnowledgeIndex:
+
+    def test_ranks_most_relevant_passage_first(self):
+        index = BM25Index.build(PASSAGES)
+        hits = index.search("metformin dose for diabetes")
+        assert hits[0]["source"] == "c"
+
+    def test_confidence_drops_for_unknown_terms(self):
+        index = BM25Index.build(PASSAGES)
+        known = index.search("heart rate")[0]["confidence"]
+        partly_known = index.search("heart rate zebra migration")[0]["confidence"]
+        assert known == 1.0
+        assert partly_known < known
+        assert index.search("zebra") == []
+
+    def test_memory_mapped_index_matches_in_memory(self, tmp_path):
+        index = BM25Index.build(PASSAGES)
+        path = str(tmp_path / "index.bin")
+        index.save(path)
+
+        loaded = BM25Index.load(path)
+        for query in ["normal heart rate", "blood pressure", "diabetes"]:
+            assert loaded.search(query) == index.search(query)
+
+    def test_knowledge_base_and_text_files_are_chunked(self, tmp_path):
+        (tmp_path / "notes.txt").write_text("Sepsis:\nGive antibiotics within one hour.\n\nSecond paragraph.")
+        passages = text_file_passages(str(tmp_path))
+        assert [p["title"] for p in passages] == ["Sepsis", "Notes"]
+        assert any(p["source"] == "medications.metformin" for p in knowledge_passages())
+
+    def test_off_topic_query_goes_to_the_llm_with_context(self):
+        answer, hits = retrieve("pneumonia treatment")
+        assert answer is None
+        assert hits
+        answer, _ = retrieve("respiratory rate")
+        assert answer["title"] == "Respiratory Rate"
+
+    def test_chart_thresholds_agree_with_the_knowledge_base(self):
+        chart = {p["title"]: p["text"] for p in text_file_passages()}
+        assert MEDICAL_KNOWLEDGE["vital_signs"]["temperature"]["normal"].startswith("36.5-37.5")
+        assert "36.5-37.5 degrees" in chart["Body Temperature"]
+        assert "below 8 or above 30" in chart["Respiratory Rate"]
+        assert "below 8 or above 30" in chart["Medical Emergency Response (MER) Call Criteria"]
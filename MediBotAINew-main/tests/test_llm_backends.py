@@ -0,0 +1,51 @@
+import json
+import os
+import subprocess
+import sys
+import pytest
+from llm import registry
+from llm.registry import get_backend, register_backend, available_backends
+
+class TestLLMBackends:
+
+    def test_backends_are_imported_lazily(self):
+        """Listing backends must not import any SDK"""
+        assert {"ollama", "gemini", "stub"} <= set(available_backends())
+        assert "google.generativeai" not in sys.modules
+
+    def test_importing_the_app_leaves_backend_sdks_unimported(self):
+        """A fresh interpreter, since other tests may already have loaded a backend"""
+        heavy = ["google.generativeai", "ollama", "llm.gemini_backend", "llm.ollama_backend"]
+        script = f"import json, sys, main, gemini_client; print(json.dumps([m for m in {heavy!r} if m in sys.modules]))"
+        result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, timeout=120,
+                                cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        assert result.returncode == 0, result.stderr
+        assert json.loads(result.stdout.strip().splitlines()[-1]) == []
+
+    def test_stub_is_deterministic(self):
+        """Stub returns the same text for the same prompt"""
+        backend = get_backend("stub")
+        assert backend.generate("heart rate 80") == backend.generate("heart rate 80")
+        assert backend.generate("heart rate 80") != backend.generate("heart rate 90")
+
+    def test_stub_json_matches_analysis_shape(self):
+        analysis = json.loads(get_backend("stub").generate("vitals", format="json"))
+        assert analysis["risk_level"] in ("low", "medium", "high")
+
+    def test_stub_streaming_and_batching(self):
+        backend = get_backend("stub")
+        assert "".join(backend.generate("prompt", stream=True)) == backend.generate("prompt")
+        results = backend.generate_batch(["a", "b", "c"])
+        assert results == [backend.generate(p) for p in ["a", "b", "c"]]
+
+    def test_unknown_backend(self):
+        with pytest.raises(ValueError):
+            get_backend("does-not-exist")
+
+    def test_register_custom_backend(self):
+        register_backend("stub-alias", "llm.stub_backend:StubBackend")
+        try:
+            assert get_backend("stub-alias").name == "stub"
+        finally:
+            registry.BACKENDS.pop("stub-alias", None)
+            registry._instances.pop("stub-alias", None)
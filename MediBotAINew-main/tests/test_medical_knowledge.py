@@ -0,0 +1,18 @@
+from medical_knowledge import analyze_vitals_comprehensive, get_medical_response
+
+class TestMedicalEngine:
+
+    def test_scenario_takes_priority_over_vitals_keywords(self):
+        response = get_medical_response("chest pain and low oxygen")
+        assert response.startswith("**CHEST PAIN**")
+
+    def test_missing_vitals_are_skipped(self):
+        result = analyze_vitals_comprehensive({"spo2": 84, "heart_rate": 130})
+        assert len(result["findings"]) == 2
+        assert result["risk_factors"] == ["cardiac", "respiratory"]
+        assert result["risk_level"] == "HIGH"
+
+    def test_normal_vitals_are_low_risk(self):
+        result = analyze_vitals_comprehensive({"heart_rate": 72, "bp": 118, "spo2": 98, "glucose": 95})
+        assert result["risk_level"] == "LOW"
+        assert all(finding.startswith("✅") for finding in result["findings"])
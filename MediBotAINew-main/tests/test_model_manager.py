@@ -0,0 +1,86 @@
+import pytest
+
+from llm import model_manager
+from llm.model_manager import ModelManager
+
+class FakeResponse:
+    def __init__(self, payload=None, status_code=200):
+        self.payload = payload or {}
+        self.status_code = status_code
+
+    def raise_for_status(self):
+        if self.status_code != 200:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+    def json(self):
+        return self.payload
+
+class FakeOllama:
+    """Stands in for the requests module: /api/tags lists `installed`, /api/generate records payloads"""
+
+    def __init__(self, installed, generate_status=200):
+        self.installed = installed
+        self.generate_status = generate_status
+        self.generated = []
+
+    def get(self, url, timeout=None):
+        assert url.endswith("/api/tags")
+        return FakeResponse({"models": [{"name": name} for name in self.installed]})
+
+    def post(self, url, json=None, timeout=None):
+        self.generated.append(json)
+        return FakeResponse({"response": "ok"}, self.generate_status)
+
+@pytest.fixture
+def ollama(monkeypatch):
+    def install(installed, generate_status=200):
+        fake = FakeOllama(installed, generate_status)
+        monkeypatch.setattr(model_manager, "requests", fake)
+        return fake
+    return install
+
+class TestModelManager:
+
+    def test_resolves_only_the_configured_model(self, ollama):
+        ollama(["llama3.2:latest", "phi3:medium", "phi3:latest"])
+        assert ModelManager(model="phi3").resolve_model() == "phi3:latest"
+        assert ModelManager(model="llama3.2:latest").resolve_model() == "llama3.2:latest"
+
+        manager = ModelManager(model="phi3:mini")
+        assert manager.resolve_model() is None
+        status = manager.status()
+        assert status["state"] == "missing" and not status["ready"]
+        assert status["model"] == "phi3:mini"
+        assert "ollama pull phi3:mini" in status["last_error"]
+        with pytest.raises(RuntimeError):
+            manager.generate("hello")
+
+    def test_warm_up_state_transitions(self, ollama):
+        fake = ollama([], generate_status=500)
+        manager = ModelManager(model="phi3:mini", keep_alive="-1")
+        assert manager.resolve_model() is None and manager.state == "missing"
+
+        fake.installed = ["phi3:mini"]
+        assert manager.resolve_model() == "phi3:mini"
+        assert manager.state == "unloaded" and manager.last_error is None
+
+        assert manager.warm_up() is False
+        assert manager.state == "error" and "500" in manager.last_error
+
+        fake.generate_status = 200
+        assert manager.warm_up() is True
+        status = manager.status()
+        assert status["state"] == "ready" and status["last_error"] is None
+        assert status["load_seconds"] is not None
+        assert fake.generated[-1]["options"] == {"num_predict": 1}
+        assert fake.generated[-1]["keep_alive"] == -1
+
+    def test_num_predict_is_capped(self, ollama):
+        fake = ollama(["phi3:mini"])
+        manager = ModelManager(model="phi3:mini", num_predict=256, keep_alive="30m")
+        manager.generate("a")
+        manager.generate("b", num_predict=64)
+        manager.generate("c", num_predict=4096)
+        assert [payload["options"]["num_predict"] for payload in fake.generated] == [256, 64, 256]
+        assert all(payload["keep_alive"] == "30m" for payload in fake.generated)
+        assert manager.state == "ready"
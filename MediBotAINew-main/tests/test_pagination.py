@@ -0,0 +1,42 @@
+import pytest
+from fastapi import HTTPException
+
+from utils.pagination import decode_cursor, encode_cursor, ndjson_lines, page_keys, parse_fields, project
+
+KEYS = [("2024-01-0%d" % day, f"id{day}") for day in range(1, 8)]
+
+class TestPagination:
+
+    def test_ascending_pages_cover_every_key_once(self):
+        seen, after = [], None
+        while True:
+            page, after = page_keys(KEYS, limit=3, after=after)
+            seen += page
+            if after is None:
+                break
+        assert seen == KEYS
+
+    def test_descending_cursor_survives_deleted_item(self):
+        page, next_key = page_keys(KEYS, limit=2, descending=True)
+        assert page == [KEYS[6], KEYS[5]]
+        remaining = [key for key in KEYS if key != next_key]
+        page, _ = page_keys(remaining, limit=2, after=decode_cursor(encode_cursor(next_key)), descending=True)
+        assert page == [KEYS[4], KEYS[3]]
+
+    def test_fields_and_ndjson(self):
+        fields = parse_fields("record_id, test_type,missing")
+        assert project({"record_id": "MR_1", "test_type": "MRI", "notes": "x"}, fields) == {"record_id": "MR_1", "test_type": "MRI"}
+        body = b"".join(ndjson_lines([{"a": 1}, {"a": 2}], None))
+        assert body == b'{"a":1}\n{"a":2}\n'
+        with pytest.raises(HTTPException):
+            decode_cursor("not-a-cursor")
+
+    def test_cursor_must_match_the_key_shape(self):
+        assert decode_cursor(encode_cursor(("2024-01-01", "id1"))) == ("2024-01-01", "id1")
+        assert decode_cursor(encode_cursor(("2024-01-01", 3, "id1")), (str, int, str)) == ("2024-01-01", 3, "id1")
+        for key in ([1, 2], ["2024-01-01"], ["2024-01-01", "id1", "x"], ["2024-01-01", None]):
+            with pytest.raises(HTTPException) as error:
+                decode_cursor(encode_cursor(key))
+            assert error.value.status_code == 400
+        with pytest.raises(HTTPException):
+            decode_cursor(encode_cursor(("2024-01-01", True, "id1")), (str, int, str))
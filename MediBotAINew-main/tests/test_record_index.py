@@ -0,0 +1,66 @@
+import random
+
+from db.database import RecordsStore
+from db.record_index import RecordIndex
+from utils.pagination import page_keys
+
+def random_records(count, seed=11):
+    rng = random.Random(seed)
+    for i in range(count):
+        yield {
+            "record_id": f"MR_{i:04d}", "patient_id": f"PAT_{rng.randrange(8)}", "patient_name": "Test Patient",
+            "test_type": rng.choice(["Blood Test", "X-Ray", "CT Scan", "Urine Test"]),
+            "lab_name": rng.choice(["City Lab", "Metro Imaging", "North Pathology"]),
+            "test_date": f"2024-{rng.randint(1, 3):02d}-{rng.randint(1, 5):02d}"
+        }
+
+class TestRecordIndex:
+
+    def test_matches_sqlite_store(self, tmp_path):
+        records = list(random_records(300))
+        store = RecordsStore(str(tmp_path / "records.db"))
+        store.insert_many(records)
+        index = RecordIndex(records)
+
+        for patient_id in ["PAT_0", "PAT_5", "PAT_missing"]:
+            assert index.patient_history(patient_id) == store.patient_history(patient_id)
+            assert index.list(patient_id) == store.list(patient_id)
+
+        queries = [
+            {"test_type": "test"}, {"test_type": "d te"}, {"lab_name": "METRO", "date_from": "2024-02-01"},
+            {"date_from": "2024-01-03", "date_to": "2024-02-02"}, {"test_type": "ray", "date_to": "2024-01-04"},
+            {"test_type": "-"}, {}
+        ]
+        for query in queries:
+            assert index.search(**query) == store.search(**query), query
+
+    def test_remove_and_replace_keep_indexes_consistent(self):
+        records = list(random_records(50))
+        index = RecordIndex(records)
+        patient_id = records[10]["patient_id"]
+
+        assert index.remove("MR_0010") == records[10]
+        assert index.remove("MR_0010") is None
+        assert all(r["record_id"] != "MR_0010" for r in index.patient_history(patient_id))
+
+        index.add({**records[20], "test_date": "2030-01-01", "test_type": "MRI"})
+        assert index.patient_history(records[20]["patient_id"])[0]["record_id"] == "MR_0020"
+        assert [r["record_id"] for r in index.search(test_type="mri")] == ["MR_0020"]
+        assert len(index) == 49
+
+    def test_same_second_uploads_list_in_upload_order(self, tmp_path):
+        ids = ["MR_f3", "MR_0a", "MR_c7", "MR_5e", "MR_91"]
+        records = [dict(record, record_id=record_id, upload_date="2024-05-01T10:00:00")
+                   for record, record_id in zip(random_records(5), ids)]
+        index = RecordIndex(records[:2])
+        for record in records[2:]:
+            index.add(record)
+
+        page, next_key = page_keys(index.listing_keys(), limit=3)
+        rest, _ = page_keys(index.listing_keys(), after=next_key)
+        assert [key[2] for key in page + rest] == ids
+
+        # Reloading from the store (rowid order) keeps the same order
+        store = RecordsStore(str(tmp_path / "records.db"))
+        store.insert_many(records)
+        assert [key[2] for key in RecordIndex(store.list()).listing_keys()] == ids
@@ -0,0 +1,54 @@
+import asyncio
+import os
+
+import records_import
+from records_import import ImportLog, import_directory, infer_metadata, list_files
+
+class TestRecordsImport:
+
+    def test_metadata_from_folder_and_file_name(self):
+        fields = infer_metadata(os.path.join("PAT_007", "cbc_blood_test_2024-03-05.pdf"))
+        assert fields == {"patient_id": "PAT_007", "test_type": "Blood Test", "test_date": "2024-03-05"}
+
+        # Compact dates work too; an explicit patient ID wins over the folder
+        fields = infer_metadata(os.path.join("scans", "mri_20230117.pdf"), patient_id="PAT_001")
+        assert fields["patient_id"] == "PAT_001"
+        assert fields["test_type"] == "MRI"
+        assert fields["test_date"] == "2023-01-17"
+
+    def test_list_files_skips_hidden_entries(self, tmp_path):
+        (tmp_path / "PAT_002").mkdir()
+        (tmp_path / ".cache").mkdir()
+        for name in ("PAT_002/ecg.pdf", "PAT_002/.DS_Store", ".cache/x.pdf", "a.pdf"):
+            (tmp_path / name).write_bytes(b"%PDF-1.4")
+
+        found = [os.path.relpath(path, tmp_path) for path in list_files(str(tmp_path))]
+        assert found == ["a.pdf", os.path.join("PAT_002", "ecg.pdf")]
+
+    def test_rerun_skips_unchanged_and_reimports_changed_files(self, tmp_path, monkeypatch):
+        source = tmp_path / "in"
+        source.mkdir()
+        for name in ("xray.pdf", "ecg.pdf", "cbc.pdf"):
+            (source / name).write_bytes(name.encode("utf-8"))
+
+        stored = []
+
+        async def fake_import_file(path, file_name, fields, sha256=None, size=None):
+            stored.append(file_name)
+            return {"record_id": f"MR_{len(stored)}", "deduplicated": False}, None
+
+        monkeypatch.setattr(records_import, "import_file", fake_import_file)
+        monkeypatch.setattr(records_import, "get_import_log", lambda: ImportLog(str(tmp_path / "imports.db")))
+
+        def run():
+            return asyncio.run(import_directory(str(source), batch_id="B1", concurrency=2, report=None))
+
+        first = run()
+        assert (first.imported, first.skipped) == (3, 0)
+
+        # Touched but identical content is skipped, edited content is imported again
+        os.utime(source / "xray.pdf", (1, 1))
+        (source / "ecg.pdf").write_bytes(b"ecg v2")
+        second = run()
+        assert (second.imported, second.skipped, second.failed) == (1, 2, 0)
+        assert sorted(stored) == ["cbc.pdf", "ecg.pdf", "ecg.pdf", "xray.pdf"]
@@ -0,0 +1,54 @@
+from db.database import RecordsStore
+
+def make_record(record_id, patient_id, test_type, lab_name, test_date):
+    return {"record_id": record_id, "patient_id": patient_id, "patient_name": "Test Patient",
+            "test_type": test_type, "lab_name": lab_name, "test_date": test_date, "file_path": f"{record_id}.pdf"}
+
+RECORDS = [
+    make_record("MR_1", "PAT_A", "Blood Test", "City Lab", "2024-01-10"),
+    make_record("MR_2", "PAT_A", "X-Ray", "Metro Imaging", "2024-03-02"),
+    make_record("MR_3", "PAT_B", "Blood Test", "Metro Imaging", "2024-02-15"),
+]
+
+class TestRecordsStore:
+
+    def test_records_survive_reopen(self, tmp_path):
+        path = str(tmp_path / "records.db")
+        RecordsStore(path).insert_many(RECORDS)
+
+        reopened = RecordsStore(path)
+        assert reopened.get("MR_2") == RECORDS[1]
+        assert reopened.count() == 3
+        assert reopened.delete("MR_2") == RECORDS[1]
+        assert reopened.get("MR_2") is None
+
+    def test_patient_history_is_newest_first(self, tmp_path):
+        store = RecordsStore(str(tmp_path / "records.db"))
+        store.insert_many(RECORDS)
+        assert [r["record_id"] for r in store.patient_history("PAT_A")] == ["MR_2", "MR_1"]
+        assert [r["record_id"] for r in store.list("PAT_B")] == ["MR_3"]
+
+    def test_search_is_case_insensitive_with_date_range(self, tmp_path):
+        store = RecordsStore(str(tmp_path / "records.db"))
+        store.insert_many(RECORDS)
+        assert [r["record_id"] for r in store.search(test_type="blood")] == ["MR_1", "MR_3"]
+        assert [r["record_id"] for r in store.search(lab_name="METRO", date_from="2024-03-01")] == ["MR_2"]
+        assert store.search(test_type="100%") == []
+
+    def test_write_batch_updates_and_deletes_together(self, tmp_path):
+        store = RecordsStore(str(tmp_path / "records.db"))
+        store.insert_many(RECORDS)
+        retagged = {**RECORDS[0], "test_type": "Lipid Panel"}
+
+        store.write_batch(upserts=[retagged], deletes=["MR_2", "MR_404"])
+        assert store.get("MR_1") == retagged
+        assert store.get("MR_2") is None
+        assert [r["record_id"] for r in store.search(test_type="lipid")] == ["MR_1"]
+        assert store.count() == 2
+
+    def test_updating_a_record_keeps_its_upload_position(self, tmp_path):
+        store = RecordsStore(str(tmp_path / "records.db"))
+        store.insert_many(RECORDS)
+        store.insert({**RECORDS[0], "ai_summary": "Normal CBC"})
+        assert [r["record_id"] for r in store.list()] == ["MR_1", "MR_2", "MR_3"]
+        assert store.get("MR_1")["ai_summary"] == "Normal CBC"
@@ -0,0 +1,99 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import reports_agent
+from db import reports_repository
+from db.reports_repository import ReportsRepository, needs_content
+
+def report(report_id: str, date: str, text: str = "") -> dict:
+    return {"id": report_id, "name": f"{report_id}.pdf", "date": date, "status": "pending", "file_content": text}
+
+class TestReportsRepository:
+
+    def test_lookup_order_and_update(self, tmp_path):
+        repo = ReportsRepository(str(tmp_path / "spill.db"))
+        repo.add(report("b", "2024-02-01", "second"))
+        repo.add(report("a", "2024-01-01", "first"))
+        repo.add(report("c", "2024-03-01", "third"))
+
+        assert [metadata["id"] for metadata in repo.newest()] == ["c", "b", "a"]
+        assert repo.get("a")["file_content"] == "first"
+        assert "file_content" not in repo.get("a", with_content=False)
+        assert repo.get("missing") is None
+
+        assert repo.update("a", status="analyzed")["status"] == "analyzed"
+        assert repo.update("missing", status="analyzed") is None
+        assert repo.version.value == 4
+
+    def test_texts_spill_past_the_cap_and_read_back(self, tmp_path):
+        repo = ReportsRepository(str(tmp_path / "spill.db"), memory_limit=20_000)
+        for i in range(100):
+            repo.add(report(f"r{i:03d}", "2024-01-01", f"text {i} " + "x" * 1000))
+
+        stats = repo.stats()
+        assert stats["content_bytes_in_memory"] <= 20_000
+        assert stats["contents_spilled"] > 80 and stats["spill_writes"] < stats["contents_spilled"]
+
+        reports = repo.get_many([f"r{i:03d}" for i in range(100)])
+        assert [r["file_content"].split()[1] for r in reports] == [str(i) for i in range(100)]
+        assert repo.stats()["spill_reads"] == 1
+
+    def test_replacing_a_report_keeps_accounting_straight(self, tmp_path):
+        repo = ReportsRepository(str(tmp_path / "spill.db"))
+        repo.add(report("a", "2024-01-01", "x" * 500))
+        before = repo.stats()
+        repo.add(report("a", "2024-01-01", "x" * 500))
+        assert repo.stats() == before
+        assert [report_id for _, _, report_id in repo.keys] == ["a"]
+        assert needs_content(None) and needs_content(["file_content"]) and not needs_content(["id"])
+
+    def test_oldest_uploads_are_evicted_past_the_count_cap(self, tmp_path):
+        repo = ReportsRepository(str(tmp_path / "spill.db"), memory_limit=3000, max_reports=5)
+        for i in range(8):
+            repo.add(report(f"r{i}", f"2024-01-{8 - i:02d}", "x" * 1000))
+        repo.add(report("r4", "2024-02-01", "replaced"))
+
+        assert [metadata["id"] for metadata in repo.newest()] == ["r4", "r3", "r5", "r6", "r7"]
+        assert "r0" not in repo and repo.get("r0") is None
+        stats = repo.stats()
+        assert stats["reports"] == 5 and stats["evicted"] == 3
+        assert stats["contents_in_memory"] + stats["contents_spilled"] == 5
+        _, changes = repo.version.since(0)
+        assert ("delete", "r0") in [(op, key) for _, op, key, _ in changes]
+
+        assert repo.remove("r3")["id"] == "r3" and repo.remove("r3") is None
+        assert [key[2] for key in repo.keys] == ["r7", "r6", "r5", "r4"]
+
+    def test_same_day_reports_list_newest_upload_first(self, tmp_path):
+        repo = ReportsRepository(str(tmp_path / "spill.db"))
+        for report_id in ("ef", "1c", "d1", "68", "aa"):
+            repo.add(report(report_id, "2024-05-01"))
+        repo.add(report("old", "2024-04-30"))
+        assert [metadata["id"] for metadata in repo.newest()] == ["aa", "68", "d1", "1c", "ef", "old"]
+
+    def test_image_upload_stores_no_decoded_text(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(reports_repository, "reports_repository", ReportsRepository(str(tmp_path / "spill.db")))
+        app = FastAPI()
+        app.include_router(reports_agent.router)
+        image = b"\x89PNG\r\n\x1a\n\x00\xff\xfe Hemoglobin 9.1 g/dL \x00\x01"
+
+        response = TestClient(app).post("/api/reports/upload", files={"file": ("blood_panel.png", image, "image/png")})
+        assert response.status_code == 200
+        stored = reports_repository.get_reports_repository().get(response.json()["report_id"])
+        assert stored["file_content"] == ""
+        assert stored["data_source"] == "generated" and stored["pages"] == 0
+
+    def test_paged_listing_returns_the_cursor_in_the_body(self, tmp_path, monkeypatch):
+        repo = ReportsRepository(str(tmp_path / "spill.db"))
+        for i in range(5):
+            repo.add(report(f"r{i}", "2024-05-01"))
+        monkeypatch.setattr(reports_repository, "reports_repository", repo)
+        app = FastAPI()
+        app.include_router(reports_agent.router)
+        client = TestClient(app)
+
+        first = client.get("/api/reports", params={"limit": 3, "fields": "id"}).json()
+        assert first["total"] == 5 and [r["id"] for r in first["reports"]] == ["r4", "r3", "r2"]
+        rest = client.get("/api/reports", params={"limit": 3, "fields": "id", "after": first["next_after"]}).json()
+        assert [r["id"] for r in rest["reports"]] == ["r1", "r0"] and rest["next_after"] is None
+        assert len(client.get("/api/reports").json()) == 5
@@ -0,0 +1,78 @@
+import asyncio
+import time
+
+import pytest
+
+from storage.backends import LocalStorageBackend, SupabaseStorageBackend
+from storage.memory_client import InMemoryStorageClient
+
+@pytest.fixture(params=["local", "supabase"])
+def backend(request, tmp_path):
+    if request.param == "local":
+        backend = LocalStorageBackend(str(tmp_path / "files"))
+    else:
+        backend = SupabaseStorageBackend(InMemoryStorageClient(), max_workers=4)
+    yield backend
+    backend.close()
+
+class TestStorageBackends:
+
+    def test_conformance(self, backend, tmp_path):
+        source = tmp_path / "scan.upload"
+        source.write_bytes(b"%PDF chest x-ray")
+
+        async def scenario():
+            await backend.put_file(str(source), "blobs/ab/scan", move=True)
+            await backend.put_bytes(b"ecg", "reports/ecg.pdf")
+            assert await backend.get_bytes("blobs/ab/scan") == b"%PDF chest x-ray"
+            assert await backend.exists("reports/ecg.pdf")
+            assert await backend.public_url("reports/ecg.pdf") == await backend.public_url("reports/ecg.pdf")
+
+            await backend.delete("reports/ecg.pdf")
+            await backend.delete("reports/ecg.pdf")
+            assert not await backend.exists("reports/ecg.pdf")
+            with pytest.raises(FileNotFoundError):
+                await backend.get_bytes("reports/ecg.pdf")
+
+        asyncio.run(scenario())
+        assert not source.exists()
+
+    def test_delete_many(self, backend):
+        async def scenario():
+            for i in range(5):
+                await backend.put_bytes(b"report", f"reports/{i}.pdf")
+            await backend.delete_many(["reports/0.pdf", "reports/1.pdf", "reports/2.pdf", "reports/missing.pdf"])
+            return [await backend.exists(f"reports/{i}.pdf") for i in range(5)]
+
+        assert asyncio.run(scenario()) == [False, False, False, True, True]
+        if isinstance(backend, SupabaseStorageBackend):
+            # 5 uploads, then a single bulk remove, then the existence checks
+            assert backend.client.calls == 5 + 1 + 5
+
+    def test_supabase_calls_are_bounded_and_urls_cached(self):
+        client = InMemoryStorageClient(latency=0.02)
+        backend = SupabaseStorageBackend(client, max_workers=3)
+
+        async def scenario():
+            await asyncio.gather(*(backend.put_bytes(b"x", f"r/{i}") for i in range(12)))
+            for _ in range(5):
+                await backend.public_url("r/0")
+
+        asyncio.run(scenario())
+        backend.close()
+        assert client.max_in_flight == 3
+        assert client.calls == 12 + 1
+
+    def test_event_loop_stays_responsive(self):
+        backend = SupabaseStorageBackend(InMemoryStorageClient(latency=0.2), max_workers=2)
+
+        async def scenario():
+            download = asyncio.create_task(backend.put_bytes(b"mri", "r/mri"))
+            started = time.perf_counter()
+            await asyncio.sleep(0.01)
+            stalled = time.perf_counter() - started
+            await download
+            return stalled
+
+        assert asyncio.run(scenario()) < 0.1
+        backend.close()
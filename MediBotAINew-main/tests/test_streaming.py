@@ -0,0 +1,65 @@
+import pytest
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.testclient import TestClient
+
+from storage.streaming import parse_range, stream_file
+
+def make_client(path, file_name="scan.pdf"):
+    app = FastAPI()
+
+    @app.get("/file")
+    def get_file(request: Request):
+        return stream_file(str(path), file_name, request.headers)
+
+    return TestClient(app)
+
+class TestStreaming:
+
+    def test_parse_range_forms(self):
+        assert parse_range("bytes=0-9", 100) == (0, 9)
+        assert parse_range("bytes=90-", 100) == (90, 99)
+        assert parse_range("bytes=-10", 100) == (90, 99)
+        assert parse_range("bytes=0-1,5-6", 100) is None
+        with pytest.raises(HTTPException):
+            parse_range("bytes=100-", 100)
+
+    def test_full_and_partial_responses(self, tmp_path):
+        path = tmp_path / "scan.pdf"
+        path.write_bytes(bytes(range(256)) * 1024)
+        client = make_client(path)
+
+        full = client.get("/file")
+        assert full.status_code == 200
+        assert full.headers["content-type"] == "application/pdf"
+        assert full.content == path.read_bytes()
+
+        part = client.get("/file", headers={"Range": "bytes=1000-1999"})
+        assert part.status_code == 206
+        assert part.headers["content-range"] == f"bytes 1000-1999/{256 * 1024}"
+        assert part.content == path.read_bytes()[1000:2000]
+
+    def test_etag_revalidation(self, tmp_path):
+        path = tmp_path / "scan.pdf"
+        path.write_bytes(b"%PDF-1.4 test")
+        client = make_client(path)
+
+        etag = client.get("/file").headers["etag"]
+        assert client.get("/file", headers={"If-None-Match": etag}).status_code == 304
+        # A stale If-Range turns the range request into a full response
+        stale = client.get("/file", headers={"Range": "bytes=0-3", "If-Range": '"old"'})
+        assert stale.status_code == 200
+
+    def test_non_ascii_and_quoted_file_names(self, tmp_path):
+        path = tmp_path / "scan.pdf"
+        path.write_bytes(b"%PDF-1.4 test")
+
+        response = make_client(path, "血液検査 🩸.pdf").get("/file")
+        assert response.status_code == 200
+        assert response.headers["content-disposition"] == (
+            "inline; filename=\"____ _.pdf\"; "
+            "filename*=UTF-8''%E8%A1%80%E6%B6%B2%E6%A4%9C%E6%9F%BB%20%F0%9F%A9%B8.pdf"
+        )
+
+        response = make_client(path, 'lab "final" \\ v2.pdf').get("/file")
+        assert response.status_code == 200
+        assert response.headers["content-disposition"] == 'inline; filename="lab \\"final\\" \\\\ v2.pdf"'
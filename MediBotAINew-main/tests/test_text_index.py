@@ -0,0 +1,45 @@
+from db.text_index import RecordTextIndex, parse_query
+
+def record(record_id, test_type, lab_name="City Lab", notes="", file_name="report.pdf"):
+    return {"record_id": record_id, "patient_id": "PAT_1", "patient_name": "Maria Garcia",
+            "test_type": test_type, "lab_name": lab_name, "file_name": file_name, "notes": notes}
+
+def build():
+    index = RecordTextIndex()
+    index.add(record("MR_1", "Blood Test", notes="follow up anemia"),
+              "Hemoglobin 8.5 g/dL LOW. Findings suggest iron deficiency anemia.")
+    index.add(record("MR_2", "Blood Test", file_name="Hematology_Panel.pdf"), "Hemoglobin 14.1 g/dL normal")
+    index.add(record("MR_3", "Chest X-Ray", lab_name="Metro Imaging"), "Right lower lobe pneumonia, iron lung")
+    return index
+
+class TestRecordTextIndex:
+
+    def test_words_prefix_and_phrase(self):
+        index = build()
+        assert parse_query('hemo* "iron deficiency" the') == [("prefix", "hemo"), ("phrase", ["iron", "deficiency"])]
+
+        assert index.search("hemoglobin")[0] == 2
+        assert index.search("anemia")[1][0][0] == "MR_1"
+        assert {r for r, _ in index.search("hem*")[1]} == {"MR_1", "MR_2"}
+        assert [r for r, _ in index.search('"iron deficiency"')[1]] == ["MR_1"]
+        assert index.search('"deficiency iron"') == (0, [])
+        assert [r for r, _ in index.search("hematology")[1]] == ["MR_2"]
+        assert index.search("pneumonia hemoglobin") == (0, [])
+
+    def test_ranking_and_filters(self):
+        index = build()
+        total, hits = index.search("iron")
+        assert total == 2 and hits[0][1] >= hits[1][1]
+        assert index.search("iron", record_ids=["MR_3"])[1][0][0] == "MR_3"
+        assert index.search("iron", limit=1)[0] == 2
+
+    def test_incremental_updates(self):
+        index = build()
+        index.remove("MR_3")
+        assert index.search("pneumonia") == (0, [])
+        assert "pneumonia" not in index.vocabulary
+
+        index.add(record("MR_2", "Blood Test"), "ferritin low")
+        assert index.search("hemoglobin")[0] == 1
+        assert [r for r, _ in index.search("ferr*")[1]] == ["MR_2"]
+        assert len(index) == 2
@@ -0,0 +1,34 @@
+import asyncio
+import hashlib
+import io
+
+import pytest
+from fastapi import HTTPException, UploadFile
+
+from storage.uploads import UploadHead, read_upload, save_upload
+
+PAYLOAD = bytes(range(256)) * 4096  # 1 MB
+
+def make_upload(data=PAYLOAD):
+    return UploadFile(file=io.BytesIO(data), filename="scan.pdf")
+
+class TestUploads:
+
+    def test_save_upload_hashes_while_streaming(self, tmp_path):
+        dest = tmp_path / "scan.pdf"
+        result = asyncio.run(save_upload(make_upload(), str(dest), chunk_size=64 * 1024))
+        assert result == {"size": len(PAYLOAD), "sha256": hashlib.sha256(PAYLOAD).hexdigest()}
+        assert dest.read_bytes() == PAYLOAD
+
+    def test_oversized_upload_is_rejected_and_cleaned_up(self, tmp_path):
+        dest = tmp_path / "scan.pdf"
+        with pytest.raises(HTTPException) as error:
+            asyncio.run(save_upload(make_upload(), str(dest), max_bytes=100_000, chunk_size=64 * 1024))
+        assert error.value.status_code == 413
+        assert list(tmp_path.iterdir()) == []
+
+    def test_head_sink_keeps_only_prefix(self):
+        head = UploadHead(10)
+        result = asyncio.run(read_upload(make_upload(PAYLOAD[:100]), head, chunk_size=7))
+        assert bytes(head.data) == PAYLOAD[:10]
+        assert result["size"] == 100
@@ -0,0 +1,94 @@
+import json
+
+from utils.versioned import ChangeLog, CollectionVersion, VersionedResponses, changes_response
+
+class TestVersionedResponses:
+
+    def setup_method(self):
+        self.version = CollectionVersion()
+        self.responses = VersionedResponses("items")
+        self.builds = 0
+
+    def build(self):
+        self.builds += 1
+        return {"items": [1, 2, 3], "builds": self.builds}, {"X-Next-Cursor": "abc"}
+
+    def test_matching_etag_gets_304_without_building(self):
+        first = self.responses.respond({}, self.version.value, "", self.build)
+        assert first.status_code == 200
+        assert json.loads(first.body)["items"] == [1, 2, 3]
+        assert first.headers["x-next-cursor"] == "abc"
+
+        again = self.responses.respond({"if-none-match": first.headers["etag"]}, self.version.value, "", self.build)
+        assert again.status_code == 304
+        assert again.headers["etag"] == first.headers["etag"]
+        assert self.builds == 1
+
+    def test_body_cached_until_version_bumps(self):
+        self.responses.respond({}, self.version.value, "", self.build)
+        cached = self.responses.respond({}, self.version.value, "", self.build)
+        assert json.loads(cached.body)["builds"] == 1
+        assert self.responses.hits == 1
+
+        old_etag = cached.headers["etag"]
+        self.version.bump()
+        fresh = self.responses.respond({"if-none-match": old_etag}, self.version.value, "", self.build)
+        assert fresh.status_code == 200
+        assert json.loads(fresh.body)["builds"] == 2
+        assert fresh.headers["etag"] != old_etag
+
+    def test_variants_have_their_own_etags_and_bodies(self):
+        page1 = self.responses.respond({}, self.version.value, "page1", self.build)
+        page2 = self.responses.respond({"if-none-match": page1.headers["etag"]}, self.version.value, "page2", self.build)
+        assert page2.status_code == 200
+        assert page1.headers["etag"] != page2.headers["etag"]
+        assert self.builds == 2
+
+class TestChangeLog:
+
+    def setup_method(self):
+        self.log = ChangeLog(max_events=5)
+        self.items = {}
+
+    def put(self, key, value):
+        op = "update" if key in self.items else "insert"
+        self.items[key] = {"id": key, "value": value}
+        self.log.record(op, key, self.items[key])
+
+    def delete(self, key):
+        del self.items[key]
+        self.log.record("delete", key)
+
+    def changes(self, since=None, epoch=None):
+        return changes_response(self.log, since, epoch, lambda: list(self.items.values()))
+
+    def test_delta_has_latest_change_per_key(self):
+        self.put("a", 1)
+        seen = self.log.value
+        self.put("b", 1)
+        self.put("b", 2)
+        self.put("a", 2)
+        self.delete("a")
+
+        body = self.changes(seen, self.log.epoch)
+        assert body["reset"] is False and body["seq"] == 5
+        assert [(c["op"], c["id"]) for c in body["changes"]] == [("insert", "b"), ("delete", "a")]
+        assert body["changes"][0]["item"]["value"] == 2
+        assert self.changes(5, self.log.epoch)["changes"] == []
+
+    def test_first_sync_and_other_epoch_get_snapshot(self):
+        self.put("a", 1)
+        first = self.changes()
+        assert first["reset"] is True and first["snapshot"] == [{"id": "a", "value": 1}]
+        assert self.changes(1, self.log.epoch)["changes"] == []
+        assert self.changes(1, "some-old-epoch")["reset"] is True
+        assert self.changes(7, self.log.epoch)["reset"] is True
+
+    def test_client_behind_the_bounded_log_gets_snapshot(self):
+        for i in range(7):
+            self.put(f"k{i}", i)
+        assert len(self.log.events) == 5
+        # Events 3..7 are still there: a client at 2 can catch up, one at 1 can't
+        assert self.changes(2, self.log.epoch)["reset"] is False
+        behind = self.changes(1, self.log.epoch)
+        assert behind["reset"] is True and len(behind["snapshot"]) == 7
@@ -0,0 +1,51 @@
+import hashlib
+import io
+import zipfile
+
+from storage.zip_stream import HashingReader, zip_chunks, zip_date_time
+
+def entry(name, content, date="2024-03-05"):
+    return name, len(content), zip_date_time(date), lambda: io.BytesIO(content)
+
+class TestZipStream:
+
+    def test_archive_round_trips(self):
+        report = b"%PDF-1.4 " + b"Hemoglobin 13.5 g/dL\n" * 2000
+        scan = bytes(range(256)) * 64
+        archive = b"".join(zip_chunks([entry("records/cbc.pdf", report), entry("records/scan.png", scan),
+                                       entry("manifest.json", b'{"files": 2}')]))
+
+        with zipfile.ZipFile(io.BytesIO(archive)) as z:
+            assert z.testzip() is None
+            assert z.namelist() == ["records/cbc.pdf", "records/scan.png", "manifest.json"]
+            assert z.read("records/cbc.pdf") == report
+            assert z.read("records/scan.png") == scan
+            # PDFs are deflated, images stored as they are
+            assert z.getinfo("records/cbc.pdf").compress_type == zipfile.ZIP_DEFLATED
+            assert z.getinfo("records/scan.png").compress_type == zipfile.ZIP_STORED
+            assert z.getinfo("records/cbc.pdf").date_time == (2024, 3, 5, 0, 0, 0)
+
+    def test_members_are_emitted_incrementally(self):
+        opened = []
+
+        def entries():
+            for i in range(3):
+                opened.append(i)
+                yield entry(f"records/{i}.png", bytes([i]) * 200_000)
+
+        chunks = zip_chunks(entries(), chunk_size=16 * 1024)
+        first = next(chunks)
+        # Output starts before later members are even opened
+        assert first and opened == [0]
+        sizes = [len(first)] + [len(chunk) for chunk in chunks]
+        assert max(sizes) < 64 * 1024
+        assert opened == [0, 1, 2]
+
+    def test_hashing_reader_and_date_bounds(self):
+        reader = HashingReader(io.BytesIO(b"ecg trace"))
+        with reader:
+            while reader.read(4):
+                pass
+        assert reader.hexdigest() == hashlib.sha256(b"ecg trace").hexdigest()
+        assert zip_date_time("1975-06-01") == (1980, 1, 1, 0, 0, 0)
+        assert zip_date_time("2024-01-02 03:04:05") == (2024, 1, 2, 3, 4, 5)
@@ -0,0 +1,101 @@
+# utils/fuzzy_index.py
+"""
+Trigram index for typo-tolerant name lookups plus sorted-prefix autocomplete
+"""
+import math
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from itertools import chain
+
+# Minimum trigram similarity for a fuzzy match (same default as PostgreSQL pg_trgm)
+MIN_SIMILARITY = 0.3
+
+def normalize_name(name: str) -> str:
+    return " ".join(name.lower().replace("_", " ").replace("-", " ").split())
+
+def trigrams(text: str) -> set:
+    """Padded character trigrams per word, so word starts weigh more than middles"""
+    grams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+class FuzzyIndex:
+    """
+    Built once from catalog keys. Lookups only touch names that share at least
+    one trigram with the query, and autocomplete is a binary search over the
+    sorted names, so neither scans the whole catalog.
+    """
+
+    def __init__(self, keys):
+        self.keys = []
+        self.names = []
+        self.gram_sizes = []
+        self.by_name = {}
+        self.postings = defaultdict(list)
+
+        for key in keys:
+            name = normalize_name(key)
+            if name in self.by_name:
+                continue
+            key_id = len(self.keys)
+            grams = trigrams(name)
+            self.keys.append(key)
+            self.names.append(name)
+            self.gram_sizes.append(len(grams))
+            self.by_name[name] = key_id
+            for gram in grams:
+                self.postings[gram].append(key_id)
+
+        # (name, key_id) sorted by name for prefix search
+        self.sorted_names = sorted((name, key_id) for key_id, name in enumerate(self.names))
+
+    def __len__(self):
+        return len(self.keys)
+
+    def exact(self, query: str):
+        key_id = self.by_name.get(normalize_name(query))
+        return None if key_id is None else self.keys[key_id]
+
+    def search(self, query: str, limit: int = 5, min_similarity: float = MIN_SIMILARITY) -> list:
+        """(key, similarity) pairs, best first; similarity is trigram Jaccard"""
+        query_grams = trigrams(normalize_name(query))
+        if not query_grams:
+            return []
+
+        # Posting lists are counted in C by Counter; only names sharing enough
+        # trigrams to reach min_similarity (Jaccard >= t needs >= t * |Q|) are scored
+        shared = Counter(chain.from_iterable(self.postings.get(gram, ()) for gram in query_grams))
+        needed = math.ceil(min_similarity * len(query_grams))
+        sizes = self.gram_sizes
+
+        scored = []
+        for key_id, count in shared.items():
+            if count >= needed:
+                similarity = count / (len(query_grams) + sizes[key_id] - count)
+                if similarity >= min_similarity:
+                    scored.append((similarity, key_id))
+
+        scored.sort(key=lambda item: (-item[0], self.names[item[1]]))
+        return [(self.keys[key_id], round(similarity, 3)) for similarity, key_id in scored[:limit]]
+
+    def best(self, query: str):
+        """Exact key if there is one, otherwise the closest fuzzy match or None"""
+        key = self.exact(query)
+        if key is not None:
+            return key
+        matches = self.search(query, limit=1)
+        return matches[0][0] if matches else None
+
+    def complete(self, prefix: str, limit: int = 10) -> list:
+        prefix = normalize_name(prefix)
+        if not prefix:
+            return []
+        start = bisect_left(self.sorted_names, (prefix,))
+        keys = []
+        for name, key_id in self.sorted_names[start:start + limit]:
+            if not name.startswith(prefix):
+                break
+            keys.append(self.keys[key_id])
+        return keys
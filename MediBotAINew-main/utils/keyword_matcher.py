@@ -0,0 +1,88 @@
+# utils/keyword_matcher.py
+"""
+Aho-Corasick keyword matcher - finds every keyword of a table in one pass over the text
+"""
+import re
+from collections import deque
+
+TOKEN_RE = re.compile(r"\w+")
+
+class KeywordMatcher:
+    """
+    Built once from (keyword, payload) pairs; a keyword may carry several payloads.
+
+    The automaton runs over words rather than characters: the text is tokenized
+    once by a compiled regex and multi-word keywords ("blood pressure") are
+    paths in a word trie. Matches therefore always sit on word boundaries, so
+    "bp" does not match inside "subpar". A trailing plural "s" is accepted
+    ("medications" matches "medication").
+    """
+
+    def __init__(self, entries):
+        # Trie stored as parallel lists indexed by node id
+        self.goto = [{}]
+        self.fail = [0]
+        self.outputs = [[]]
+        self.vocabulary = set()
+
+        for keyword, payload in entries:
+            self._add(keyword, payload)
+        self._build_failure_links()
+
+    def _add(self, keyword: str, payload):
+        words = TOKEN_RE.findall(keyword.lower())
+        node = 0
+        for word in words:
+            self.vocabulary.add(word)
+            next_node = self.goto[node].get(word)
+            if next_node is None:
+                next_node = len(self.goto)
+                self.goto[node][word] = next_node
+                self.goto.append({})
+                self.fail.append(0)
+                self.outputs.append([])
+            node = next_node
+        self.outputs[node].append((" ".join(words), payload))
+
+    def _build_failure_links(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for word, child in self.goto[node].items():
+                queue.append(child)
+                fallback = self.fail[node]
+                while fallback and word not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(word, 0)
+                self.fail[child] = target if target != child else 0
+                # Inherit matches that end at the failure state
+                self.outputs[child] = self.outputs[child] + self.outputs[self.fail[child]]
+
+    def matches(self, text: str) -> list:
+        """All (keyword, payload) matches, in text order"""
+        goto, fail, outputs, vocabulary = self.goto, self.fail, self.outputs, self.vocabulary
+        found = []
+        node = 0
+
+        for word in TOKEN_RE.findall(text.lower()):
+            if word not in vocabulary:
+                if word[-1] == "s" and word[:-1] in vocabulary:
+                    word = word[:-1]
+                else:
+                    # No keyword contains this word, restart from the root
+                    node = 0
+                    continue
+
+            while node and word not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(word, 0)
+
+            if outputs[node]:
+                found.extend(outputs[node])
+        return found
+
+    def payloads(self, text: str) -> list:
+        return [payload for _, payload in self.matches(text)]
+
+    def contains_any(self, text: str) -> bool:
+        return bool(self.matches(text))
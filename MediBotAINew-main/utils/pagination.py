@@ -0,0 +1,87 @@
+# utils/pagination.py
+"""
+Keyset pagination, sparse fieldsets and NDJSON streaming for list endpoints
+
+Paged responses carry the next cursor in the body as `next_after` (null on the
+last page), never in a header, so it survives cached 304s and proxies.
+"""
+import base64
+import json
+from bisect import bisect_left, bisect_right
+
+from fastapi import HTTPException
+
+MAX_PAGE_SIZE = 1000
+
+# Items serialized per chunk when streaming NDJSON
+NDJSON_BATCH = 500
+
+def encode_cursor(key: tuple) -> str:
+    """Opaque cursor for a sort key; stays valid if the item it points at is deleted"""
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode("utf-8")).decode("ascii").rstrip("=")
+
+def _matches(value, kind) -> bool:
+    # bool is an int subclass but never part of a sort key
+    return isinstance(value, kind) and not isinstance(value, bool)
+
+def decode_cursor(cursor: str, shape: tuple = (str, str)) -> tuple:
+    """
+    Sort key from a cursor. shape lists the key's element types; anything else
+    is a 400, since a mistyped key would fail comparisons in bisect.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if not isinstance(key, list) or len(key) != len(shape):
+            raise ValueError("cursor is not a key")
+        if not all(_matches(value, kind) for value, kind in zip(key, shape)):
+            raise ValueError("cursor has the wrong element types")
+        return tuple(key)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def clamp_limit(limit):
+    if limit is None:
+        return None
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+def parse_fields(fields: str = None):
+    """'record_id,test_type' -> ['record_id', 'test_type']; None means every field"""
+    if not fields:
+        return None
+    return [field.strip() for field in fields.split(",") if field.strip()]
+
+def project(item: dict, fields) -> dict:
+    if fields is None:
+        return item
+    return {field: item[field] for field in fields if field in item}
+
+def page_keys(keys: list, limit=None, after: tuple = None, descending: bool = False):
+    """
+    Slice an ascending list of sort keys after a cursor key.
+
+    Returns (page_keys, next_key); next_key is None on the last page. With
+    descending=True the list is walked from the end, still via binary search.
+    """
+    if descending:
+        end = bisect_left(keys, after) if after is not None else len(keys)
+        start = 0 if limit is None else max(0, end - limit)
+        page = keys[start:end][::-1]
+        has_more = start > 0
+    else:
+        start = bisect_right(keys, after) if after is not None else 0
+        end = len(keys) if limit is None else start + limit
+        page = keys[start:end]
+        has_more = end < len(keys)
+    return page, (page[-1] if has_more and page else None)
+
+def ndjson_lines(items, fields=None):
+    """Encode items as newline-delimited JSON, yielding a chunk per batch"""
+    batch = []
+    for item in items:
+        batch.append(json.dumps(project(item, fields), separators=(",", ":")))
+        if len(batch) >= NDJSON_BATCH:
+            yield ("\n".join(batch) + "\n").encode("utf-8")
+            batch = []
+    if batch:
+        yield ("\n".join(batch) + "\n").encode("utf-8")
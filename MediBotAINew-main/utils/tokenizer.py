@@ -0,0 +1,25 @@
+# utils/tokenizer.py
+"""
+Shared tokenizer for the search indexes
+"""
+import re
+
+TOKEN_RE = re.compile(r"\w+")
+
+STOPWORDS = {
+    "a", "about", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does", "explain", "for", "from",
+    "how", "i", "if", "in", "is", "it", "its", "me", "my", "of", "on", "or", "please", "should",
+    "tell", "that", "the", "this", "to", "was", "what", "when", "which", "with", "you", "your"
+}
+
+def normalize(token: str) -> str:
+    """Very light stemming: fold simple plurals so "readings" matches "reading" """
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+def tokenize(text: str, keep_stopwords: bool = False) -> list:
+    tokens = TOKEN_RE.findall(text.lower())
+    if keep_stopwords:
+        return [normalize(t) for t in tokens]
+    return [normalize(t) for t in tokens if t not in STOPWORDS]
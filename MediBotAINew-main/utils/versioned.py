@@ -0,0 +1,183 @@
+# utils/versioned.py
+"""
+Versioned collections - ETag / If-None-Match and per-version response caching
+
+Each collection keeps a counter that goes up on every change. A GET response
+is identified by (collection version, query), which is all the ETag needs:
+  - If-None-Match with the current ETag -> 304 without reading the collection
+  - otherwise the serialized body is cached for that version, so repeated
+    polls of an unchanged collection skip rebuilding and re-encoding it
+A ChangeLog also keeps the last changes themselves, so GET .../changes?since=
+can send a client only what happened after the sequence number it has seen.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from itertools import islice
+
+from dotenv import load_dotenv
+from fastapi.responses import Response
+
+from storage.streaming import etag_matches
+from utils.pagination import project
+
+load_dotenv()
+
+# Distinct (query) variants kept per collection, e.g. different pages or fieldsets
+MAX_CACHED_VARIANTS = 256
+# Changes kept per collection; clients further behind get a full snapshot instead
+CHANGE_LOG_SIZE = int(os.getenv("CHANGE_LOG_SIZE", "10000"))
+
+class CollectionVersion:
+    """Monotonic change counter; bump() after every write to the collection"""
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def bump(self) -> int:
+        with self._lock:
+            self.value += 1
+            return self.value
+
+class ChangeLog(CollectionVersion):
+    """
+    CollectionVersion that remembers its last max_events changes. The version
+    is the sequence number: event n is the change that took it from n-1 to n.
+    """
+
+    def __init__(self, max_events: int = CHANGE_LOG_SIZE):
+        super().__init__()
+        # Sequence numbers restart with the process; clients holding another epoch resync
+        self.epoch = format(time.time_ns() // 1000, "x")
+        self.events = deque(maxlen=max_events)
+
+    def record(self, op: str, key: str, item: dict = None) -> int:
+        """Log an insert, update or delete of key; item is the current dict (None for deletes)"""
+        with self._lock:
+            self.value += 1
+            self.events.append((self.value, op, key, item))
+            return self.value
+
+    def bump(self) -> int:
+        # A change with no details: nobody behind it can catch up from the log
+        with self._lock:
+            self.events.clear()
+            self.value += 1
+            return self.value
+
+    def since(self, seq: int):
+        """
+        (current seq, changes after seq) with one entry per key, or None when
+        the log no longer reaches back to seq (or seq is from another run)
+        """
+        with self._lock:
+            current = self.value
+            oldest = self.events[0][0] if self.events else current + 1
+            if seq > current or seq < oldest - 1:
+                return None
+            # Sequence numbers in the log are contiguous, so the tail is the last (current - seq)
+            tail = list(islice(self.events, len(self.events) - (current - seq), None))
+
+        # Latest change per key wins; an insert followed by updates is still an insert
+        latest = {}
+        for event_seq, op, key, item in tail:
+            if op == "update" and latest.get(key, (None, None))[1] == "insert":
+                op = "insert"
+            latest.pop(key, None)
+            latest[key] = (event_seq, op, item)
+        return current, [(event_seq, op, key, item) for key, (event_seq, op, item) in latest.items()]
+
+def changes_response(log: ChangeLog, since, epoch, snapshot, fields=None) -> dict:
+    """
+    Body for GET .../changes. No since (first sync), another epoch or a gap the log
+    no longer covers gets reset=true and snapshot() - every current item - instead.
+    """
+    delta = log.since(since) if since is not None and epoch == log.epoch else None
+    if delta is None:
+        # Taken after reading the seq, so the snapshot is at least that new
+        current = log.value
+        return {
+            "epoch": log.epoch,
+            "since": since,
+            "seq": current,
+            "reset": True,
+            "snapshot": [project(item, fields) for item in snapshot()]
+        }
+
+    current, events = delta
+    return {
+        "epoch": log.epoch,
+        "since": since,
+        "seq": current,
+        "reset": False,
+        "changes": [
+            {"seq": event_seq, "op": op, "id": key,
+             "item": project(item, fields) if item is not None else None}
+            for event_seq, op, key, item in events
+        ]
+    }
+
+class VersionedResponses:
+    """Cache of serialized JSON responses for one collection, valid for a single version"""
+
+    def __init__(self, name: str, max_variants: int = MAX_CACHED_VARIANTS):
+        self.name = name
+        # Versions restart at 0 with the process; the epoch keeps old ETags from matching
+        self.epoch = format(time.time_ns() // 1000, "x")
+        self.max_variants = max_variants
+        self._version = None
+        self._bodies = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.not_modified = 0
+
+    def etag(self, version: int, variant: str) -> str:
+        digest = hashlib.blake2s(variant.encode("utf-8"), digest_size=6).hexdigest()
+        return f'W/"{self.name}-{self.epoch}-{version}-{digest}"'
+
+    def _cached(self, version: int, variant: str):
+        with self._lock:
+            if self._version != version:
+                # Anything cached belongs to an older version
+                self._bodies.clear()
+                self._version = version
+                return None
+            entry = self._bodies.get(variant)
+            if entry is not None:
+                self._bodies.move_to_end(variant)
+            return entry
+
+    def _store(self, version: int, variant: str, entry):
+        with self._lock:
+            if self._version != version:
+                return
+            self._bodies[variant] = entry
+            if len(self._bodies) > self.max_variants:
+                self._bodies.popitem(last=False)
+
+    def respond(self, request_headers, version: int, variant: str, build) -> Response:
+        """
+        build() -> (payload, extra_headers) is only called when this version and
+        variant have no cached body. The version must be read before build runs.
+        """
+        etag = self.etag(version, variant)
+        headers = {"ETag": etag, "Cache-Control": "no-cache", "X-Collection-Version": str(version)}
+        if etag_matches(request_headers.get("if-none-match"), etag):
+            self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+
+        entry = self._cached(version, variant)
+        if entry is None:
+            self.misses += 1
+            payload, extra_headers = build()
+            # Same encoding as FastAPI's JSONResponse
+            body = json.dumps(payload, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+            entry = (body, extra_headers)
+            self._store(version, variant, entry)
+        else:
+            self.hits += 1
+        body, extra_headers = entry
+        return Response(content=body, media_type="application/json", headers={**headers, **extra_headers})